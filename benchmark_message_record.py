@@ -0,0 +1,76 @@
+"""
+Memory benchmark: processed messages as dicts vs MessageRecord
+Run: python benchmark_message_record.py [message_count]
+"""
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from message_record import MessageRecord
+
+
+def build_dict_message(i: int, base_date: datetime) -> dict:
+    """Build a message the way _process_message used to (dict + media update)"""
+    processed = {
+        'id': i,
+        'date': (base_date + timedelta(seconds=i)).isoformat(),
+        'text': f"Message number {i}",
+        'sender_id': None,
+        'views': i * 3,
+        'forwards': i % 7,
+        'replies': i % 5,
+        'edit_date': None,
+        'media_type': None,
+        'media_file': None,
+        'file_size': None,
+        'duration': None,
+    }
+    if i % 3 == 0:
+        media_info = {
+            'media_type': 'photo',
+            'media_file': None,
+            'file_size': 1024 * i,
+            'duration': None,
+        }
+        processed.update(media_info)
+    return processed
+
+
+def build_record_message(i: int, base_date: datetime) -> MessageRecord:
+    """Build a message the way _process_message does now"""
+    processed = MessageRecord(
+        id=i,
+        date=(base_date + timedelta(seconds=i)).isoformat(),
+        text=f"Message number {i}",
+        views=i * 3,
+        forwards=i % 7,
+        replies=i % 5,
+    )
+    if i % 3 == 0:
+        processed.media_type = 'photo'
+        processed.file_size = 1024 * i
+    return processed
+
+
+def measure(builder, count: int) -> int:
+    """Return bytes allocated by a list of count messages"""
+    base_date = datetime(2025, 1, 1)
+    tracemalloc.start()
+    messages = [builder(i, base_date) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del messages
+    return current
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"📊 Memory benchmark for {count:,} processed messages\n")
+
+    dict_bytes = measure(build_dict_message, count)
+    record_bytes = measure(build_record_message, count)
+
+    print(f"   dict:          {dict_bytes / (1024 * 1024):8.2f} MB ({dict_bytes / count:.0f} B/message)")
+    print(f"   MessageRecord: {record_bytes / (1024 * 1024):8.2f} MB ({record_bytes / count:.0f} B/message)")
+    print(f"\n✅ MessageRecord uses {100 * (1 - record_bytes / dict_bytes):.1f}% less memory")
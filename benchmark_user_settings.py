@@ -0,0 +1,68 @@
+"""
+Persistence benchmark: whole-file JSON rewrite vs SQLite settings store
+Run: python benchmark_user_settings.py [user_count]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+from user_settings import UserSettings, UserSettingsManager
+
+UPDATE_COUNT = 20
+
+
+def build_settings(count: int) -> dict:
+    return {
+        user_id: UserSettings(user_id=user_id, export_format=('json', 'csv', 'markdown')[user_id % 3])
+        for user_id in range(1, count + 1)
+    }
+
+
+def write_json(path: str, settings: dict):
+    """Write the settings file the way UserSettingsManager used to on every change"""
+    data = {str(user_id): asdict(user_settings) for user_id, user_settings in settings.items()}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def timed(action) -> float:
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"📊 Persistence benchmark for {count:,} users\n")
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "user_settings.json")
+        db_path = os.path.join(folder, "user_settings.db")
+        settings = build_settings(count)
+
+        json_update = timed(lambda: [write_json(json_path, settings) for _ in range(UPDATE_COUNT)]) / UPDATE_COUNT
+        migration = timed(lambda: UserSettingsManager(json_path, db_path).close())
+
+        start = time.perf_counter()
+        manager = UserSettingsManager(json_path, db_path)
+        load_time = time.perf_counter() - start
+
+        def update_sqlite():
+            for user_id in range(1, 1001):
+                manager.update_user_setting(user_id, 'include_media', True)
+            manager.flush()
+
+        sqlite_update = timed(update_sqlite) / 1000
+        cache = manager.get_cache_stats()
+        manager.close()
+
+        print(f"   JSON rewrite per update:  {json_update * 1000:10.2f} ms")
+        print(f"   SQLite write per update:  {sqlite_update * 1000:10.2f} ms")
+        print(f"   JSON migration:           {migration * 1000:10.2f} ms")
+        print(f"   Start with lazy loading:  {load_time * 1000:10.2f} ms")
+        print(f"   Cached users after updates: {cache['size']:,} of {cache['max_size']:,}")
+        print(f"\n✅ A settings change is {json_update / sqlite_update:.0f}x faster")
@@ -2,11 +2,15 @@
 Telegram Channel Export Bot
 Main bot file with handlers and menu system
 """
+import html
 import logging
 import os
+import re
 import asyncio
+import tempfile
+import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
@@ -17,7 +21,13 @@ from telegram.constants import ParseMode
 
 from config import bot_config, export_config
 from exporters import ChannelExporter
+from format_writers import shutdown_executors
+from message_record import FIELD_PRESETS, MESSAGE_FIELDS, parse_export_fields
 from user_settings import UserSettingsManager
+from export_scheduler import ScheduleManager, ScheduledExport
+from retention_manager import RetentionManager
+from export_catalog import ExportCatalog, parse_export_name
+from utils import format_file_size
 from languages import get_text, get_language_name
 from server_monitor import ServerMonitor
 from animation_helper import AnimationHelper
@@ -38,6 +48,23 @@ class TelegramExportBot:
         self.settings_manager = UserSettingsManager()
         self.server_monitor = ServerMonitor()
         self.animation_helper = AnimationHelper()
+        # Split deliveries by delivery ID, a user can have several at once
+        self.pending_deliveries: Dict[str, Dict[str, Any]] = {}
+        self.schedule_manager = ScheduleManager(
+            export_config.schedules_file,
+            jitter_minutes=export_config.schedule_jitter_minutes
+        )
+        self.export_catalog = ExportCatalog(
+            export_config.export_catalog_path,
+            history_days=export_config.export_history_days
+        )
+        self.retention_manager = RetentionManager(
+            export_config.export_folder,
+            max_size_mb=export_config.retention_max_size_mb,
+            max_age_hours=export_config.retention_max_age_hours,
+            grace_minutes=export_config.retention_grace_minutes,
+            catalog=self.export_catalog
+        )
         
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -128,7 +155,8 @@ class TelegramExportBot:
             language=language_name,
             format=user_settings.export_format.upper(),
             media=media_status,
-            max_messages=user_settings.max_messages
+            max_messages=user_settings.max_messages,
+            fields=self._describe_fields(lang, user_settings.export_fields)
         )
         
         keyboard = [
@@ -136,6 +164,7 @@ class TelegramExportBot:
             [InlineKeyboardButton(get_text(lang, 'btn_export_format'), callback_data="format_menu")],
             [InlineKeyboardButton(get_text(lang, 'btn_media_settings'), callback_data="media_menu")],
             [InlineKeyboardButton(get_text(lang, 'btn_message_limit'), callback_data="limit_menu")],
+            [InlineKeyboardButton(get_text(lang, 'btn_export_fields'), callback_data="fields_menu")],
             [InlineKeyboardButton(get_text(lang, 'btn_server_stats'), callback_data="server_stats_menu")],
             [InlineKeyboardButton(get_text(lang, 'btn_reset_settings'), callback_data="reset_settings")],
             [InlineKeyboardButton(get_text(lang, 'btn_help'), callback_data="help")],
@@ -173,6 +202,8 @@ class TelegramExportBot:
             await self.show_media_menu(update, context)
         elif data == "limit_menu":
             await self.show_limit_menu(update, context)
+        elif data == "fields_menu":
+            await self.show_fields_menu(update, context)
         elif data == "server_stats_menu":
             await self.show_server_stats_menu(update, context)
         elif data == "system_overview":
@@ -195,6 +226,9 @@ class TelegramExportBot:
             await self.show_help(update, context)
         elif data == "reset_settings":
             await self.reset_user_settings(update, context, user_id)
+        elif data.startswith("resume_delivery:"):
+            delivery_id = data.replace("resume_delivery:", "")
+            await self.resume_delivery(update, context, user_id, delivery_id)
         elif data.startswith("set_language_"):
             language = data.replace("set_language_", "")
             await self.set_language(update, context, user_id, language)
@@ -207,6 +241,9 @@ class TelegramExportBot:
         elif data.startswith("set_limit_"):
             limit = int(data.replace("set_limit_", ""))
             await self.set_message_limit(update, context, user_id, limit)
+        elif data.startswith("set_fields_"):
+            preset = data.replace("set_fields_", "")
+            await self.set_export_fields(update, context, user_id, preset)
 
     async def show_language_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show language selection menu"""
@@ -242,6 +279,8 @@ class TelegramExportBot:
             [InlineKeyboardButton(get_text(lang, 'btn_json'), callback_data="set_format_json")],
             [InlineKeyboardButton(get_text(lang, 'btn_csv'), callback_data="set_format_csv")],
             [InlineKeyboardButton(get_text(lang, 'btn_markdown'), callback_data="set_format_markdown")],
+            [InlineKeyboardButton(get_text(lang, 'btn_json_markdown'), callback_data="set_format_json+markdown")],
+            [InlineKeyboardButton(get_text(lang, 'btn_all_formats'), callback_data="set_format_json+csv+markdown")],
             [InlineKeyboardButton(get_text(lang, 'btn_back'), callback_data="main_menu")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -299,6 +338,35 @@ class TelegramExportBot:
             parse_mode=ParseMode.HTML
         )
 
+    async def show_fields_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show export fields menu"""
+        user_id = update.effective_user.id
+        user_settings = self.settings_manager.get_user_settings(user_id)
+        lang = user_settings.language
+        
+        menu_text = get_text(lang, 'fields_menu_text',
+                             fields=self._describe_fields(lang, user_settings.export_fields))
+        
+        keyboard = [
+            [InlineKeyboardButton(get_text(lang, f'btn_fields_{preset}'), callback_data=f"set_fields_{preset}")]
+            for preset in FIELD_PRESETS
+        ]
+        keyboard.append([InlineKeyboardButton(get_text(lang, 'btn_back'), callback_data="main_menu")])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await update.callback_query.edit_message_text(
+            menu_text, 
+            reply_markup=reply_markup,
+            parse_mode=ParseMode.HTML
+        )
+
+    def _describe_fields(self, lang: str, export_fields) -> str:
+        """Short description of a field selection for menus"""
+        fields = parse_export_fields(export_fields)
+        if fields is MESSAGE_FIELDS:
+            return get_text(lang, 'all_fields')
+        return ', '.join(fields)
+
     async def show_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show help information"""
         user_id = update.effective_user.id
@@ -392,6 +460,26 @@ class TelegramExportBot:
         await asyncio.sleep(1)
         await self.show_main_menu(update, context)
 
+    async def set_export_fields(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, preset: str):
+        """Set user's export fields from a preset"""
+        user_settings = self.settings_manager.get_user_settings(user_id)
+        lang = user_settings.language
+        
+        fields = parse_export_fields(preset)
+        export_fields = None if fields is MESSAGE_FIELDS else list(fields)
+        self.settings_manager.update_user_setting(user_id, 'export_fields', export_fields)
+        
+        message_text = get_text(lang, 'fields_set', fields=self._describe_fields(lang, export_fields))
+        
+        await update.callback_query.edit_message_text(
+            message_text,
+            parse_mode=ParseMode.HTML
+        )
+        
+        # Show main menu after a short delay
+        await asyncio.sleep(1)
+        await self.show_main_menu(update, context)
+
     async def reset_user_settings(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
         """Reset user settings to defaults"""
         user_settings = self.settings_manager.get_user_settings(user_id)
@@ -417,6 +505,12 @@ class TelegramExportBot:
         user_settings = self.settings_manager.get_user_settings(user_id)
         lang = user_settings.language
         
+        # Several channels in one message start a batch export
+        channel_usernames = self._extract_channel_usernames(message_text)
+        if len(channel_usernames) > 1:
+            await self._run_batch_export(update, context, channel_usernames, user_settings)
+            return
+        
         # Extract channel username
         channel_username = self._extract_channel_username(message_text)
         
@@ -426,6 +520,62 @@ class TelegramExportBot:
             )
             return
         
+        await self._run_export(update, context, channel_username, user_settings)
+
+    async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /search <channel> <keyword>[, <keyword>...] to export only matching messages"""
+        user_id = update.effective_user.id
+        user_settings = self.settings_manager.get_user_settings(user_id)
+        lang = user_settings.language
+        
+        channel_username = self._extract_channel_username(context.args[0]) if context.args else ""
+        search = ' '.join(context.args[1:]).strip()
+        
+        if not channel_username or not search:
+            await update.message.reply_text(get_text(lang, 'search_usage'), parse_mode=ParseMode.HTML)
+            return
+        
+        await self._run_export(update, context, channel_username, user_settings, search=search)
+
+    async def find_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /find <words> to look up posts in earlier exports"""
+        user_id = update.effective_user.id
+        lang = self.settings_manager.get_user_settings(user_id).language
+        query = ' '.join(context.args).strip()
+        
+        if not query:
+            await update.message.reply_text(get_text(lang, 'find_usage'), parse_mode=ParseMode.HTML)
+            return
+        
+        search_index = self.exporter.get_search_index()
+        if search_index is None:
+            await update.message.reply_text(get_text(lang, 'find_disabled'))
+            return
+        
+        results = await asyncio.to_thread(search_index.search, query)
+        if not results:
+            await update.message.reply_text(get_text(lang, 'find_no_results', query=html.escape(query)))
+            return
+        
+        text = get_text(lang, 'find_header', query=html.escape(query))
+        for result in results:
+            item = get_text(lang, 'find_item',
+                channel=result['channel'],
+                message_id=result['message_id'],
+                date=(result['date'] or '')[:10],
+                snippet=html.escape(result['snippet'])
+            )
+            if len(text) + len(item) > 4000:  # Message length limit, without cutting tags
+                break
+            text += item
+        await update.message.reply_text(text, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
+
+    async def _run_export(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                          channel_username: str, user_settings, search: str = None):
+        """Export a channel with the user's settings and send the archive"""
+        user_id = update.effective_user.id
+        lang = user_settings.language
+        
         # Send initial status message
         media_status = get_text(lang, 'included') if user_settings.include_media else get_text(lang, 'excluded')
         status_text = get_text(lang, 'export_starting',
@@ -433,6 +583,8 @@ class TelegramExportBot:
             format=user_settings.export_format.upper(),
             media=media_status
         )
+        if search:
+            status_text += get_text(lang, 'search_keywords', keywords=search)
         
         status_message = await update.message.reply_text(status_text)
         
@@ -443,7 +595,9 @@ class TelegramExportBot:
                 export_format=user_settings.export_format,
                 include_media=user_settings.include_media,
                 max_messages=user_settings.max_messages,
-                progress_callback=lambda msg: self._update_progress(status_message, msg)
+                progress_callback=lambda msg: self._update_progress(status_message, msg),
+                fields=user_settings.export_fields,
+                search=search
             )
             
             # Send the exported file
@@ -457,6 +611,339 @@ class TelegramExportBot:
             error_text = get_text(lang, 'export_failed', error=str(e))
             await status_message.edit_text(error_text)
 
+    async def handle_archive_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle export archives sent back to the bot to refresh their statistics"""
+        user_id = update.effective_user.id
+        user_settings = self.settings_manager.get_user_settings(user_id)
+        lang = user_settings.language
+        document = update.message.document
+        
+        # The Bot API only lets bots download files up to 20 MB (more with a local Bot API server)
+        if document.file_size and document.file_size > export_config.max_download_size_mb * 1024 * 1024:
+            await update.message.reply_text(get_text(lang, 'stats_refresh_too_large',
+                size=document.file_size / (1024 * 1024),
+                limit=export_config.max_download_size_mb
+            ))
+            return
+        
+        status_message = await update.message.reply_text(get_text(lang, 'stats_refresh_starting'))
+        
+        try:
+            with tempfile.TemporaryDirectory(dir=export_config.export_folder) as download_dir:
+                archive_path = os.path.join(download_dir, os.path.basename(document.file_name))
+                telegram_file = await document.get_file()
+                await telegram_file.download_to_drive(archive_path)
+                
+                refreshed_path = await self.exporter.refresh_archive_statistics(
+                    archive_path,
+                    progress_callback=lambda msg: self._update_progress(status_message, msg)
+                )
+            
+        except Exception as e:
+            logger.error(f"Statistics refresh failed for user {user_id}: {str(e)}")
+            await status_message.edit_text(get_text(lang, 'stats_refresh_failed', error=str(e)))
+            return
+        
+        # Large refreshed archives go through the user client or volumes like any export
+        channel_username, export_format = parse_export_name(document.file_name)
+        caption = get_text(lang, 'stats_refresh_completed',
+            time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+        await self._send_export_file(update, context, refreshed_path, channel_username or 'archive', user_settings,
+                                     export_format=export_format, caption=caption)
+
+    async def _run_batch_export(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                channel_usernames: list, user_settings):
+        """Export several channels with the user's settings and send the archives"""
+        user_id = update.effective_user.id
+        lang = user_settings.language
+        
+        if len(channel_usernames) > export_config.batch_max_channels:
+            await update.message.reply_text(get_text(lang, 'batch_too_many',
+                count=len(channel_usernames), max_channels=export_config.batch_max_channels))
+            return
+        
+        status_message = await update.message.reply_text(get_text(lang, 'batch_starting',
+            count=len(channel_usernames),
+            format=user_settings.export_format.upper()
+        ))
+        
+        try:
+            result = await self.exporter.export_channels(
+                channel_usernames,
+                export_format=user_settings.export_format,
+                include_media=user_settings.include_media,
+                max_messages=user_settings.max_messages,
+                progress_callback=lambda msg: self._update_progress(status_message, msg),
+                fields=user_settings.export_fields,
+                combine=export_config.batch_combine_archives
+            )
+        except Exception as e:
+            logger.error(f"Batch export failed for user {user_id}: {str(e)}")
+            await status_message.edit_text(get_text(lang, 'export_failed', error=str(e)))
+            return
+        
+        summary = get_text(lang, 'batch_completed',
+            exported=len(result['exported']), total=len(channel_usernames))
+        if result['failed']:
+            summary += '\n' + '\n'.join(
+                f"❌ @{username}: {error}" for username, error in result['failed'].items()
+            )
+        await self._update_progress(status_message, summary)
+        
+        if len(result['archives']) == 1 and len(result['exported']) > 1:
+            # One combined archive for all channels
+            shown = result['exported'][:3]
+            label = ', @'.join(shown)
+            if len(result['exported']) > len(shown):
+                label += f" +{len(result['exported']) - len(shown)}"
+            await self._send_export_file(update, context, result['archives'][0], label, user_settings)
+        else:
+            for username, archive_path in zip(result['exported'], result['archives']):
+                await self._send_export_file(update, context, archive_path, username, user_settings)
+        
+        if result['exported']:
+            self.settings_manager.update_user_setting(user_id, 'last_export', datetime.now().isoformat())
+
+    async def schedule_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /schedule <channel> <hours> to register a recurring delta export"""
+        user_id = update.effective_user.id
+        user_settings = self.settings_manager.get_user_settings(user_id)
+        lang = user_settings.language
+        
+        channel_username = self._extract_channel_username(context.args[0]) if context.args else ""
+        try:
+            interval_hours = int(context.args[1]) if len(context.args) > 1 else 24
+        except ValueError:
+            interval_hours = 0
+        
+        if not channel_username:
+            await update.message.reply_text(get_text(lang, 'schedule_usage'), parse_mode=ParseMode.HTML)
+            return
+        
+        if interval_hours < export_config.schedule_min_interval_hours:
+            await update.message.reply_text(get_text(lang, 'schedule_invalid_interval',
+                min_hours=export_config.schedule_min_interval_hours))
+            return
+        
+        if len(self.schedule_manager.get_user_schedules(user_id)) >= export_config.schedule_max_per_user:
+            await update.message.reply_text(get_text(lang, 'schedule_limit_reached',
+                max_schedules=export_config.schedule_max_per_user))
+            return
+        
+        # The first run exports what is posted from now on, not the whole channel
+        try:
+            newest_id = await self.exporter.get_newest_message_id(channel_username)
+        except Exception as e:
+            await update.message.reply_text(get_text(lang, 'schedule_channel_failed',
+                channel=channel_username, error=str(e)))
+            return
+        
+        schedule = self.schedule_manager.add_schedule(
+            user_id, update.effective_chat.id, channel_username, interval_hours,
+            export_format=user_settings.export_format,
+            include_media=user_settings.include_media,
+            fields=user_settings.export_fields,
+            last_message_id=newest_id
+        )
+        self._queue_scheduled_export(schedule)
+        
+        await update.message.reply_text(get_text(lang, 'schedule_added',
+            schedule_id=schedule.schedule_id,
+            channel=channel_username,
+            hours=interval_hours,
+            format=schedule.export_format.upper(),
+            next_run=datetime.fromisoformat(schedule.next_run).strftime('%Y-%m-%d %H:%M')
+        ), parse_mode=ParseMode.HTML)
+
+    async def schedules_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /schedules to list the user's recurring exports"""
+        user_id = update.effective_user.id
+        lang = self.settings_manager.get_user_settings(user_id).language
+        schedules = self.schedule_manager.get_user_schedules(user_id)
+        
+        if not schedules:
+            await update.message.reply_text(get_text(lang, 'schedules_empty'))
+            return
+        
+        lines = [get_text(lang, 'schedules_header')]
+        for schedule in schedules:
+            lines.append(get_text(lang, 'schedule_item',
+                schedule_id=schedule.schedule_id,
+                channel=schedule.channel,
+                hours=schedule.interval_hours,
+                format=schedule.export_format.upper(),
+                next_run=datetime.fromisoformat(schedule.next_run).strftime('%Y-%m-%d %H:%M')
+            ))
+        await update.message.reply_text('\n'.join(lines), parse_mode=ParseMode.HTML)
+
+    async def exports_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /exports to list the user's recent exports"""
+        user_id = update.effective_user.id
+        lang = self.settings_manager.get_user_settings(user_id).language
+        history = self.export_catalog.get_user_history(user_id)
+        
+        if not history:
+            await update.message.reply_text(get_text(lang, 'exports_empty'))
+            return
+        
+        lines = [get_text(lang, 'exports_header')]
+        for entry in history:
+            lines.append(get_text(lang, 'exports_item',
+                date=entry['created_at'].strftime('%Y-%m-%d %H:%M'),
+                channel=entry['channel'] or entry['filename'],
+                format=entry['format'].upper(),
+                size=format_file_size(entry['size']),
+                status=get_text(lang, 'exports_removed') if entry['removed_at'] else ''
+            ))
+        await update.message.reply_text('\n'.join(lines), parse_mode=ParseMode.HTML)
+
+    async def unschedule_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /unschedule <id> to remove a recurring export"""
+        user_id = update.effective_user.id
+        lang = self.settings_manager.get_user_settings(user_id).language
+        
+        try:
+            schedule_id = int(context.args[0])
+        except (IndexError, ValueError):
+            await update.message.reply_text(get_text(lang, 'schedule_usage'), parse_mode=ParseMode.HTML)
+            return
+        
+        if not self.schedule_manager.remove_schedule(user_id, schedule_id):
+            await update.message.reply_text(get_text(lang, 'schedule_not_found', schedule_id=schedule_id))
+            return
+        
+        if self.application and self.application.job_queue:
+            for job in self.application.job_queue.get_jobs_by_name(f"scheduled_export_{schedule_id}"):
+                job.schedule_removal()
+        
+        await update.message.reply_text(get_text(lang, 'schedule_removed', schedule_id=schedule_id))
+
+    def _queue_scheduled_export(self, schedule: ScheduledExport):
+        """Plan the next run of a schedule on the job queue"""
+        if not self.application or not self.application.job_queue:
+            logger.warning("Job queue is not available, scheduled exports will not run")
+            return
+        
+        self.application.job_queue.run_once(
+            self._run_scheduled_export,
+            when=self.schedule_manager.get_delay(schedule),
+            data=schedule.schedule_id,
+            name=f"scheduled_export_{schedule.schedule_id}"
+        )
+
+    async def _run_scheduled_export(self, context: ContextTypes.DEFAULT_TYPE):
+        """Export and deliver the messages posted since the previous run of a schedule"""
+        schedule = self.schedule_manager.get_schedule(context.job.data)
+        if schedule is None:
+            return  # Removed since it was queued
+        
+        lang = self.settings_manager.get_user_settings(schedule.user_id).language
+        newest_id = None
+        
+        try:
+            async with self.exporter.get_export_semaphore():
+                archive_path, newest_id = await self.exporter.export_channel_delta(
+                    schedule.channel, schedule.last_message_id,
+                    export_format=schedule.export_format,
+                    include_media=schedule.include_media,
+                    max_messages=export_config.max_messages_per_export,
+                    fields=schedule.fields
+                )
+            
+            if archive_path:
+                await self._deliver_scheduled_archive(context, schedule, archive_path, lang)
+        
+        except Exception as e:
+            newest_id = None  # Retry the same range next time
+            logger.error(f"Scheduled export {schedule.schedule_id} of @{schedule.channel} failed: {str(e)}")
+            try:
+                await context.bot.send_message(chat_id=schedule.chat_id, text=get_text(lang, 'schedule_run_failed',
+                    channel=schedule.channel, error=str(e)))
+            except Exception:
+                pass
+        
+        finally:
+            schedule = self.schedule_manager.record_run(schedule.schedule_id, newest_id)
+            if schedule is not None:
+                self._queue_scheduled_export(schedule)
+
+    async def _deliver_scheduled_archive(self, context: ContextTypes.DEFAULT_TYPE, schedule: ScheduledExport,
+                                         archive_path: str, lang: str):
+        """Send a delta archive to the chat of a schedule, in volumes when it is too large"""
+        self.export_catalog.add(archive_path, schedule.user_id, schedule.channel, schedule.export_format)
+        file_size = os.path.getsize(archive_path) / (1024 * 1024)
+        
+        if file_size <= export_config.max_upload_size_mb:
+            caption = get_text(lang, 'schedule_delta_caption',
+                channel=schedule.channel,
+                format=schedule.export_format.upper(),
+                size=file_size,
+                time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            )
+            with open(archive_path, 'rb') as file:
+                await context.bot.send_document(
+                    chat_id=schedule.chat_id,
+                    document=file,
+                    caption=caption,
+                    parse_mode=ParseMode.HTML
+                )
+            self._remove_export(archive_path)
+            return
+        
+        status_message = await context.bot.send_message(
+            chat_id=schedule.chat_id,
+            text=get_text(lang, 'archive_splitting', limit=export_config.max_upload_size_mb)
+        )
+        volumes = await self._split_export_archive(context, archive_path, schedule.chat_id, schedule.user_id,
+                                                   schedule.channel, schedule.export_format, lang)
+        
+        delivery_id = self._add_pending_delivery(schedule.user_id, schedule.chat_id, schedule.channel,
+                                                 schedule.export_format, volumes)
+        await self._deliver_pending_volumes(context, delivery_id, lang, status_message)
+
+    def _remove_export(self, file_path: str):
+        """Delete a delivered export file and mark it removed in the catalog"""
+        os.remove(file_path)
+        self.export_catalog.remove([file_path])
+
+    async def _flush_user_settings(self, context: ContextTypes.DEFAULT_TYPE):
+        """Write settings changes of users that stopped clicking"""
+        self.settings_manager.flush()
+        cache = self.settings_manager.get_cache_stats()
+        logger.debug(f"Settings cache: {cache['size']}/{cache['max_size']} users, {cache['hit_rate']:.1%} hits")
+
+    async def _post_shutdown(self, application: Application):
+        """Write pending settings changes and stop render workers before the process exits"""
+        self.settings_manager.close()
+        await asyncio.to_thread(shutdown_executors)
+
+    async def _run_retention_sweep(self, context: ContextTypes.DEFAULT_TYPE):
+        """Remove expired and least recently used exports"""
+        try:
+            stats = await self.retention_manager.sweep()
+            logger.debug(f"Export folder: {stats['usage_mb']:.1f} MB in {stats['file_count']} files")
+        except Exception as e:
+            logger.error(f"Retention sweep failed: {str(e)}")
+
+    def _extract_channel_usernames(self, text: str) -> list:
+        """
+        Extract unique channel usernames from a message listing several channels
+        
+        Every channel must be written as @name or a t.me link, so ordinary
+        words are never taken for a channel list.
+        """
+        usernames = []
+        for token in re.split(r'[\s,;]+', text.strip()):
+            if not token.startswith('@') and 't.me/' not in token:
+                return []  # Not a channel list
+            username = self._extract_channel_username(token)
+            if not username:
+                return []
+            if username.lower() not in (u.lower() for u in usernames):
+                usernames.append(username)
+        return usernames
+
     def _extract_channel_username(self, text: str) -> str:
         """Extract channel username from various formats"""
         text = text.strip()
@@ -483,19 +970,40 @@ class TelegramExportBot:
             pass  # Ignore rate limit errors
 
     async def _send_export_file(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
-                               file_path: str, channel_username: str, user_settings):
-        """Send the exported file to user"""
+                               file_path: str, channel_username: str, user_settings,
+                               export_format: Optional[str] = None, caption: Optional[str] = None):
+        """
+        Send the exported file to user
+        
+        export_format and caption default to the user's format and the
+        export completed caption.
+        """
         lang = user_settings.language
+        export_format = export_format or user_settings.export_format
+        self.export_catalog.add(file_path, update.effective_user.id, channel_username, export_format)
+        # Left behind if sending fails, keep it in the export folder for a while
+        self.retention_manager.touch(file_path)
         
         try:
             file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
             
-            caption = get_text(lang, 'export_completed',
-                channel=channel_username,
-                format=user_settings.export_format.upper(),
-                size=file_size,
-                time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            )
+            if caption is None:
+                caption = get_text(lang, 'export_completed',
+                    channel=channel_username,
+                    format=export_format.upper(),
+                    size=file_size,
+                    time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                )
+            
+            if file_size > export_config.max_upload_size_mb:
+                if (export_config.user_client_delivery
+                        and file_size <= export_config.user_client_max_size_mb
+                        and await self._send_via_user_client(update, file_path, user_settings,
+                                                             file_size, caption)):
+                    return
+                await self._send_export_volumes(update, context, file_path, channel_username, user_settings,
+                                                export_format)
+                return
             
             with open(file_path, 'rb') as file:
                 await update.message.reply_document(
@@ -505,13 +1013,165 @@ class TelegramExportBot:
                 )
             
             # Clean up file after sending
-            os.remove(file_path)
+            self._remove_export(file_path)
             
         except Exception as e:
             logger.error(f"Failed to send file: {str(e)}")
             error_text = get_text(lang, 'file_send_failed', error=str(e))
             await update.message.reply_text(error_text)
 
+    async def _send_via_user_client(self, update: Update, file_path: str, user_settings,
+                                    file_size: float, caption: str) -> bool:
+        """Send a large archive through the Telethon user client, returns False on failure"""
+        user = update.effective_user
+        lang = user_settings.language
+        
+        status_message = await update.message.reply_text(
+            get_text(lang, 'user_client_sending', limit=export_config.max_upload_size_mb)
+        )
+        
+        try:
+            await self.exporter.send_file_to_user(
+                user=user.username or user.id,
+                file_path=file_path,
+                caption=caption,
+                progress_callback=lambda msg: self._update_progress(status_message, msg)
+            )
+        except Exception as e:
+            logger.warning(f"User client delivery failed for user {user.id}, falling back to parts: {str(e)}")
+            return False
+        
+        self._remove_export(file_path)
+        await self._update_progress(status_message, get_text(lang, 'user_client_sent', size=file_size))
+        return True
+
+    async def _send_export_volumes(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                   file_path: str, channel_username: str, user_settings, export_format: str):
+        """Split an archive above the Bot API limit into volumes and send them in order"""
+        user_id = update.effective_user.id
+        lang = user_settings.language
+        
+        status_message = await update.message.reply_text(
+            get_text(lang, 'archive_splitting', limit=export_config.max_upload_size_mb)
+        )
+        
+        volumes = await self._split_export_archive(context, file_path, update.effective_chat.id, user_id,
+                                                   channel_username, export_format, lang)
+        
+        delivery_id = self._add_pending_delivery(user_id, update.effective_chat.id, channel_username,
+                                                 export_format, volumes)
+        await self._deliver_pending_volumes(context, delivery_id, lang, status_message)
+
+    async def _split_export_archive(self, context: ContextTypes.DEFAULT_TYPE, file_path: str, chat_id: int,
+                                    user_id: int, channel_username: str, export_format: str,
+                                    lang: str) -> list:
+        """Replace an archive with its upload-sized volumes, telling the user about files left out"""
+        volumes, skipped = await asyncio.to_thread(
+            self.exporter.zip_creator.split_archive,
+            file_path,
+            export_config.max_upload_size_mb * 1024 * 1024
+        )
+        self._remove_export(file_path)
+        for volume_path in volumes:
+            self.export_catalog.add(volume_path, user_id, channel_username, export_format)
+        
+        if skipped:
+            files = '\n'.join(f"• {name}" for name in skipped[:20])
+            if len(skipped) > 20:
+                files += f"\n… +{len(skipped) - 20}"
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=get_text(lang, 'parts_skipped_files', limit=export_config.max_upload_size_mb, files=files)
+            )
+        return volumes
+
+    def _add_pending_delivery(self, user_id: int, chat_id: int, channel_username: str,
+                              export_format: str, volumes: list) -> str:
+        """Register a split delivery under a new ID, used by its resume button"""
+        delivery_id = uuid.uuid4().hex[:12]
+        self.pending_deliveries[delivery_id] = {
+            'user_id': user_id,
+            'chat_id': chat_id,
+            'channel': channel_username,
+            'format': export_format,
+            'volumes': volumes,
+            'next_index': 0,
+        }
+        return delivery_id
+
+    async def _deliver_pending_volumes(self, context: ContextTypes.DEFAULT_TYPE, delivery_id: str,
+                                       lang: str, status_message):
+        """Send remaining volumes of a pending delivery, keeping the position for resume"""
+        delivery = self.pending_deliveries[delivery_id]
+        user_id = delivery['user_id']
+        volumes = delivery['volumes']
+        total = len(volumes)
+        
+        # Volumes are not evicted while they are being sent
+        self.retention_manager.pin(volumes)
+        
+        while delivery['next_index'] < total:
+            index = delivery['next_index']
+            volume_path = volumes[index]
+            
+            await self._update_progress(status_message, get_text(lang, 'sending_part',
+                current=index + 1, total=total))
+            
+            try:
+                caption = get_text(lang, 'export_part_caption',
+                    current=index + 1,
+                    total=total,
+                    channel=delivery['channel'],
+                    size=os.path.getsize(volume_path) / (1024 * 1024)
+                )
+                
+                with open(volume_path, 'rb') as file:
+                    await context.bot.send_document(
+                        chat_id=delivery['chat_id'],
+                        document=file,
+                        caption=caption,
+                        parse_mode=ParseMode.HTML
+                    )
+            except Exception as e:
+                logger.error(f"Failed to send part {index + 1}/{total} to user {user_id}: {str(e)}")
+                keyboard = [
+                    [InlineKeyboardButton(get_text(lang, 'btn_resume_delivery'),
+                                          callback_data=f"resume_delivery:{delivery_id}")],
+                ]
+                await context.bot.send_message(
+                    chat_id=delivery['chat_id'],
+                    text=get_text(lang, 'delivery_interrupted', current=index + 1, total=total, error=str(e)),
+                    reply_markup=InlineKeyboardMarkup(keyboard)
+                )
+                self.retention_manager.unpin(volumes)
+                for path in volumes[index:]:
+                    self.retention_manager.touch(path)
+                return
+            
+            self._remove_export(volume_path)
+            delivery['next_index'] = index + 1
+        
+        self.pending_deliveries.pop(delivery_id, None)
+        self.retention_manager.unpin(volumes)
+        await self._update_progress(status_message, get_text(lang, 'parts_completed',
+            channel=delivery['channel'],
+            format=delivery['format'].upper(),
+            total=total
+        ))
+
+    async def resume_delivery(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int,
+                              delivery_id: str):
+        """Resume an interrupted multi-part delivery from the first unsent volume"""
+        user_settings = self.settings_manager.get_user_settings(user_id)
+        lang = user_settings.language
+        
+        delivery = self.pending_deliveries.get(delivery_id)
+        if delivery is None or delivery['user_id'] != user_id:
+            await update.callback_query.edit_message_text(get_text(lang, 'delivery_not_found'))
+            return
+        
+        await self._deliver_pending_volumes(context, delivery_id, lang, update.callback_query.message)
+
     # Server Monitoring Methods
     async def show_server_stats_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show server statistics menu"""
@@ -727,6 +1387,15 @@ class TelegramExportBot:
                 )
                 disk_text += disk_item
             
+            retention = self.retention_manager.get_stats()
+            quota = f"{retention['quota_mb']:.0f} MB" if retention['quota_mb'] else "∞"
+            disk_text += (
+                f"📦 <b>Exports</b>\n"
+                f"  📊 Used: <b>{retention['usage_mb']:.1f} MB</b> / {quota} in {retention['file_count']} files\n"
+                f"  🗑️ Removed: {retention['expired_files']} expired ({retention['expired_mb']:.1f} MB), "
+                f"{retention['evicted_files']} over quota ({retention['evicted_mb']:.1f} MB)\n"
+            )
+            
             keyboard = [
                 [InlineKeyboardButton(get_text(lang, 'btn_refresh_stats'), callback_data="refresh_disk_stats")],
                 [InlineKeyboardButton(get_text(lang, 'btn_back'), callback_data="server_stats_menu")],
@@ -883,15 +1552,47 @@ class TelegramExportBot:
             return
         
         # Create application
-        self.application = Application.builder().token(bot_config.bot_token).build()
+        self.application = (
+            Application.builder()
+            .token(bot_config.bot_token)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         
         # Add handlers
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
         self.application.add_handler(CommandHandler("menu", self.menu_command))
         self.application.add_handler(CommandHandler("status", self.status_command))
+        self.application.add_handler(CommandHandler("search", self.search_command))
+        self.application.add_handler(CommandHandler("schedule", self.schedule_command))
+        self.application.add_handler(CommandHandler("schedules", self.schedules_command))
+        self.application.add_handler(CommandHandler("unschedule", self.unschedule_command))
+        self.application.add_handler(CommandHandler("exports", self.exports_command))
+        self.application.add_handler(CommandHandler("find", self.find_command))
         self.application.add_handler(CallbackQueryHandler(self.handle_callback_query))
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_channel_message))
+        self.application.add_handler(MessageHandler(filters.Document.FileExtension("zip"), self.handle_archive_document))
+        
+        # Plan the runs of stored scheduled exports
+        for schedule in self.schedule_manager.get_all_schedules():
+            self._queue_scheduled_export(schedule)
+        
+        # Keep the export folder within its quota and age limit
+        if self.application.job_queue:
+            self.application.job_queue.run_repeating(
+                self._run_retention_sweep,
+                interval=export_config.retention_interval_minutes * 60,
+                first=60,
+                name="retention_sweep"
+            )
+            self.application.job_queue.run_repeating(
+                self._flush_user_settings,
+                interval=max(export_config.user_settings_flush_seconds, 1),
+                name="user_settings_flush"
+            )
+        else:
+            logger.warning("Job queue is not available, old exports will not be removed")
         
         # Start bot
         logger.info("Starting Telegram Channel Export Bot...")
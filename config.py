@@ -39,6 +39,40 @@ class ExportConfig:
     include_media_by_default: bool = False
     max_messages_per_export: int = 10000
     export_folder: str = 'exports'
+    max_upload_size_mb: int = 50
+    max_download_size_mb: int = 20
+    user_client_delivery: bool = True
+    user_client_max_size_mb: int = 2000
+    upload_workers: int = 4
+    message_store_enabled: bool = True
+    message_store_path: str = 'data/message_store.db'
+    # Every check downloads the whole window again: the export limit, or all stored history
+    reconcile_interval_hours: int = 24  # 0 = never check for edits and deletions
+    reconcile_range_size: int = 100  # Messages per compared digest, not the amount downloaded
+    spill_threshold_messages: int = 20000
+    spill_threshold_rss_mb: int = 384
+    shard_max_messages: int = 0
+    shard_max_size_mb: int = 0
+    batch_concurrency: int = 3
+    batch_max_channels: int = 50
+    batch_combine_archives: bool = True
+    schedules_file: str = 'scheduled_exports.json'
+    schedule_min_interval_hours: int = 1
+    schedule_max_per_user: int = 10
+    schedule_jitter_minutes: int = 30
+    retention_max_size_mb: int = 2048
+    retention_max_age_hours: int = 72
+    retention_interval_minutes: int = 15
+    retention_grace_minutes: int = 10
+    export_catalog_path: str = 'data/export_catalog.db'
+    export_history_days: int = 30
+    search_index_enabled: bool = True
+    search_index_path: str = 'data/search_index.db'
+    user_settings_db_path: str = 'data/user_settings.db'
+    user_settings_flush_seconds: int = 5
+    user_settings_flush_max_dirty: int = 100
+    user_settings_cache_size: int = 10000
+    markdown_processes: int = 0  # 0 = available CPUs, at most 4
     
     @classmethod
     def from_env(cls):
@@ -47,7 +81,40 @@ class ExportConfig:
             default_format=os.getenv('DEFAULT_EXPORT_FORMAT', 'json'),
             include_media_by_default=os.getenv('INCLUDE_MEDIA_BY_DEFAULT', 'false').lower() == 'true',
             max_messages_per_export=int(os.getenv('MAX_MESSAGES_PER_EXPORT', '10000')),
-            export_folder=os.getenv('EXPORT_FOLDER', 'exports')
+            export_folder=os.getenv('EXPORT_FOLDER', 'exports'),
+            max_upload_size_mb=int(os.getenv('MAX_UPLOAD_SIZE_MB', '50')),
+            max_download_size_mb=int(os.getenv('MAX_DOWNLOAD_SIZE_MB', '20')),
+            user_client_delivery=os.getenv('USER_CLIENT_DELIVERY', 'true').lower() == 'true',
+            user_client_max_size_mb=int(os.getenv('USER_CLIENT_MAX_SIZE_MB', '2000')),
+            upload_workers=int(os.getenv('UPLOAD_WORKERS', '4')),
+            message_store_enabled=os.getenv('MESSAGE_STORE_ENABLED', 'true').lower() == 'true',
+            message_store_path=os.getenv('MESSAGE_STORE_PATH', 'data/message_store.db'),
+            reconcile_interval_hours=int(os.getenv('RECONCILE_INTERVAL_HOURS', '24')),
+            reconcile_range_size=int(os.getenv('RECONCILE_RANGE_SIZE', '100')),
+            spill_threshold_messages=int(os.getenv('SPILL_THRESHOLD_MESSAGES', '20000')),
+            spill_threshold_rss_mb=int(os.getenv('SPILL_THRESHOLD_RSS_MB', '384')),
+            shard_max_messages=int(os.getenv('SHARD_MAX_MESSAGES', '0')),
+            shard_max_size_mb=int(os.getenv('SHARD_MAX_SIZE_MB', '0')),
+            batch_concurrency=int(os.getenv('BATCH_CONCURRENCY', '3')),
+            batch_max_channels=int(os.getenv('BATCH_MAX_CHANNELS', '50')),
+            batch_combine_archives=os.getenv('BATCH_COMBINE_ARCHIVES', 'true').lower() == 'true',
+            schedules_file=os.getenv('SCHEDULES_FILE', 'scheduled_exports.json'),
+            schedule_min_interval_hours=int(os.getenv('SCHEDULE_MIN_INTERVAL_HOURS', '1')),
+            schedule_max_per_user=int(os.getenv('SCHEDULE_MAX_PER_USER', '10')),
+            schedule_jitter_minutes=int(os.getenv('SCHEDULE_JITTER_MINUTES', '30')),
+            retention_max_size_mb=int(os.getenv('RETENTION_MAX_SIZE_MB', '2048')),
+            retention_max_age_hours=int(os.getenv('RETENTION_MAX_AGE_HOURS', '72')),
+            retention_interval_minutes=int(os.getenv('RETENTION_INTERVAL_MINUTES', '15')),
+            retention_grace_minutes=int(os.getenv('RETENTION_GRACE_MINUTES', '10')),
+            export_catalog_path=os.getenv('EXPORT_CATALOG_PATH', 'data/export_catalog.db'),
+            export_history_days=int(os.getenv('EXPORT_HISTORY_DAYS', '30')),
+            search_index_enabled=os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() == 'true',
+            search_index_path=os.getenv('SEARCH_INDEX_PATH', 'data/search_index.db'),
+            user_settings_db_path=os.getenv('USER_SETTINGS_DB_PATH', 'data/user_settings.db'),
+            user_settings_flush_seconds=int(os.getenv('USER_SETTINGS_FLUSH_SECONDS', '5')),
+            user_settings_flush_max_dirty=int(os.getenv('USER_SETTINGS_FLUSH_MAX_DIRTY', '100')),
+            user_settings_cache_size=int(os.getenv('USER_SETTINGS_CACHE_SIZE', '10000')),
+            markdown_processes=int(os.getenv('MARKDOWN_PROCESSES', '0'))
         )
 
 # Initialize configurations
@@ -0,0 +1,140 @@
+"""
+Incremental Export Backups for Telegram Channel Export Bot
+Snapshots the export folder, hardlinking files that did not change since the previous snapshot
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024
+SNAPSHOT_PREFIX = "export_backup_"
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_latest_manifest(backup_folder: str) -> Optional[Dict[str, Any]]:
+    """Manifest of the newest snapshot in the backup folder"""
+    if not os.path.isdir(backup_folder):
+        return None
+
+    manifests = sorted(
+        name for name in os.listdir(backup_folder)
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(MANIFEST_SUFFIX)
+    )
+    for name in reversed(manifests):
+        try:
+            with open(os.path.join(backup_folder, name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping unreadable backup manifest {name}: {e}")
+    return None
+
+
+def _link_earlier(source: str, target: str, expected_size: int) -> bool:
+    """Hardlink an earlier backup of a file, returns False if it is gone or changed"""
+    try:
+        if os.stat(source).st_size != expected_size:
+            return False
+        os.link(source, target)
+        return True
+    except OSError:
+        return False  # Missing, or on another file system
+
+
+def create_incremental_backup(source_folder: str = "exports", backup_folder: str = "backups") -> Optional[str]:
+    """
+    Snapshot the export folder, storing only new and changed files
+
+    Every snapshot is a complete copy of the folder. A file whose size and
+    modification time match the previous manifest keeps its recorded hash
+    and is hardlinked from the previous snapshot without being read. Other
+    files are hashed and hardlinked from any earlier file with the same
+    hash, or copied. The manifest next to the snapshot lists size,
+    modification time and hash of every file. Snapshots share the data of
+    linked files, so their files must not be changed in place.
+
+    Returns:
+        Path of the snapshot, None if the source folder does not exist
+    """
+    if not os.path.isdir(source_folder):
+        return None
+
+    previous = load_latest_manifest(backup_folder)
+    previous_files = previous['files'] if previous else {}
+    previous_path = previous['snapshot_path'] if previous else None
+    # First earlier backup of each content
+    by_hash = {}
+    for relative_path, entry in previous_files.items():
+        by_hash.setdefault(entry['sha256'], (os.path.join(previous_path, relative_path), entry['size']))
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    snapshot_path = os.path.join(backup_folder, f"{SNAPSHOT_PREFIX}{timestamp}")
+    suffix = 0
+    while os.path.exists(snapshot_path):
+        # Several snapshots within a second sort after each other
+        suffix += 1
+        snapshot_path = os.path.join(backup_folder, f"{SNAPSHOT_PREFIX}{timestamp}_{suffix}")
+    os.makedirs(snapshot_path)
+
+    files = {}
+    stats = {'linked': 0, 'copied': 0, 'copied_bytes': 0}
+
+    for root, dirs, filenames in os.walk(source_folder):
+        dirs.sort()
+        relative_root = os.path.relpath(root, source_folder)
+        target_root = snapshot_path if relative_root == '.' else os.path.join(snapshot_path, relative_root)
+        os.makedirs(target_root, exist_ok=True)
+
+        for filename in sorted(filenames):
+            source = os.path.join(root, filename)
+            relative_path = os.path.normpath(os.path.join(relative_root, filename)).replace(os.sep, '/')
+            target = os.path.join(target_root, filename)
+            try:
+                stat = os.stat(source)
+            except OSError:
+                continue  # Removed while backing up
+
+            known = previous_files.get(relative_path)
+            if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+                digest = known['sha256']
+                earlier = (os.path.join(previous_path, relative_path), known['size'])
+            else:
+                digest = file_digest(source)
+                earlier = by_hash.get(digest)
+
+            if earlier and _link_earlier(earlier[0], target, earlier[1]):
+                stats['linked'] += 1
+            else:
+                shutil.copy2(source, target)
+                stats['copied'] += 1
+                stats['copied_bytes'] += stat.st_size
+                by_hash[digest] = (target, stat.st_size)
+
+            files[relative_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+
+    manifest = {
+        'created_at': datetime.now().isoformat(),
+        'source_folder': os.path.abspath(source_folder),
+        'snapshot_path': os.path.abspath(snapshot_path),
+        'previous_snapshot': previous_path,
+        'stats': stats,
+        'files': files,
+    }
+    # Written last, a snapshot without manifest is never used as a base
+    manifest_path = f"{snapshot_path}{MANIFEST_SUFFIX}"
+    with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    return snapshot_path
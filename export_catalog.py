@@ -0,0 +1,371 @@
+"""
+Export Catalog for Telegram Channel Export Bot
+Keeps the files of the export folder in SQLite so statistics need no directory scans
+"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+
+EXPORT_EXTENSIONS = ('json', 'csv', 'md')
+FORMAT_ALIASES = {'markdown': 'md'}
+# Volumes written by ZipArchiveCreator.split_archive
+_VOLUME_SUFFIX = re.compile(r'\.part\d{2}(\.zip)$', re.IGNORECASE)
+
+
+def normalize_export_format(export_format: Optional[str]) -> str:
+    """
+    Catalog key of an export format: 'markdown' becomes 'md' and combined
+    formats are joined in the order of EXPORT_EXTENSIONS, e.g. 'json+csv'
+    """
+    parts = {FORMAT_ALIASES.get(part, part) for part in (export_format or '').lower().split('+')}
+    return '+'.join(fmt for fmt in EXPORT_EXTENSIONS if fmt in parts) or 'other'
+
+
+def export_path_of(file_path: str) -> str:
+    """Path of the archive a volume was split from, the path itself for other files"""
+    return _VOLUME_SUFFIX.sub(r'\1', file_path)
+
+
+def parse_export_name(filename: str) -> Tuple[Optional[str], str]:
+    """
+    Channel and format of an export file from its name
+
+    Archives are named {channel}_{HHMMSS}_{format}.zip, their volumes
+    {channel}_{HHMMSS}_{format}.partNN.zip, plain export files
+    {channel}_{date}_{time}.{ext}.
+    """
+    stem, _, ext = export_path_of(filename).rpartition('.')
+    ext = ext.lower()
+
+    parts = stem.rsplit('_', 2)
+    if ext == 'zip':
+        return (parts[0], normalize_export_format(parts[2])) if len(parts) == 3 else (None, 'other')
+    fmt = normalize_export_format(ext)
+    return (parts[0] if len(parts) == 3 and fmt != 'other' else None), fmt
+
+
+class ExportCatalog:
+    """
+    SQLite catalog of the files in the export folder
+
+    Files are recorded when they are created and marked removed when they
+    are deleted, so removed exports stay in the user history for
+    history_days. The volumes of a split archive are grouped under the
+    path of that archive and count as one export. Triggers keep export and
+    byte totals per format, and the oldest and newest files come from an
+    index, so statistics take the same time for ten or a hundred thousand
+    files. rebuild() brings the catalog in line with the folder after files
+    were changed behind its back.
+    """
+
+    _ENTRY_COLUMNS = "path, filename, user_id, channel, format, size, created_at, removed_at"
+    # Removed archives whose volumes are listed in their place
+    _DROP_SPLIT_ARCHIVES = """
+        DELETE FROM exports WHERE removed_at IS NOT NULL
+        AND path IN (SELECT export_path FROM exports WHERE export_path != path)
+    """
+
+    def __init__(self, db_path: str, history_days: int = 30):
+        self.db_path = db_path
+        self.history_days = history_days
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        self._purge_history()
+
+    def _create_tables(self):
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS exports (
+                    path TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    user_id INTEGER,
+                    channel TEXT,
+                    format TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    removed_at REAL,
+                    export_path TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_exports_user ON exports (user_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_exports_created ON exports (created_at)
+                    WHERE removed_at IS NULL;
+                CREATE INDEX IF NOT EXISTS idx_exports_removed ON exports (removed_at)
+                    WHERE removed_at IS NOT NULL;
+
+                CREATE TABLE IF NOT EXISTS totals (
+                    format TEXT PRIMARY KEY,
+                    files INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(exports)")}
+            if 'export_path' not in columns:
+                self._conn.execute("ALTER TABLE exports ADD COLUMN export_path TEXT")
+                self._migrate_entries()
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_exports_listed ON exports (export_path)
+                    WHERE removed_at IS NULL
+            """)
+
+            # An export is counted while any of its volumes is listed
+            first_listed = ("NOT EXISTS (SELECT 1 FROM exports e WHERE e.export_path = {row}.export_path "
+                            "AND e.path != {row}.path AND e.removed_at IS NULL)")
+            added, removed = first_listed.format(row='NEW'), first_listed.format(row='OLD')
+            for trigger in ('exports_added', 'exports_unlisted', 'exports_listed', 'exports_deleted'):
+                self._conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            self._conn.executescript(f"""
+                CREATE TRIGGER exports_added AFTER INSERT ON exports
+                WHEN NEW.removed_at IS NULL BEGIN
+                    INSERT INTO totals (format, files, bytes) VALUES (NEW.format, {added}, NEW.size)
+                    ON CONFLICT (format) DO UPDATE SET files = files + excluded.files, bytes = bytes + excluded.bytes;
+                END;
+                CREATE TRIGGER exports_unlisted AFTER UPDATE ON exports
+                WHEN OLD.removed_at IS NULL BEGIN
+                    UPDATE totals SET files = files - {removed}, bytes = bytes - OLD.size WHERE format = OLD.format;
+                END;
+                CREATE TRIGGER exports_listed AFTER UPDATE ON exports
+                WHEN NEW.removed_at IS NULL BEGIN
+                    INSERT INTO totals (format, files, bytes) VALUES (NEW.format, {added}, NEW.size)
+                    ON CONFLICT (format) DO UPDATE SET files = files + excluded.files, bytes = bytes + excluded.bytes;
+                END;
+                CREATE TRIGGER exports_deleted AFTER DELETE ON exports
+                WHEN OLD.removed_at IS NULL BEGIN
+                    UPDATE totals SET files = files - {removed}, bytes = bytes - OLD.size WHERE format = OLD.format;
+                END;
+            """)
+
+    def _migrate_entries(self):
+        """Group volumes and normalize formats of entries recorded before export paths"""
+        rows = self._conn.execute("SELECT path, filename, format FROM exports WHERE export_path IS NULL").fetchall()
+        updates = []
+        for path, filename, fmt in rows:
+            fmt = normalize_export_format(fmt)
+            if fmt == 'other':
+                fmt = parse_export_name(filename)[1]
+            updates.append((export_path_of(path), fmt, path))
+        self._conn.executemany("UPDATE exports SET export_path = ?, format = ? WHERE path = ?", updates)
+        self._conn.execute(self._DROP_SPLIT_ARCHIVES)
+        self._recount_totals()
+
+    def _recount_totals(self):
+        self._conn.execute("DELETE FROM totals")
+        self._conn.execute("""
+            INSERT INTO totals (format, files, bytes)
+            SELECT format, COUNT(DISTINCT export_path), SUM(size) FROM exports
+            WHERE removed_at IS NULL GROUP BY format
+        """)
+
+    def _purge_history(self):
+        """Forget exports removed more than history_days ago"""
+        cutoff = time.time() - self.history_days * 86400
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM exports WHERE removed_at < ?", (cutoff,))
+
+    def add(self, file_path: str, user_id: Optional[int] = None, channel: Optional[str] = None,
+            export_format: Optional[str] = None):
+        """Record a created export file, missing files are ignored"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+
+        path = os.path.abspath(file_path)
+        export_path = export_path_of(path)
+        filename = os.path.basename(file_path)
+        parsed_channel, parsed_format = parse_export_name(filename)
+        with self._lock, self._conn:
+            if export_path != path:
+                # The volumes replace the removed archive they were split from
+                self._conn.execute("DELETE FROM exports WHERE path = ? AND removed_at IS NOT NULL", (export_path,))
+            self._conn.execute("""
+                INSERT INTO exports (path, filename, user_id, channel, format, size, created_at, export_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    user_id = excluded.user_id, channel = excluded.channel, format = excluded.format,
+                    size = excluded.size, created_at = excluded.created_at, removed_at = NULL
+            """, (path, filename, user_id, channel or parsed_channel,
+                  normalize_export_format(export_format) if export_format else parsed_format,
+                  stat.st_size, stat.st_mtime, export_path))
+
+    def remove(self, file_paths: List[str], now: Optional[float] = None):
+        """Mark deleted export files as removed"""
+        now = now or time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE exports SET removed_at = ? WHERE path = ? AND removed_at IS NULL",
+                [(now, os.path.abspath(path)) for path in file_paths]
+            )
+
+    def get_entry(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Catalog entry of a file, also of a removed one"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._ENTRY_COLUMNS} FROM exports WHERE path = ?",
+                (os.path.abspath(file_path),)
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def get_user_history(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Most recent exports of a user, newest first
+
+        The volumes of a split archive are one entry with their total size,
+        removed once all volumes are removed.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT export_path, user_id, channel, format, SUM(size), MIN(created_at),
+                       CASE WHEN COUNT(removed_at) = COUNT(*) THEN MAX(removed_at) END, COUNT(*)
+                FROM exports WHERE user_id = ?
+                GROUP BY export_path ORDER BY MIN(created_at) DESC LIMIT ?
+            """, (user_id, limit)).fetchall()
+        return [
+            dict(self._entry((path, os.path.basename(path), *values)), volumes=volumes)
+            for path, *values, volumes in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistics in the format of utils.get_export_statistics"""
+        stats = {
+            'total_files': 0,
+            'formats': {fmt: 0 for fmt in EXPORT_EXTENSIONS},
+            'total_size_mb': 0,
+            'media_files': 0,
+            'oldest_export': None,
+            'newest_export': None
+        }
+
+        with self._lock:
+            totals = self._conn.execute("SELECT format, files, bytes FROM totals WHERE files > 0").fetchall()
+            oldest, newest = self._conn.execute(
+                "SELECT MIN(created_at), MAX(created_at) FROM exports WHERE removed_at IS NULL"
+            ).fetchone()
+            media_row = self._conn.execute("SELECT value FROM meta WHERE key = 'media_files'").fetchone()
+
+        total_bytes = 0
+        for fmt, files, size in totals:
+            stats['formats'][fmt] = files
+            stats['total_files'] += files
+            total_bytes += size
+
+        stats['total_size_mb'] = round(total_bytes / (1024 * 1024), 2)
+        stats['media_files'] = int(media_row[0]) if media_row else 0
+        if oldest is not None:
+            stats['oldest_export'] = datetime.fromtimestamp(oldest)
+            stats['newest_export'] = datetime.fromtimestamp(newest)
+        return stats
+
+    def rebuild(self, export_folder: str) -> Dict[str, int]:
+        """
+        Bring the catalog in line with the export folder
+
+        Users and channels of files already in the catalog are kept.
+
+        Returns:
+            Number of listed files and of files added and removed by the rebuild
+        """
+        found = []
+        media_files = 0
+        if os.path.isdir(export_folder):
+            with os.scandir(export_folder) as it:
+                for entry in it:
+                    try:
+                        if entry.name == 'media' and entry.is_dir(follow_symlinks=False):
+                            with os.scandir(entry.path) as media_it:
+                                media_files = sum(1 for _ in media_it)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue  # Removed while scanning
+                    channel, fmt = parse_export_name(entry.name)
+                    path = os.path.abspath(entry.path)
+                    found.append((path, entry.name, channel, fmt, stat.st_size, stat.st_mtime,
+                                  export_path_of(path)))
+
+        now = time.time()
+        with self._lock, self._conn:
+            listed = {row[0] for row in self._conn.execute("SELECT path FROM exports WHERE removed_at IS NULL")}
+            found_paths = {row[0] for row in found}
+            missing = listed - found_paths
+
+            self._conn.executemany("""
+                INSERT INTO exports (path, filename, channel, format, size, created_at, export_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    size = excluded.size, created_at = excluded.created_at, removed_at = NULL
+            """, found)
+            self._conn.executemany(
+                "UPDATE exports SET removed_at = ? WHERE path = ?",
+                [(now, path) for path in missing]
+            )
+            self._conn.execute(self._DROP_SPLIT_ARCHIVES)
+            # Recount, the totals may have drifted from the table
+            self._recount_totals()
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ('media_files', str(media_files)),
+                ('rebuilt_at', datetime.now().isoformat()),
+            ])
+
+        self._purge_history()
+        return {
+            'files': len(found),
+            'added': len(found_paths - listed),
+            'removed': len(missing),
+        }
+
+    @staticmethod
+    def _entry(row) -> Dict[str, Any]:
+        path, filename, user_id, channel, fmt, size, created_at, removed_at = row
+        return {
+            'path': path,
+            'filename': filename,
+            'user_id': user_id,
+            'channel': channel,
+            'format': fmt,
+            'size': size,
+            'created_at': datetime.fromtimestamp(created_at),
+            'removed_at': datetime.fromtimestamp(removed_at) if removed_at is not None else None,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    from config import export_config
+
+    catalog = ExportCatalog(export_config.export_catalog_path)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild':
+        print(f"🔄 Rebuilding export catalog from {export_config.export_folder}...")
+        result = catalog.rebuild(export_config.export_folder)
+        print(f"   📁 Files: {result['files']} ({result['added']} added, {result['removed']} removed)")
+
+    stats = catalog.get_stats()
+    print("📊 Export Statistics:")
+    print(f"   📁 Total files: {stats['total_files']}")
+    print("   " + ", ".join(f"{fmt.upper()}: {count}" for fmt, count in stats['formats'].items()))
+    print(f"   💾 Total size: {stats['total_size_mb']} MB")
+    if stats['newest_export']:
+        print(f"   📅 Latest export: {stats['newest_export'].strftime('%Y-%m-%d %H:%M:%S')}")
+    catalog.close()
@@ -0,0 +1,283 @@
+"""
+Streaming export readers for Telegram Channel Export Bot
+Read export files and the exports inside ZIP archives without loading them whole
+"""
+import csv
+import io
+import json
+import re
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple, TextIO
+
+READ_CHUNK_SIZE = 64 * 1024
+# Format of export files by extension, .md is the extension of older Markdown exports
+EXPORT_FORMATS = {'json': 'json', 'csv': 'csv', 'md': 'markdown', 'markdown': 'markdown'}
+MARKDOWN_MESSAGE_MARKER = '## Message'
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def export_format_of(name: str) -> Optional[str]:
+    """Format of an export file or archive entry, None for other files"""
+    name = name.replace('\\', '/')
+    if name.endswith('.index.json') or name.startswith('media/') or '/media/' in name:
+        return None  # Part index of a sharded export or a downloaded media file
+    return EXPORT_FORMATS.get(name.rsplit('.', 1)[-1].lower())
+
+
+@contextmanager
+def open_export_text(file_path: str, entry: Optional[str] = None) -> Iterator[TextIO]:
+    """Open an export file, or an entry of a ZIP archive, as a UTF-8 text stream"""
+    if entry is None:
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            yield f
+        return
+
+    with zipfile.ZipFile(file_path, 'r') as zipf:
+        with zipf.open(entry) as raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as f:
+            yield f
+
+
+class JsonObjectReader:
+    """
+    Reads the members of a top-level JSON object from a text stream one at a time
+
+    Values are decoded with the standard JSON decoder as soon as they are
+    complete in the buffer. Arrays of the members named in members() are
+    yielded element by element, so only one element is held in memory.
+    """
+
+    # A single value larger than this is treated as a broken file
+    MAX_VALUE_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, stream: TextIO, chunk_size: int = READ_CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Read more text, at least as much as is buffered, returns False at the end"""
+        if self.eof:
+            return False
+        pending = len(self.buffer) - self.pos
+        if pending > self.MAX_VALUE_SIZE:
+            raise ValueError(f"JSON value at character {self.pos} is too large")
+        chunk = self.stream.read(max(self.chunk_size, pending))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character, empty at the end of the stream"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, characters: str) -> str:
+        char = self._peek()
+        if not char:
+            raise ValueError("Unexpected end of JSON data")
+        if char not in characters:
+            raise ValueError(f"Expected one of {characters!r} but found {char!r} in JSON data")
+        self.pos += 1
+        return char
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number could continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _iter_array(self) -> Iterator[Any]:
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._expect(',]') == ']':
+                return
+
+    def members(self, streamed: Tuple[str, ...] = ()) -> Iterator[Tuple[str, Any]]:
+        """
+        Yield (key, value) for each member of the top-level object
+
+        Values of the keys in streamed must be arrays and are yielded as
+        iterators over their elements. Elements left unread are skipped
+        when the next member is requested.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+
+        while True:
+            key = self._decode_value()
+            if not isinstance(key, str):
+                raise ValueError("Invalid JSON object key")
+            self._expect(':')
+
+            if key in streamed:
+                elements = self._iter_array()
+                yield key, elements
+                for _ in elements:
+                    pass
+            else:
+                yield key, self._decode_value()
+
+            if self._expect(',}') == '}':
+                return
+
+    def finish(self):
+        """Check that nothing but whitespace follows the object"""
+        if self._peek():
+            raise ValueError(f"Extra data after JSON object at character {self.pos}")
+
+
+def count_json_messages(stream: TextIO) -> int:
+    """Count the messages of a JSON export, raises ValueError for invalid documents"""
+    reader = JsonObjectReader(stream)
+    count = None
+    for key, value in reader.members(streamed=('messages',)):
+        if key == 'messages':
+            count = 0
+            for message in value:
+                if not isinstance(message, dict):
+                    raise ValueError("Invalid JSON structure")
+                count += 1
+    reader.finish()
+
+    if count is None:
+        raise ValueError("Invalid JSON structure")
+    return count
+
+
+def count_csv_messages(stream: TextIO) -> int:
+    """Count the records of a CSV export, records may span several lines"""
+    reader = csv.reader(stream)
+    next(reader, None)  # Header
+    return sum(1 for row in reader if row)
+
+
+def count_markdown_messages(stream: TextIO) -> int:
+    """Count the message headers of a Markdown export in fixed-size chunks"""
+    count = 0
+    tail = ''
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return count
+        text = tail + chunk
+        count += text.count(MARKDOWN_MESSAGE_MARKER)
+        # Keep the end of the chunk in case a marker is cut in two
+        tail = text[-(len(MARKDOWN_MESSAGE_MARKER) - 1):]
+
+
+def read_json_channel_info(stream: TextIO) -> Optional[Dict[str, Any]]:
+    """Channel info of a JSON export, reading only up to the end of channel_info"""
+    reader = JsonObjectReader(stream)
+    for key, value in reader.members(streamed=('messages',)):
+        if key == 'channel_info':
+            return value if isinstance(value, dict) else None
+        if key == 'messages':
+            return None  # Channel info is written before the messages
+    return None
+
+
+def read_markdown_header(stream: TextIO) -> Dict[str, str]:
+    """Header lines of a Markdown export, reading line by line up to the first ---"""
+    header = {}
+    for number, line in enumerate(stream):
+        line = line.strip()
+        if line == '---':
+            break
+        if number == 0 and line.startswith('# '):
+            header['title'] = line[2:].strip()
+        elif line.startswith('**') and ':**' in line:
+            name, _, value = line[2:].partition(':**')
+            header[name] = value.strip()
+    return header
+
+
+def find_header_entry(archive_path: str) -> Optional[str]:
+    """First JSON export in a ZIP archive, else the first Markdown export"""
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        names = [info.filename for info in zipf.infolist() if not info.is_dir()]
+
+    for export_format in ('json', 'markdown'):
+        for name in names:
+            if export_format_of(name) == export_format:
+                return name
+    return None
+
+
+MESSAGE_COUNTERS = {
+    'json': count_json_messages,
+    'csv': count_csv_messages,
+    'markdown': count_markdown_messages,
+}
+
+
+def count_export_messages(file_path: str, export_format: str, entry: Optional[str] = None) -> int:
+    """Count the messages of an export file or of an export inside a ZIP archive"""
+    with open_export_text(file_path, entry) as stream:
+        return MESSAGE_COUNTERS[export_format](stream)
+
+
+def validate_archive_entries(archive_path: str) -> Dict[str, Any]:
+    """
+    Validate the export files inside a ZIP archive without extracting them
+
+    Returns:
+        Per-entry results and the message count, which is the largest
+        count of one format so that JSON and CSV of the same export are
+        not added up, while the parts of sharded exports are
+    """
+    entries = []
+    counts: Dict[str, int] = {}
+
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        infos = [info for info in zipf.infolist() if not info.is_dir() and export_format_of(info.filename)]
+
+    for info in infos:
+        export_format = export_format_of(info.filename)
+        entry = {
+            'name': info.filename,
+            'format': export_format,
+            'size_mb': round(info.file_size / (1024 * 1024), 2),
+            'message_count': 0,
+            'valid': False,
+            'error': None,
+        }
+        try:
+            entry['message_count'] = count_export_messages(archive_path, export_format, info.filename)
+            entry['valid'] = True
+        except (ValueError, UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+            entry['error'] = str(e)
+
+        counts[export_format] = counts.get(export_format, 0) + entry['message_count']
+        entries.append(entry)
+
+    return {
+        'entries': entries,
+        'message_count': max(counts.values(), default=0),
+    }
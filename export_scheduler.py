@@ -0,0 +1,151 @@
+"""
+Scheduled Export Manager for Telegram Channel Export Bot
+Keeps recurring channel exports and plans their runs with jitter
+"""
+import json
+import os
+import random
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ScheduledExport:
+    """Recurring export of one channel for one user"""
+    schedule_id: int
+    user_id: int
+    chat_id: int
+    channel: str
+    export_format: str = 'json'
+    include_media: bool = False
+    fields: Optional[List[str]] = None
+    interval_hours: int = 24
+    last_message_id: int = 0  # Newest message delivered so far
+    last_run: Optional[str] = None
+    next_run: Optional[str] = None
+    created_at: str = None
+
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now().isoformat()
+
+
+class ScheduleManager:
+    """
+    Manages scheduled exports with file-based persistence
+
+    Runs are spread out to avoid many exports starting at the same moment.
+    Every planned run gets a random delay of up to 10% of its interval,
+    capped at jitter_minutes. Runs that fell due while the bot was down
+    are spread over startup_spread_minutes.
+    """
+
+    def __init__(self, schedules_file: str = "scheduled_exports.json",
+                 jitter_minutes: int = 30, startup_spread_minutes: int = 10):
+        self.schedules_file = schedules_file
+        self.jitter_minutes = jitter_minutes
+        self.startup_spread_minutes = startup_spread_minutes
+        self.schedules: Dict[int, ScheduledExport] = {}
+        self._load_schedules()
+
+    def _load_schedules(self):
+        """Load schedules from file"""
+        if os.path.exists(self.schedules_file):
+            try:
+                with open(self.schedules_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                for schedule_dict in data:
+                    schedule = ScheduledExport(**schedule_dict)
+                    self.schedules[schedule.schedule_id] = schedule
+
+            except Exception as e:
+                print(f"Error loading schedules: {e}")
+                self.schedules = {}
+
+    def _save_schedules(self):
+        """Save schedules to file"""
+        try:
+            with open(self.schedules_file, 'w', encoding='utf-8') as f:
+                json.dump([asdict(schedule) for schedule in self.schedules.values()], f,
+                          indent=2, ensure_ascii=False)
+
+        except Exception as e:
+            print(f"Error saving schedules: {e}")
+
+    def add_schedule(self, user_id: int, chat_id: int, channel: str, interval_hours: int,
+                     export_format: str = 'json', include_media: bool = False,
+                     fields: Optional[List[str]] = None, last_message_id: int = 0) -> ScheduledExport:
+        """
+        Register a recurring export, its first run is one interval from now
+        and exports the messages after last_message_id
+        """
+        schedule = ScheduledExport(
+            schedule_id=max(self.schedules, default=0) + 1,
+            user_id=user_id,
+            chat_id=chat_id,
+            channel=channel,
+            export_format=export_format,
+            include_media=include_media,
+            fields=fields,
+            interval_hours=interval_hours,
+            last_message_id=last_message_id,
+        )
+        schedule.next_run = self.plan_next_run(schedule).isoformat()
+        self.schedules[schedule.schedule_id] = schedule
+        self._save_schedules()
+        return schedule
+
+    def remove_schedule(self, user_id: int, schedule_id: int) -> bool:
+        """Remove a schedule of a user, returns False if the user has no such schedule"""
+        schedule = self.schedules.get(schedule_id)
+        if schedule is None or schedule.user_id != user_id:
+            return False
+
+        del self.schedules[schedule_id]
+        self._save_schedules()
+        return True
+
+    def get_schedule(self, schedule_id: int) -> Optional[ScheduledExport]:
+        return self.schedules.get(schedule_id)
+
+    def get_user_schedules(self, user_id: int) -> List[ScheduledExport]:
+        """Get all schedules of a user"""
+        return [schedule for schedule in self.schedules.values() if schedule.user_id == user_id]
+
+    def get_all_schedules(self) -> List[ScheduledExport]:
+        return list(self.schedules.values())
+
+    def record_run(self, schedule_id: int, last_message_id: Optional[int] = None,
+                   now: Optional[datetime] = None) -> Optional[ScheduledExport]:
+        """Remember a finished run and plan the next one"""
+        schedule = self.schedules.get(schedule_id)
+        if schedule is None:
+            return None
+
+        now = now or datetime.now()
+        if last_message_id is not None:
+            schedule.last_message_id = last_message_id
+        schedule.last_run = now.isoformat()
+        schedule.next_run = self.plan_next_run(schedule, now).isoformat()
+        self._save_schedules()
+        return schedule
+
+    def plan_next_run(self, schedule: ScheduledExport, now: Optional[datetime] = None) -> datetime:
+        """Next run time: one interval from now plus a random jitter"""
+        now = now or datetime.now()
+        interval = timedelta(hours=schedule.interval_hours)
+        max_jitter = min(interval.total_seconds() * 0.1, self.jitter_minutes * 60)
+        return now + interval + timedelta(seconds=random.uniform(0, max_jitter))
+
+    def get_delay(self, schedule: ScheduledExport, now: Optional[datetime] = None) -> float:
+        """Seconds until the next run, overdue runs are spread over the startup window"""
+        now = now or datetime.now()
+        if schedule.next_run is None:
+            schedule.next_run = self.plan_next_run(schedule, now).isoformat()
+
+        delay = (datetime.fromisoformat(schedule.next_run) - now).total_seconds()
+        if delay <= 0:
+            return random.uniform(0, self.startup_spread_minutes * 60)
+        return delay
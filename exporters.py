@@ -3,27 +3,86 @@ Channel Export Functionality for Telegram Channel Export Bot
 Handles channel data extraction and export in multiple formats
 """
 import os
+import re
+import io
 import json
 import csv
+import time
+import heapq
 import asyncio
+import zipfile
 import aiofiles
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Union, Iterable, Tuple
 from telethon import TelegramClient
+from telethon.tl.functions.messages import GetMessagesViewsRequest
 from telethon.tl.types import MessageMediaPhoto, MessageMediaDocument
 import pytz
 
 from config import bot_config, export_config
 from zip_utils import ZipArchiveCreator
 from auth_helper import auto_auth
+from upload_helper import ParallelUploader
+from message_record import MessageRecord, MESSAGE_FIELDS, MEDIA_FIELDS, parse_export_fields
+from message_store import MessageStore, range_digest, to_utc
+from search_index import SearchIndex
+from spill_buffer import SpillBuffer
+from format_writers import (
+    JsonExportWriter, CsvExportWriter, MarkdownExportWriter,
+    create_export_writer, parse_export_formats, write_export_files
+)
+
+# Field set of full records, as kept in the message store
+ALL_FIELDS = frozenset(MESSAGE_FIELDS)
+
+
+def parse_search_keywords(search: Optional[Union[str, Iterable[str]]]) -> List[str]:
+    """Split a comma separated search query into unique keywords, keeping their order"""
+    if not search:
+        return []
+    names = search.split(',') if isinstance(search, str) else search
+    keywords = []
+    for keyword in names:
+        keyword = keyword.strip()
+        if keyword and keyword.lower() not in (k.lower() for k in keywords):
+            keywords.append(keyword)
+    return keywords
+
 
 class ChannelExporter:
     """Handles channel export operations"""
     
+    # GetMessagesViewsRequest accepts up to 100 message IDs
+    COUNTERS_BATCH_SIZE = 100
+    COUNTERS_CONCURRENCY = 4
+    # Keyword searches running at the same time for one export
+    SEARCH_CONCURRENCY = 3
+    # Minimum seconds between consolidated batch progress updates
+    BATCH_PROGRESS_INTERVAL = 3
+    BATCH_PROGRESS_MAX_LENGTH = 4000
+    # Messages read from the local store per query
+    STORE_PAGE_SIZE = 1000
+    
     def __init__(self):
         self.client = None
         self.session_name = "bot_session"
         self.zip_creator = ZipArchiveCreator(export_config.export_folder)
+        self.message_store = None
+        self.search_index = None
+        self._batch_semaphore = None
+        self._media_lock = None
+    
+    def _get_message_store(self) -> Optional[MessageStore]:
+        """Get the local message store, opening it on first use"""
+        if self.message_store is None and export_config.message_store_enabled:
+            self.message_store = MessageStore(export_config.message_store_path)
+        return self.message_store
+    
+    def get_search_index(self) -> Optional[SearchIndex]:
+        """Get the full-text index of exported messages, opening it on first use"""
+        if self.search_index is None and export_config.search_index_enabled:
+            self.search_index = SearchIndex(export_config.search_index_path)
+        return self.search_index
     
     async def _get_client(self) -> TelegramClient:
         """Get or create Telegram client with automatic authentication"""
@@ -46,25 +105,49 @@ class ChannelExporter:
                            export_format: str = 'json',
                            include_media: bool = False,
                            max_messages: int = 10000,
-                           progress_callback: Optional[Callable] = None) -> str:
+                           progress_callback: Optional[Callable] = None,
+                           date_from: Optional[datetime] = None,
+                           date_to: Optional[datetime] = None,
+                           fields: Optional[List[str]] = None,
+                           search: Optional[Union[str, List[str]]] = None,
+                           min_id: int = 0,
+                           max_id: int = 0,
+                           reverse: bool = False,
+                           message_callback: Optional[Callable] = None) -> str:
         """
         Export channel messages in specified format
         
         Args:
             channel_username: Channel username without @
-            export_format: 'json', 'csv', or 'markdown'
+            export_format: 'json', 'csv', 'markdown', or several of them as a
+                set or '+'-joined string (e.g. 'json+markdown')
             include_media: Whether to download media files
             max_messages: Maximum number of messages to export (0 = no limit)
             progress_callback: Function to call with progress updates
+            date_from: Only export messages sent at or after this time
+            date_to: Only export messages sent at or before this time
+            fields: Message fields to export, a preset name or list (None = all)
+            search: Only export messages matching these keywords (comma separated
+                string or list), searched on the Telegram side
+            min_id: Only export messages with a higher ID
+            max_id: Only export messages with a lower ID (0 = no bound)
+            reverse: Fetch the oldest messages first, so max_messages keeps the oldest
+            message_callback: Function called with every fetched message record
             
         Returns:
             Path to the exported file
         """
+        formats = parse_export_formats(export_format)
+        fields = parse_export_fields(fields)
+        field_set = frozenset(fields)
+        keywords = parse_search_keywords(search)
+        format_label = '+'.join(formats)
         
         if progress_callback:
             await progress_callback("🔗 Connecting to Telegram...")
         
         client = await self._get_client()
+        processed_messages = None
         
         try:
             # Get channel entity
@@ -73,56 +156,72 @@ class ChannelExporter:
             if progress_callback:
                 await progress_callback(f"📡 Found channel: {channel.title}\n🔄 Fetching messages...")
             
-            # Fetch messages
-            messages = await self._fetch_messages(client, channel, max_messages, progress_callback)
-            
-            if progress_callback:
-                await progress_callback(f"📝 Processing {len(messages)} messages...")
-            
-            # Process messages
-            processed_messages = []
+            message_store = self._get_message_store()
             media_files = []
             
-            for i, message in enumerate(messages):
-                processed_msg = await self._process_message(message, include_media, client)
-                processed_messages.append(processed_msg)
+            if message_store is not None and not include_media and not keywords and not (min_id or max_id):
+                # Text-only exports are served from the local store after a delta top-up
+                processed_messages = await self._load_from_store(
+                    client, channel, message_store, max_messages, date_from, date_to, progress_callback
+                )
+            else:
+                # Process messages as they are fetched, spilling to disk under memory pressure
+                processed_messages = self._create_spill_buffer()
                 
-                if include_media and processed_msg.get('media_file'):
-                    media_files.append(processed_msg['media_file'])
+                if keywords:
+                    source = self._search_messages(client, channel, keywords, max_messages,
+                                                   date_from, date_to, progress_callback)
+                else:
+                    source = self._fetch_messages(client, channel, max_messages, date_from, date_to,
+                                                  min_id=min_id, max_id=max_id, reverse=reverse)
                 
-                if progress_callback and i % 100 == 0:
-                    await progress_callback(f"📝 Processed {i+1}/{len(messages)} messages...")
+                async for message in source:
+                    processed_msg = await self._process_message(message, include_media, client, field_set)
+                    processed_messages.append(processed_msg)
+                    if message_callback:
+                        message_callback(processed_msg)
+                    
+                    if include_media and processed_msg.media_file:
+                        media_files.append(processed_msg.media_file)
+                    
+                    if progress_callback and len(processed_messages) % 100 == 0:
+                        await progress_callback(f"📝 Processed {len(processed_messages)} messages...")
             
             if progress_callback:
-                await progress_callback(f"💾 Exporting to {export_format.upper()} format...")
+                await progress_callback(f"💾 Exporting to {format_label.upper()} format...")
             
-            # Export to specified format
+            # Export to every requested format in a single pass over the messages
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{channel_username}_{timestamp}.{export_format}"
-            filepath = os.path.join(export_config.export_folder, filename)
+            writers = []
+            for fmt in formats:
+                filename = f"{channel_username}_{timestamp}.{fmt}"
+                filepath = os.path.join(export_config.export_folder, filename)
+                writers.append(create_export_writer(
+                    fmt, filepath, channel, len(processed_messages), media_files,
+                    max_messages=export_config.shard_max_messages,
+                    max_bytes=export_config.shard_max_size_mb * 1024 * 1024,
+                    fields=fields
+                ))
             
-            if export_format == 'json':
-                await self._export_to_json(processed_messages, filepath, channel)
-            elif export_format == 'csv':
-                await self._export_to_csv(processed_messages, filepath, channel)
-            elif export_format == 'markdown':
-                await self._export_to_markdown(processed_messages, filepath, channel, media_files)
-            else:
-                raise ValueError(f"Unsupported export format: {export_format}")
+            await write_export_files(processed_messages, writers)
+            export_files = [path for writer in writers for path in writer.output_files]
+            processed_messages.close()
             
             if progress_callback:
                 await progress_callback(f"📦 Creating ZIP archive...")
             
             # Create ZIP archive
             archive_path = await self.zip_creator.create_export_archive(
-                main_file_path=filepath,
+                main_file_path=export_files[0],
                 media_files=media_files if include_media else [],
                 channel_username=channel_username,
-                export_format=export_format
+                export_format=format_label,
+                additional_files=export_files[1:],
+                search_index=self.get_search_index()
             )
             
             # Clean up original files after ZIP creation
-            files_to_cleanup = [filepath]
+            files_to_cleanup = list(export_files)
             if include_media and media_files:
                 media_folder = os.path.join(export_config.export_folder, 'media')
                 if os.path.exists(media_folder):
@@ -140,93 +239,586 @@ class ChannelExporter:
             if progress_callback:
                 await progress_callback(f"❌ Export failed: {str(e)}")
             raise e
+        finally:
+            if processed_messages is not None:
+                processed_messages.close()
+    
+    async def export_channels(self,
+                              channel_usernames: List[str],
+                              export_format: str = 'json',
+                              include_media: bool = False,
+                              max_messages: int = 10000,
+                              progress_callback: Optional[Callable] = None,
+                              fields: Optional[List[str]] = None,
+                              combine: bool = True) -> Dict[str, Any]:
+        """
+        Export several channels concurrently
+        
+        All batches share one limit of export_config.batch_concurrency
+        channels exported at a time. Exports with media run one channel at a
+        time because they share the media folder. Progress of all channels
+        is reported as one consolidated message.
+        
+        Args:
+            channel_usernames: Channel usernames without @
+            combine: Merge the channel archives into one archive with a
+                folder per channel
+            
+        Returns:
+            Dict with the archive paths, exported channels and errors of failed channels
+        """
+        export_semaphore = self.get_export_semaphore()
+        
+        states = {username: "⏳ Queued" for username in channel_usernames}
+        archives: Dict[str, str] = {}
+        failed: Dict[str, str] = {}
+        last_report = 0.0
+        
+        async def report(force: bool = False):
+            nonlocal last_report
+            if not progress_callback:
+                return
+            now = time.monotonic()
+            if not force and now - last_report < self.BATCH_PROGRESS_INTERVAL:
+                return
+            last_report = now
+            await progress_callback(self._render_batch_progress(states, len(archives), len(failed)))
+        
+        async def export_one(username: str):
+            async def channel_progress(text: str):
+                states[username] = text.strip().splitlines()[-1][:80]
+                await report()
+            
+            media_lock = self._media_lock if include_media else None
+            if media_lock:
+                await media_lock.acquire()
+            try:
+                async with export_semaphore:
+                    archives[username] = await self.export_channel(
+                        username, export_format, include_media, max_messages,
+                        progress_callback=channel_progress, fields=fields
+                    )
+                    states[username] = "✅ Done"
+            except Exception as e:
+                failed[username] = str(e)
+                states[username] = f"❌ {e}"[:80]
+            finally:
+                if media_lock:
+                    media_lock.release()
+            await report(force=True)
+        
+        await asyncio.gather(*(export_one(username) for username in channel_usernames))
+        
+        exported = [username for username in channel_usernames if username in archives]
+        archive_paths = [archives[username] for username in exported]
+        
+        if combine and exported:
+            if progress_callback:
+                await progress_callback(f"📦 Combining {len(exported)} archives...")
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            target_path = os.path.join(
+                export_config.export_folder,
+                f"batch_{timestamp}_{'+'.join(parse_export_formats(export_format))}.zip"
+            )
+            report_lines = [f"✅ @{username}" for username in exported]
+            report_lines += [f"❌ @{username}: {error}" for username, error in failed.items()]
+            await asyncio.to_thread(
+                self.zip_creator.combine_archives,
+                {username: archives[username] for username in exported},
+                target_path,
+                {'BATCH_REPORT.txt': '\n'.join(report_lines) + '\n'}
+            )
+            self.zip_creator.cleanup_files(archive_paths)
+            archive_paths = [target_path]
+        
+        return {'archives': archive_paths, 'exported': exported, 'failed': failed}
+    
+    def get_export_semaphore(self) -> asyncio.Semaphore:
+        """Limit of background exports (batches and schedules) running at the same time"""
+        if self._batch_semaphore is None:
+            self._batch_semaphore = asyncio.Semaphore(export_config.batch_concurrency)
+            self._media_lock = asyncio.Lock()
+        return self._batch_semaphore
+    
+    async def export_channel_delta(self, channel_username: str, since_id: int,
+                                   export_format: str = 'json',
+                                   include_media: bool = False,
+                                   max_messages: int = 10000,
+                                   fields: Optional[List[str]] = None) -> Tuple[Optional[str], int]:
+        """
+        Export only the messages posted after message since_id
+        
+        The newest message ID is read first and used as the upper bound, so
+        messages posted during the export are left for the next delta.
+        Messages are exported oldest first, so when more than max_messages
+        are new the next delta continues after the last exported one.
+        
+        Returns:
+            Archive path (None when there is nothing new) and the ID to
+            continue the next delta after
+        """
+        newest_id = await self.get_newest_message_id(channel_username)
+        if newest_id <= since_id:
+            return None, since_id
+        
+        exported_ids = []
+        archive_path = await self.export_channel(
+            channel_username, export_format, include_media, max_messages,
+            fields=fields, min_id=since_id, max_id=newest_id + 1, reverse=True,
+            message_callback=lambda record: exported_ids.append(record.id)
+        )
+        if max_messages > 0 and len(exported_ids) >= max_messages:
+            return archive_path, max(exported_ids)
+        return archive_path, newest_id
+    
+    async def get_newest_message_id(self, channel_username: str) -> int:
+        """ID of the newest message of a channel, 0 if it has none"""
+        client = await self._get_client()
+        latest = await client.get_messages(channel_username, limit=1)
+        return latest[0].id if latest else 0
+    
+    def _render_batch_progress(self, states: Dict[str, str], done: int, failed: int) -> str:
+        """Consolidated progress text of a batch export, listing running and failed channels"""
+        queued = sum(1 for state in states.values() if state == "⏳ Queued")
+        lines = [f"📦 Batch export: {done + failed}/{len(states)} finished, {failed} failed, {queued} queued", ""]
+        lines += [
+            f"@{username}: {state}" for username, state in states.items()
+            if state not in ("⏳ Queued", "✅ Done")
+        ]
+        # Stay below Telegram's message length limit
+        return '\n'.join(lines)[:self.BATCH_PROGRESS_MAX_LENGTH]
+    
+    async def _fetch_messages(self, client: TelegramClient, channel, max_messages: int,
+                              date_from: Optional[datetime] = None,
+                              date_to: Optional[datetime] = None,
+                              search: Optional[str] = None,
+                              min_id: int = 0,
+                              max_id: int = 0,
+                              reverse: bool = False):
+        """
+        Fetch messages from channel, newest first unless reverse, optionally
+        matching a search query or ID range
+        """
+        async for message in client.iter_messages(channel, limit=max_messages if max_messages > 0 else None,
+                                                  offset_date=date_from if reverse else date_to,
+                                                  search=search, min_id=min_id, max_id=max_id,
+                                                  reverse=reverse):
+            if reverse and date_to is not None and message.date > to_utc(date_to):
+                break
+            if not reverse and date_from is not None and message.date < to_utc(date_from):
+                break
+            
+            yield message
+    
+    async def _search_messages(self, client: TelegramClient, channel, keywords: List[str], max_messages: int,
+                               date_from: Optional[datetime], date_to: Optional[datetime],
+                               progress_callback: Optional[Callable]):
+        """
+        Run one server-side search per keyword and merge the results as they arrive
+        
+        Every search is already newest first, so the streams are merged by ID
+        and a message matching several keywords is yielded once. Only the
+        head message of each search is held at a time.
+        """
+        if len(keywords) == 1:
+            async for message in self._fetch_messages(client, channel, max_messages,
+                                                      date_from, date_to, search=keywords[0]):
+                yield message
+            return
+        
+        semaphore = asyncio.Semaphore(self.SEARCH_CONCURRENCY)
+        streams = [
+            self._fetch_messages(client, channel, max_messages, date_from, date_to, search=keyword)
+            for keyword in keywords
+        ]
+        heads = []
+        
+        async def advance(index: int):
+            async with semaphore:
+                try:
+                    message = await streams[index].__anext__()
+                except StopAsyncIteration:
+                    return
+            heapq.heappush(heads, (-message.id, index, message))
+        
+        found = 0
+        last_id = None
+        try:
+            await asyncio.gather(*(advance(index) for index in range(len(streams))))
+            while heads and (max_messages <= 0 or found < max_messages):
+                _, index, message = heapq.heappop(heads)
+                if message.id != last_id:
+                    last_id = message.id
+                    found += 1
+                    yield message
+                await advance(index)
+        finally:
+            for stream in streams:
+                await stream.aclose()
+        
+        if progress_callback:
+            await progress_callback(f"🔎 Found {found} messages for: {', '.join(keywords)}")
+    
+    def _create_spill_buffer(self) -> SpillBuffer:
+        """Create a buffer for processed messages that spills to the export folder"""
+        return SpillBuffer(
+            max_messages=export_config.spill_threshold_messages,
+            max_rss_mb=export_config.spill_threshold_rss_mb,
+            spill_dir=export_config.export_folder
+        )
+    
+    async def _load_from_store(self, client: TelegramClient, channel, message_store: MessageStore,
+                               max_messages: int,
+                               date_from: Optional[datetime],
+                               date_to: Optional[datetime],
+                               progress_callback: Optional[Callable]) -> SpillBuffer:
+        """
+        Bring the local store of a channel up to date and read the export from it
+        
+        Only messages newer than the newest stored ID are fetched, plus older
+        history when the store does not yet reach back far enough for the
+        requested limit or date range. Fetched messages are saved every
+        STORE_PAGE_SIZE records, so a first export of a large channel never
+        holds its history in memory.
+        """
+        coverage = message_store.get_coverage(channel.id)
+        
+        if coverage and self._needs_reconcile(coverage):
+            await self._reconcile_store(client, channel, message_store, coverage, max_messages, progress_callback)
+        elif coverage:
+            await self._reconcile_unchecked(client, channel, message_store, coverage, max_messages,
+                                            progress_callback)
+        
+        low_id = coverage['low_id'] if coverage else None
+        high_id = coverage['high_id'] if coverage else None
+        complete = coverage['complete'] if coverage else False
+        
+        async def save_batch(batch: List[MessageRecord], extends_down: bool, done: bool):
+            # Every page is saved as soon as it is fetched, only the ID cursor stays in memory
+            nonlocal low_id, high_id
+            if batch:
+                high_id = max(high_id or 0, batch[0].id, batch[-1].id)
+                if extends_down:
+                    low_id = batch[-1].id
+            await asyncio.to_thread(message_store.save_messages, channel.id, batch, low_id, high_id, done)
+            batch.clear()
+        
+        if coverage:
+            # Top up with everything newer than the newest stored message
+            newest_first = False
+            if max_messages > 0:
+                latest = await client.get_messages(channel, limit=1)
+                newest_first = bool(latest) and latest[0].id - high_id > max_messages
+            
+            if newest_first:
+                # The gap is larger than the export, so start a new contiguous range
+                complete = False
+                source = client.iter_messages(channel, min_id=high_id, limit=max_messages)
+            else:
+                # Oldest first, so every saved page extends the stored range upwards
+                source = client.iter_messages(channel, min_id=high_id, reverse=True)
+            
+            batch = []
+            fetched = 0
+            async for message in source:
+                batch.append(await self._process_message(message, False, client))
+                fetched += 1
+                
+                if progress_callback and fetched % 100 == 0:
+                    await progress_callback(f"📡 Fetched {fetched} new messages...")
+                
+                if len(batch) >= self.STORE_PAGE_SIZE:
+                    await save_batch(batch, newest_first, complete)
+            
+            if batch:
+                await save_batch(batch, newest_first, complete)
+        
+        stored_count = await asyncio.to_thread(message_store.count_messages, channel.id, date_from, date_to)
+        reaches_date_from = date_from is not None and await asyncio.to_thread(
+            message_store.count_messages, channel.id, None, date_from
+        ) > 0
+        
+        if not complete and not reaches_date_from and not (max_messages > 0 and stored_count >= max_messages):
+            # Backfill older history below the stored range
+            batch = []
+            fetched = 0
+            complete = True
+            async for message in client.iter_messages(channel, offset_id=low_id or 0):
+                batch.append(await self._process_message(message, False, client))
+                fetched += 1
+                
+                if progress_callback and fetched % 100 == 0:
+                    await progress_callback(f"📡 Fetched {fetched} older messages...")
+                
+                if date_from is not None and message.date < to_utc(date_from):
+                    complete = False
+                    break
+                
+                if date_to is None or message.date <= to_utc(date_to):
+                    stored_count += 1
+                    if max_messages > 0 and stored_count >= max_messages:
+                        complete = False
+                        break
+                
+                if len(batch) >= self.STORE_PAGE_SIZE:
+                    await save_batch(batch, True, False)
+            
+            if batch or high_id is not None:
+                await save_batch(batch, True, complete)
+        
+        # Read the export page by page so large histories can spill to disk
+        records = self._create_spill_buffer()
+        before_id = None
+        while max_messages <= 0 or len(records) < max_messages:
+            page_size = self.STORE_PAGE_SIZE
+            if max_messages > 0:
+                page_size = min(page_size, max_messages - len(records))
+            page = await asyncio.to_thread(message_store.get_messages, channel.id, page_size,
+                                           date_from, date_to, before_id)
+            records.extend(page)
+            if len(page) < page_size:
+                break
+            before_id = page[-1].id
+        
+        if progress_callback:
+            await progress_callback(f"💾 Loaded {len(records)} messages from local store")
+        
+        return records
+    
+    def _needs_reconcile(self, coverage: Dict[str, Any]) -> bool:
+        """Check whether stored history is due for an edit and deletion check"""
+        if export_config.reconcile_interval_hours <= 0:
+            return False
+        if not coverage['reconciled_at']:
+            return True
+        reconciled_at = datetime.fromisoformat(coverage['reconciled_at'])
+        return (datetime.now() - reconciled_at).total_seconds() >= export_config.reconcile_interval_hours * 3600
+    
+    async def _reconcile_unchecked(self, client: TelegramClient, channel, message_store: MessageStore,
+                                   coverage: Dict[str, Any], max_messages: int,
+                                   progress_callback: Optional[Callable]):
+        """
+        Check stored history below the reconciled range when the export reaches into it
+
+        An earlier pass may have covered only the newest messages, so a larger
+        export still needs its older part checked before it is served.
+        """
+        reconciled_low_id = coverage['reconciled_low_id']
+        if export_config.reconcile_interval_hours <= 0 or reconciled_low_id is None:
+            return
+        if reconciled_low_id <= coverage['low_id']:
+            return
+        
+        limit = 0
+        if max_messages > 0:
+            checked = await asyncio.to_thread(message_store.count_messages, channel.id,
+                                              min_id=reconciled_low_id)
+            if checked >= max_messages:
+                return
+            limit = max_messages - checked
+        
+        await self._reconcile_store(client, channel, message_store, coverage, limit, progress_callback,
+                                    max_id=reconciled_low_id)
+    
+    async def reconcile_channel(self, channel_username: str,
+                                progress_callback: Optional[Callable] = None) -> Dict[str, int]:
+        """
+        Pick up edits and deletions in the stored history of a channel
+        
+        Args:
+            channel_username: Channel username without @
+            progress_callback: Function to call with progress updates
+            
+        Returns:
+            Counters of checked and changed ID ranges and refreshed messages
+        """
+        message_store = self._get_message_store()
+        client = await self._get_client()
+        channel = await client.get_entity(channel_username)
+        coverage = message_store.get_coverage(channel.id) if message_store else None
+        
+        if coverage is None:
+            return {'checked_ranges': 0, 'changed_ranges': 0, 'refreshed_messages': 0}
+        
+        return await self._reconcile_store(client, channel, message_store, coverage, 0, progress_callback)
     
-    async def _fetch_messages(self, client: TelegramClient, channel, max_messages: int, progress_callback: Optional[Callable]) -> List:
-        """Fetch messages from channel"""
-        messages = []
-        async for message in client.iter_messages(channel, limit=max_messages if max_messages > 0 else None):
-            messages.append(message)
+    async def _reconcile_store(self, client: TelegramClient, channel, message_store: MessageStore,
+                               coverage: Dict[str, Any], max_messages: int,
+                               progress_callback: Optional[Callable],
+                               max_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Compare per-range digests of stored IDs and edit dates with a re-scan
+        
+        Telegram has no history request that returns only IDs and edit
+        dates, so the re-scan downloads every message of the checked window
+        again (the newest max_messages, or the whole stored range). Only the
+        digests of IDs and edit dates are compared. Ranges whose digest
+        differs are processed from the messages already downloaded and
+        written back, without another request. Ranges that disappeared
+        entirely are cleared. The checked ID range is recorded so a later
+        export can check what this pass left out.
+        
+        Args:
+            max_messages: Only check the newest N stored messages (0 = all)
+            max_id: Only check IDs below this range boundary, extending the
+                reconciled range downwards instead of starting a new one
+        """
+        range_size = export_config.reconcile_range_size
+        scan_max_id = max_id if max_id is not None else coverage['high_id'] + 1
+        stored_digests = {
+            range_index: digest
+            for range_index, digest in (await asyncio.to_thread(
+                message_store.get_range_digests, channel.id, range_size)).items()
+            if range_index * range_size < scan_max_id
+        }
+        stats = {'checked_ranges': 0, 'changed_ranges': 0, 'refreshed_messages': 0}
+        
+        if progress_callback:
+            await progress_callback(f"🔍 Checking {len(stored_digests)} stored ranges for edits and deletions...")
+        
+        async def finish_range(range_index: int, messages: List):
+            stats['checked_ranges'] += 1
+            # Messages arrive newest first, digests are built in ascending ID order
+            entries = [
+                (message.id, message.edit_date.isoformat() if message.edit_date else None)
+                for message in reversed(messages)
+            ]
+            if range_digest(entries) == stored_digests.get(range_index):
+                return
             
-            if progress_callback and len(messages) % 100 == 0:
-                await progress_callback(f"📡 Fetched {len(messages)} messages...")
+            records = [await self._process_message(message, False, client) for message in messages]
+            await asyncio.to_thread(
+                message_store.replace_range, channel.id,
+                max(range_index * range_size, coverage['low_id']),
+                min((range_index + 1) * range_size - 1, coverage['high_id']),
+                records
+            )
+            stats['changed_ranges'] += 1
+            stats['refreshed_messages'] += len(records)
         
-        return messages
+        current_index = None
+        current_messages = []
+        seen_ranges = set()
+        scanned = 0
+        limit = max_messages if max_messages > 0 else None
+        
+        async for message in client.iter_messages(channel, limit=limit,
+                                                  min_id=coverage['low_id'] - 1,
+                                                  max_id=scan_max_id):
+            range_index = message.id // range_size
+            if range_index != current_index:
+                if current_index is not None:
+                    await finish_range(current_index, current_messages)
+                current_index = range_index
+                current_messages = []
+                seen_ranges.add(range_index)
+            
+            current_messages.append(message)
+            scanned += 1
+        
+        stopped_early = limit is not None and scanned >= limit
+        if current_index is not None and not stopped_early:
+            await finish_range(current_index, current_messages)
+        
+        # Ranges with no messages left on Telegram were deleted entirely
+        for range_index in set(stored_digests) - seen_ranges:
+            if stopped_early and range_index < current_index:
+                continue
+            await asyncio.to_thread(
+                message_store.replace_range, channel.id,
+                range_index * range_size, (range_index + 1) * range_size - 1, []
+            )
+            stats['changed_ranges'] += 1
+        
+        # A range cut off by the limit was not compared and stays unchecked
+        reconciled_low_id = coverage['low_id']
+        if stopped_early:
+            reconciled_low_id = max((current_index + 1) * range_size, coverage['low_id'])
+        
+        if max_id is None:
+            message_store.mark_reconciled(channel.id, reconciled_low_id)
+        else:
+            message_store.extend_reconciled(channel.id, reconciled_low_id)
+        return stats
     
-    async def _process_message(self, message, include_media: bool, client: TelegramClient) -> Dict[str, Any]:
-        """Process a single message and extract data"""
+    async def _process_message(self, message, include_media: bool, client: TelegramClient,
+                               fields: frozenset = ALL_FIELDS) -> MessageRecord:
+        """
+        Process a single message and extract data
+        
+        Only the fields in fields are computed, the others keep their defaults.
+        Downloaded media are always recorded in media_file.
+        """
         # Convert timezone aware datetime to UTC
         date = message.date
         if date.tzinfo is None:
             date = pytz.UTC.localize(date)
         
-        processed = {
-            'id': message.id,
-            'date': date.isoformat(),
-            'text': message.text or '',
-            'sender_id': getattr(message.from_id, 'user_id', None) if message.from_id else None,
-            'views': message.views,
-            'forwards': message.forwards,
-            'replies': message.replies.replies if message.replies else 0,
-            'edit_date': message.edit_date.isoformat() if message.edit_date else None,
-            'media_type': None,
-            'media_file': None,
-            'file_size': None,
-            'duration': None,
-        }
+        processed = MessageRecord(id=message.id, date=date.isoformat())
+        
+        if 'text' in fields:
+            processed.text = message.text or ''
+        if 'sender_id' in fields and message.from_id:
+            processed.sender_id = getattr(message.from_id, 'user_id', None)
+        if 'views' in fields:
+            processed.views = message.views
+        if 'forwards' in fields:
+            processed.forwards = message.forwards
+        if 'replies' in fields:
+            processed.replies = message.replies.replies if message.replies else 0
+        if 'edit_date' in fields and message.edit_date:
+            processed.edit_date = message.edit_date.isoformat()
         
         # Process media
-        if message.media:
-            media_info = await self._process_media(message, include_media, client)
-            processed.update(media_info)
+        if message.media and (include_media or not fields.isdisjoint(MEDIA_FIELDS)):
+            await self._process_media(message, include_media, client, processed, fields)
         
         return processed
     
-    async def _process_media(self, message, include_media: bool, client: TelegramClient) -> Dict[str, Any]:
-        """Process media in message"""
-        media_info = {
-            'media_type': None,
-            'media_file': None,
-            'file_size': None,
-            'duration': None,
-        }
-        
+    async def _process_media(self, message, include_media: bool, client: TelegramClient, record: MessageRecord,
+                             fields: frozenset = ALL_FIELDS):
+        """Process media in message and fill the selected media fields of the record"""
         if isinstance(message.media, MessageMediaPhoto):
-            media_info['media_type'] = 'photo'
+            record.media_type = 'photo'
             if include_media:
                 try:
                     filename = f"photo_{message.id}.jpg"
                     filepath = os.path.join(export_config.export_folder, 'media', filename)
                     os.makedirs(os.path.dirname(filepath), exist_ok=True)
                     await client.download_media(message.media, filepath)
-                    media_info['media_file'] = filename
+                    record.media_file = filename
                     if os.path.exists(filepath):
-                        media_info['file_size'] = os.path.getsize(filepath)
+                        record.file_size = os.path.getsize(filepath)
                 except Exception:
                     pass  # Skip media download errors
         
         elif isinstance(message.media, MessageMediaDocument):
             document = message.media.document
-            media_info['file_size'] = document.size
+            record.file_size = document.size
+            with_duration = 'duration' in fields
             
             # Determine media type
             if document.mime_type:
                 if document.mime_type.startswith('video/'):
-                    media_info['media_type'] = 'video'
+                    record.media_type = 'video'
                     # Get duration for videos
-                    for attr in document.attributes:
-                        if hasattr(attr, 'duration'):
-                            media_info['duration'] = attr.duration
-                            break
+                    if with_duration:
+                        for attr in document.attributes:
+                            if hasattr(attr, 'duration'):
+                                record.duration = attr.duration
+                                break
                 elif document.mime_type.startswith('audio/'):
-                    media_info['media_type'] = 'audio'
-                    for attr in document.attributes:
-                        if hasattr(attr, 'duration'):
-                            media_info['duration'] = attr.duration
-                            break
+                    record.media_type = 'audio'
+                    if with_duration:
+                        for attr in document.attributes:
+                            if hasattr(attr, 'duration'):
+                                record.duration = attr.duration
+                                break
                 elif document.mime_type.startswith('image/'):
-                    media_info['media_type'] = 'image'
+                    record.media_type = 'image'
                 else:
-                    media_info['media_type'] = 'document'
+                    record.media_type = 'document'
             
             if include_media:
                 try:
@@ -246,129 +838,235 @@ class ChannelExporter:
                     filepath = os.path.join(export_config.export_folder, 'media', filename)
                     os.makedirs(os.path.dirname(filepath), exist_ok=True)
                     await client.download_media(message.media, filepath)
-                    media_info['media_file'] = filename
+                    record.media_file = filename
                 except Exception:
                     pass  # Skip media download errors
-        
-        return media_info
     
-    async def _export_to_json(self, messages: List[Dict], filepath: str, channel):
+    async def _export_to_json(self, messages: List[MessageRecord], filepath: str, channel):
         """Export messages to JSON format"""
-        export_data = {
-            'channel_info': {
-                'id': channel.id,
-                'title': channel.title,
-                'username': channel.username,
-                'description': getattr(channel, 'about', ''),
-                'participants_count': getattr(channel, 'participants_count', None),
-                'export_date': datetime.now().isoformat(),
-            },
-            'messages': messages,
-            'total_messages': len(messages),
-        }
-        
-        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(export_data, indent=2, ensure_ascii=False))
+        await write_export_files(messages, [JsonExportWriter(filepath, channel, len(messages))])
     
-    async def _export_to_csv(self, messages: List[Dict], filepath: str, channel):
+    async def _export_to_csv(self, messages: List[MessageRecord], filepath: str, channel):
         """Export messages to CSV format"""
-        # Define CSV headers
-        headers = [
-            'id', 'date', 'text', 'sender_id', 'views', 'forwards', 'replies',
-            'edit_date', 'media_type', 'media_file', 'file_size', 'duration'
-        ]
-        
-        async with aiofiles.open(filepath, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f.name, fieldnames=headers)
-            await f.write(','.join(headers) + '\n')
-            
-            for message in messages:
-                # Create row with proper escaping
-                row = []
-                for header in headers:
-                    value = message.get(header, '')
-                    if value is None:
-                        value = ''
-                    # Escape quotes and commas
-                    value = str(value).replace('"', '""')
-                    if ',' in str(value) or '"' in str(value) or '\n' in str(value):
-                        value = f'"{value}"'
-                    row.append(value)
-                
-                await f.write(','.join(row) + '\n')
+        await write_export_files(messages, [CsvExportWriter(filepath, channel, len(messages))])
     
-    async def _export_to_markdown(self, messages: List[Dict], filepath: str, channel, media_files: List[str]):
+    async def _export_to_markdown(self, messages: List[MessageRecord], filepath: str, channel, media_files: List[str]):
         """Export messages to Markdown format"""
-        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-            # Write header
-            await f.write(f"# {channel.title}\n\n")
-            
-            if hasattr(channel, 'about') and channel.about:
-                await f.write(f"**Description:** {channel.about}\n\n")
-            
-            if hasattr(channel, 'participants_count') and channel.participants_count:
-                await f.write(f"**Participants:** {channel.participants_count:,}\n\n")
-            
-            await f.write(f"**Export Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            await f.write(f"**Total Messages:** {len(messages)}\n\n")
+        await write_export_files(messages, [MarkdownExportWriter(filepath, channel, len(messages), media_files)])
+    
+    async def refresh_archive_statistics(self, archive_path: str,
+                                         progress_callback: Optional[Callable] = None) -> str:
+        """
+        Refresh views, forwards and replies in an existing JSON/CSV export archive
+        
+        Only the counters are requested from Telegram, in batches of message IDs.
+        Text and media are taken from the archive as they are.
+        
+        Args:
+            archive_path: Path to an archive created by export_channel
+            progress_callback: Function to call with progress updates
             
-            if media_files:
-                await f.write(f"**Media Files:** {len(media_files)}\n\n")
+        Returns:
+            Path to the refreshed archive
+        """
+        documents = await asyncio.to_thread(self._load_export_documents, archive_path)
+        if not documents:
+            raise ValueError("Archive contains no JSON or CSV export file")
+        
+        # Batch archives keep every channel in its own folder
+        channels = await asyncio.to_thread(self._get_archive_channels, archive_path, documents)
+        
+        if progress_callback:
+            await progress_callback(f"🔗 Connecting to Telegram...")
+        
+        client = await self._get_client()
+        counters = {}
+        for folder, channel_username in channels.items():
+            message_ids = sorted({
+                int(message['id'])
+                for document in documents.values() if document['folder'] == folder
+                for message in document['messages']
+            })
+            channel = await client.get_input_entity(channel_username)
+            counters[folder] = await self._fetch_message_counters(client, channel, message_ids, progress_callback)
+        
+        if progress_callback:
+            await progress_callback(f"💾 Writing refreshed archive...")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        target_path = os.path.join(
+            export_config.export_folder,
+            f"{os.path.splitext(os.path.basename(archive_path))[0]}_stats_{timestamp}.zip"
+        )
+        replaced_entries = {
+            name: await asyncio.to_thread(self._render_refreshed_document, document, counters[document['folder']])
+            for name, document in documents.items()
+        }
+        await asyncio.to_thread(self.zip_creator.rebuild_archive, archive_path, target_path, replaced_entries)
+        
+        if progress_callback:
+            updated = sum(len(folder_counters) for folder_counters in counters.values())
+            await progress_callback(f"✅ Updated statistics for {updated} messages")
+        
+        return target_path
+    
+    def _load_export_documents(self, archive_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the JSON and CSV export files of an archive, stored at the top
+        level or in the channel folders of a batch archive
+        """
+        documents = {}
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            for name in zipf.namelist():
+                folder, _, filename = name.rpartition('/')
+                if '/' in folder or folder == 'media' or filename.endswith('.index.json'):
+                    continue  # Media and part indexes of sharded exports
+                if filename.endswith('.json'):
+                    data = json.loads(zipf.read(name).decode('utf-8'))
+                    documents[name] = {'format': 'json', 'folder': folder, 'data': data,
+                                       'messages': data.get('messages', [])}
+                elif filename.endswith('.csv'):
+                    with zipf.open(name) as f:
+                        reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8', newline=''))
+                        rows = list(reader)
+                    documents[name] = {'format': 'csv', 'folder': folder, 'messages': rows,
+                                       'columns': reader.fieldnames or []}
+        return documents
+    
+    def _get_archive_channels(self, archive_path: str, documents: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Find the channel username of every export folder of an archive, ''
+        being the top level
+        
+        The username is taken from the JSON channel info, else the README,
+        else the export file names, never from the archive name.
+        """
+        channels = {}
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            for folder in sorted({document['folder'] for document in documents.values()}):
+                prefix = f"{folder}/" if folder else ''
+                names = [name for name, document in documents.items() if document['folder'] == folder]
+                channel_username = (
+                    self._get_json_channel(documents[name] for name in names)
+                    or self._get_readme_channel(zipf, f"{prefix}README.txt")
+                    or self._get_export_file_channel(names)
+                )
+                if not channel_username:
+                    raise ValueError(f"Could not find the channel of {prefix or 'the archive'}")
+                channels[folder] = channel_username
+        return channels
+    
+    @staticmethod
+    def _get_json_channel(documents: Iterable[Dict[str, Any]]) -> Optional[str]:
+        for document in documents:
+            if document['format'] == 'json':
+                username = document['data'].get('channel_info', {}).get('username')
+                if username:
+                    return username
+        return None
+    
+    @staticmethod
+    def _get_readme_channel(zipf: zipfile.ZipFile, readme_name: str) -> Optional[str]:
+        """Channel of the 'Channel: @name' line written by create_export_archive"""
+        try:
+            readme = zipf.read(readme_name).decode('utf-8', errors='replace')
+        except KeyError:
+            return None
+        match = re.search(r'^Channel: @(\w+)\s*$', readme, re.MULTILINE)
+        return match.group(1) if match else None
+    
+    @staticmethod
+    def _get_export_file_channel(names: List[str]) -> Optional[str]:
+        """Channel of export files named {channel}_{YYYYmmdd}_{HHMMSS}.{format}"""
+        for name in names:
+            match = re.match(r'(\w+?)_\d{8}_\d{6}\.', name.rpartition('/')[2])
+            if match:
+                return match.group(1)
+        return None
+    
+    async def _fetch_message_counters(self, client: TelegramClient, channel, message_ids: List[int],
+                                      progress_callback: Optional[Callable]) -> Dict[int, Dict[str, int]]:
+        """Request current views, forwards and replies for message IDs in concurrent batches"""
+        batches = [
+            message_ids[i:i + self.COUNTERS_BATCH_SIZE]
+            for i in range(0, len(message_ids), self.COUNTERS_BATCH_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(self.COUNTERS_CONCURRENCY)
+        counters = {}
+        done = 0
+        
+        async def fetch_batch(batch: List[int]):
+            nonlocal done
+            async with semaphore:
+                result = await client(GetMessagesViewsRequest(peer=channel, id=batch, increment=False))
             
-            await f.write("---\n\n")
+            for message_id, views in zip(batch, result.views):
+                if views.views is None and views.forwards is None and views.replies is None:
+                    continue  # Deleted message, keep the archived numbers
+                counters[message_id] = {
+                    'views': views.views,
+                    'forwards': views.forwards,
+                    'replies': views.replies.replies if views.replies else 0,
+                }
             
-            # Write messages
-            for i, message in enumerate(messages):
-                # Message header
-                date_str = datetime.fromisoformat(message['date'].replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-                await f.write(f"## Message {message['id']}\n\n")
-                await f.write(f"**Date:** {date_str}\n\n")
-                
-                if message['sender_id']:
-                    await f.write(f"**Sender ID:** {message['sender_id']}\n\n")
-                
-                # Message text
-                if message['text']:
-                    # Escape markdown special characters in message text
-                    text = message['text']
-                    text = text.replace('*', '\\*').replace('_', '\\_').replace('`', '\\`')
-                    await f.write(f"{text}\n\n")
-                
-                # Media information
-                if message['media_type']:
-                    await f.write(f"**Media Type:** {message['media_type'].title()}\n\n")
-                    
-                    if message['media_file']:
-                        await f.write(f"**Media File:** `{message['media_file']}`\n\n")
-                    
-                    if message['file_size']:
-                        size_mb = message['file_size'] / (1024 * 1024)
-                        await f.write(f"**File Size:** {size_mb:.2f} MB\n\n")
-                    
-                    if message['duration']:
-                        # Ensure duration is an integer to avoid formatting errors
-                        duration_total = int(float(message['duration']))
-                        duration_min = duration_total // 60
-                        duration_sec = duration_total % 60
-                        await f.write(f"**Duration:** {duration_min}:{duration_sec:02d}\n\n")
-                
-                # Statistics
-                stats = []
-                if message['views']:
-                    stats.append(f"👁 {message['views']:,} views")
-                if message['forwards']:
-                    stats.append(f"📤 {message['forwards']:,} forwards")
-                if message['replies']:
-                    stats.append(f"💬 {message['replies']:,} replies")
-                
-                if stats:
-                    await f.write(f"**Stats:** {' | '.join(stats)}\n\n")
-                
-                if message['edit_date']:
-                    edit_date = datetime.fromisoformat(message['edit_date'].replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-                    await f.write(f"**Edited:** {edit_date}\n\n")
-                
-                await f.write("---\n\n")
+            done += 1
+            if progress_callback and done % 10 == 0:
+                await progress_callback(f"📊 Refreshed {done}/{len(batches)} batches...")
+        
+        await asyncio.gather(*(fetch_batch(batch) for batch in batches))
+        return counters
+    
+    def _render_refreshed_document(self, document: Dict[str, Any],
+                                   counters: Dict[int, Dict[str, int]]) -> str:
+        """
+        Apply refreshed counters to an export document and render it in its format
+        
+        Only counters the export already has are updated, so exports made
+        with a reduced field set keep their fields.
+        """
+        for message in document['messages']:
+            for key, value in counters.get(int(message['id']), {}).items():
+                if key in message:
+                    message[key] = value
+        
+        if document['format'] == 'json':
+            document['data'].setdefault('channel_info', {})['stats_refresh_date'] = datetime.now().isoformat()
+            return json.dumps(document['data'], indent=2, ensure_ascii=False)
+        
+        # Keep the columns of the archived file
+        columns = document['columns']
+        writer = CsvExportWriter(None, None, len(document['messages']), fields=columns)
+        return writer.render_header() + ''.join(writer.render_message(row) for row in document['messages'])
+    
+    async def send_file_to_user(self,
+                                user,
+                                file_path: str,
+                                caption: str = '',
+                                progress_callback: Optional[Callable] = None):
+        """
+        Deliver a file through the user client, bypassing the Bot API size limit
+        
+        Args:
+            user: Username or user ID of the recipient
+            file_path: Path to the file to send
+            caption: HTML caption for the document
+            progress_callback: Function to call with progress updates
+        """
+        client = await self._get_client()
+        entity = await client.get_input_entity(user)
+        uploader = ParallelUploader(client, export_config.upload_workers)
+        
+        last_reported = 0
+        
+        async def report_progress(uploaded_parts: int, total_parts: int):
+            nonlocal last_reported
+            percent = uploaded_parts * 100 // total_parts
+            if progress_callback and percent - last_reported >= 10:
+                last_reported = percent
+                await progress_callback(f"📤 Uploading archive: {percent}%")
+        
+        input_file = await uploader.upload(file_path, report_progress)
+        await client.send_file(entity, input_file, caption=caption, parse_mode='html', force_document=True)
     
     async def close(self):
         """Close the Telegram client"""
@@ -0,0 +1,582 @@
+"""
+Incremental format writers for Telegram Channel Export Bot
+Render processed messages to JSON, CSV and Markdown one message at a time
+"""
+import os
+import re
+import json
+import asyncio
+import itertools
+import math
+import multiprocessing
+import aiofiles
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from operator import attrgetter, itemgetter
+from typing import List, Dict, Type, Iterable, Optional, Tuple
+
+from config import export_config
+from message_record import MessageRecord, MESSAGE_FIELDS, parse_export_fields, record_to_json
+
+SUPPORTED_FORMATS = ('json', 'csv', 'markdown')
+
+# Messages rendered per task on the render pool
+RENDER_CHUNK_SIZE = 500
+RENDER_WORKERS = 2
+
+# Upper bound of processes for parallel Markdown rendering, every spawned
+# worker imports the export modules again and costs tens of megabytes
+MARKDOWN_MAX_PROCESSES = 4
+
+_render_executor: Optional[ThreadPoolExecutor] = None
+_markdown_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_render_executor() -> ThreadPoolExecutor:
+    """Shared thread pool that renders export chunks off the event loop"""
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='export-render')
+    return _render_executor
+
+
+def parse_export_formats(export_format) -> List[str]:
+    """
+    Normalize an export format setting to an ordered list of formats
+
+    Accepts a single format ('json'), a combined string ('json+csv')
+    or any iterable of format names.
+    """
+    if isinstance(export_format, str):
+        names = export_format.replace(',', '+').split('+')
+    else:
+        names = list(export_format)
+
+    requested = {name.strip().lower() for name in names if name and name.strip()}
+    unsupported = requested - set(SUPPORTED_FORMATS)
+    if unsupported or not requested:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    return [name for name in SUPPORTED_FORMATS if name in requested]
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, within its affinity mask and cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Container limits like docker's cpus: 0.5 set a quota, not an affinity
+    for quota_file, period_file in (('/sys/fs/cgroup/cpu.max', None),
+                                    ('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', '/sys/fs/cgroup/cpu/cpu.cfs_period_us')):
+        try:
+            with open(quota_file) as f:
+                values = f.read().split()
+            if period_file:
+                with open(period_file) as f:
+                    values.append(f.read().strip())
+        except OSError:
+            continue
+        if len(values) == 2 and values[0] not in ('max', '-1'):
+            cpus = min(cpus, math.ceil(int(values[0]) / int(values[1])))
+        break
+
+    return max(1, cpus)
+
+
+def get_markdown_processes() -> int:
+    """
+    Processes for parallel Markdown rendering, MARKDOWN_PROCESSES or by
+    default the available CPUs up to MARKDOWN_MAX_PROCESSES. With one
+    process Markdown is rendered on the render threads instead.
+    """
+    if export_config.markdown_processes > 0:
+        return export_config.markdown_processes
+    return min(available_cpus(), MARKDOWN_MAX_PROCESSES)
+
+
+def get_markdown_executor() -> ProcessPoolExecutor:
+    """Shared process pool for parallel Markdown rendering"""
+    global _markdown_executor
+    if _markdown_executor is None:
+        # Spawned workers don't inherit the bot's threads and open connections
+        _markdown_executor = ProcessPoolExecutor(
+            max_workers=get_markdown_processes(), mp_context=multiprocessing.get_context('spawn')
+        )
+    return _markdown_executor
+
+
+def shutdown_executors():
+    """Stop the render threads and Markdown worker processes"""
+    global _render_executor, _markdown_executor
+    for executor in (_render_executor, _markdown_executor):
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    _render_executor = None
+    _markdown_executor = None
+
+
+_record_values = attrgetter(*MESSAGE_FIELDS)
+_dict_values = itemgetter(*MESSAGE_FIELDS)
+
+
+def message_values(message) -> Tuple:
+    """Field values of a record or message dict in MESSAGE_FIELDS order"""
+    if isinstance(message, MessageRecord):
+        return _record_values(message)
+    return _dict_values(message)
+
+
+_MARKDOWN_ESCAPES = str.maketrans({'*': '\\*', '_': '\\_', '`': '\\`'})
+_ISO_SECONDS = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}')
+
+
+def _markdown_date(value: str) -> str:
+    """Format an ISO date as '%Y-%m-%d %H:%M:%S' without parsing it when possible"""
+    if _ISO_SECONDS.match(value):
+        return f"{value[:10]} {value[11:19]}"
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def render_markdown_message(values: Tuple) -> str:
+    """Render one message, given as field values in MESSAGE_FIELDS order"""
+    (message_id, date, text, sender_id, views, forwards, replies,
+     edit_date, media_type, media_file, file_size, duration) = values
+
+    parts = [f"## Message {message_id}\n\n**Date:** {_markdown_date(date)}\n\n"]
+
+    if sender_id:
+        parts.append(f"**Sender ID:** {sender_id}\n\n")
+
+    # Message text with markdown special characters escaped
+    if text:
+        parts.append(f"{text.translate(_MARKDOWN_ESCAPES)}\n\n")
+
+    # Media information
+    if media_type:
+        parts.append(f"**Media Type:** {media_type.title()}\n\n")
+
+        if media_file:
+            parts.append(f"**Media File:** `{media_file}`\n\n")
+
+        if file_size:
+            parts.append(f"**File Size:** {file_size / (1024 * 1024):.2f} MB\n\n")
+
+        if duration:
+            # Ensure duration is an integer to avoid formatting errors
+            duration_min, duration_sec = divmod(int(float(duration)), 60)
+            parts.append(f"**Duration:** {duration_min}:{duration_sec:02d}\n\n")
+
+    # Statistics
+    stats = []
+    if views:
+        stats.append(f"👁 {views:,} views")
+    if forwards:
+        stats.append(f"📤 {forwards:,} forwards")
+    if replies:
+        stats.append(f"💬 {replies:,} replies")
+
+    if stats:
+        parts.append(f"**Stats:** {' | '.join(stats)}\n\n")
+
+    if edit_date:
+        parts.append(f"**Edited:** {_markdown_date(edit_date)}\n\n")
+
+    parts.append("---\n\n")
+    return ''.join(parts)
+
+
+def render_markdown_chunk(rows: List[Tuple]) -> str:
+    """Render consecutive messages given as field value tuples, run on the process pool"""
+    return ''.join(map(render_markdown_message, rows))
+
+
+class ExportWriter:
+    """Base class for writers that stream messages into an export file"""
+
+    extension = ''
+    file_options: Dict[str, str] = {}
+    # Number of rendered messages buffered before a write to disk
+    FLUSH_EVERY = 500
+
+    def __init__(self, filepath: str, channel, total_messages: int, media_files: Optional[List[str]] = None,
+                 fields: Optional[Iterable[str]] = None):
+        self.filepath = filepath
+        self.channel = channel
+        self.total_messages = total_messages
+        self.media_files = media_files or []
+        # Message fields written to the export, in column order
+        self.fields = parse_export_fields(fields)
+        # Set when the file is one part of a sharded export
+        self.part: Optional[int] = None
+        self.index_file: Optional[str] = None
+        self.written = 0
+        self._file = None
+        self._buffer: List[str] = []
+
+    async def open(self):
+        """Open the output file and write the header"""
+        self._file = await aiofiles.open(self.filepath, 'w', encoding='utf-8', **self.file_options)
+        self._buffer.append(self.render_header())
+
+    async def write_message(self, message):
+        """Render one message into the output buffer"""
+        self._buffer.append(self.render_message(message))
+        self.written += 1
+        if len(self._buffer) >= self.FLUSH_EVERY:
+            await self._flush()
+
+    async def write_messages(self, messages: List):
+        """Render a chunk of messages on the render pool and write it"""
+        self._buffer.append(await asyncio.get_running_loop().run_in_executor(
+            get_render_executor(), self.render_messages, messages
+        ))
+        await self._flush()
+
+    def render_messages(self, messages: List) -> str:
+        """Render consecutive messages, counting them as written"""
+        parts = []
+        for message in messages:
+            parts.append(self.render_message(message))
+            self.written += 1
+        return ''.join(parts)
+
+    async def close(self):
+        """Write the footer and close the output file"""
+        if self._file is None:
+            return
+        self._buffer.append(self.render_footer())
+        await self._flush()
+        await self._file.close()
+
+    async def _flush(self):
+        if self._buffer:
+            await self._file.write(''.join(self._buffer))
+            self._buffer = []
+
+    async def size(self) -> int:
+        """Bytes of the output file written so far"""
+        await self._flush()
+        return await self._file.tell()
+
+    @property
+    def output_files(self) -> List[str]:
+        return [self.filepath]
+
+    def render_header(self) -> str:
+        return ''
+
+    def render_message(self, message) -> str:
+        raise NotImplementedError
+
+    def render_footer(self) -> str:
+        return ''
+
+
+class JsonExportWriter(ExportWriter):
+    """Writes the same document as json.dumps(export_data, indent=2)"""
+
+    extension = 'json'
+
+    def render_header(self) -> str:
+        channel_info = {
+            'id': self.channel.id,
+            'title': self.channel.title,
+            'username': self.channel.username,
+            'description': getattr(self.channel, 'about', ''),
+            'participants_count': getattr(self.channel, 'participants_count', None),
+            'export_date': datetime.now().isoformat(),
+        }
+        header = json.dumps({'channel_info': channel_info}, indent=2, ensure_ascii=False)
+        # Drop the closing brace so the messages list can follow
+        return header[:-2] + ',\n  "messages": ['
+
+    def render_message(self, message) -> str:
+        separator = '\n' if self.written == 0 else ',\n'
+        if self.fields is not MESSAGE_FIELDS:
+            message = {field: message[field] for field in self.fields}
+        body = json.dumps(message, indent=2, ensure_ascii=False, default=record_to_json)
+        # JSON strings never contain raw newlines, so re-indenting by line is safe
+        return separator + '    ' + body.replace('\n', '\n    ')
+
+    def render_footer(self) -> str:
+        closing = '\n  ]' if self.written else ']'
+        return f'{closing},\n  "total_messages": {self.written}\n}}'
+
+
+class CsvExportWriter(ExportWriter):
+    """Writes one CSV row per message with the export field headers"""
+
+    extension = 'csv'
+    file_options = {'newline': ''}
+
+    @property
+    def headers(self) -> List[str]:
+        return list(self.fields)
+
+    def render_header(self) -> str:
+        return ','.join(self.headers) + '\n'
+
+    def render_message(self, message) -> str:
+        # Create row with proper escaping
+        row = []
+        for header in self.fields:
+            value = message.get(header, '')
+            if value is None:
+                value = ''
+            # Escape quotes and commas
+            value = str(value).replace('"', '""')
+            if ',' in value or '"' in value or '\n' in value:
+                value = f'"{value}"'
+            row.append(value)
+
+        return ','.join(row) + '\n'
+
+
+class MarkdownExportWriter(ExportWriter):
+    """Writes a human-readable Markdown document"""
+
+    extension = 'markdown'
+    # Exports with at least this many messages are rendered in parallel processes
+    PARALLEL_THRESHOLD = 5000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = deque()
+        # Positions of unselected fields, rendered as if they were empty
+        self._hidden = [index for index, field in enumerate(MESSAGE_FIELDS) if field not in self.fields]
+        # Read once per export, it looks at the cgroup files
+        self._processes = get_markdown_processes()
+
+    def _values(self, message) -> Tuple:
+        values = message_values(message)
+        if self._hidden:
+            values = list(values)
+            for index in self._hidden:
+                values[index] = None
+        return values
+
+    def render_header(self) -> str:
+        channel = self.channel
+        parts = [f"# {channel.title}\n\n"]
+
+        if hasattr(channel, 'about') and channel.about:
+            parts.append(f"**Description:** {channel.about}\n\n")
+
+        if hasattr(channel, 'participants_count') and channel.participants_count:
+            parts.append(f"**Participants:** {channel.participants_count:,}\n\n")
+
+        parts.append(f"**Export Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+        if self.part:
+            # The totals are those of the whole export, the index has the counts of every part
+            parts.append(f"**Part:** {self.part} (see {self.index_file} for the messages of every part)\n\n")
+        else:
+            parts.append(f"**Total Messages:** {self.total_messages}\n\n")
+
+            if self.media_files:
+                parts.append(f"**Media Files:** {len(self.media_files)}\n\n")
+
+        parts.append("---\n\n")
+        return ''.join(parts)
+
+    def render_message(self, message) -> str:
+        return render_markdown_message(self._values(message))
+
+    async def write_messages(self, messages: List):
+        """Render large exports on the process pool, keeping several chunks in flight"""
+        processes = self._processes
+        if self.total_messages < self.PARALLEL_THRESHOLD or processes == 1:
+            await super().write_messages(messages)
+            return
+
+        rows = [self._values(message) for message in messages]
+        self._pending.append(asyncio.get_running_loop().run_in_executor(
+            get_markdown_executor(), render_markdown_chunk, rows
+        ))
+        self.written += len(rows)
+
+        while len(self._pending) >= processes * 2:
+            await self._write_oldest_chunk()
+
+    async def _write_oldest_chunk(self):
+        # Chunks are written in submission order, whatever order they finish in
+        self._buffer.append(await self._pending.popleft())
+        await self._flush()
+
+    async def close(self):
+        """Write the remaining chunks, the footer and close the output file"""
+        try:
+            while self._pending:
+                await self._write_oldest_chunk()
+        finally:
+            await super().close()
+
+
+class ShardedExportWriter:
+    """
+    Writes one format as numbered part files plus a JSON index of the parts
+
+    Every part is a complete document of its format. A part is closed after
+    max_messages messages or once its file reaches max_bytes, checked every
+    SIZE_CHECK_EVERY messages. The index lists the ID and date range of
+    each part and is rewritten whenever a part is finished.
+    """
+
+    SIZE_CHECK_EVERY = 100
+
+    def __init__(self, writer_class: Type[ExportWriter], filepath: str, channel, total_messages: int,
+                 media_files: Optional[List[str]] = None, max_messages: int = 0, max_bytes: int = 0,
+                 fields: Optional[Iterable[str]] = None):
+        self.writer_class = writer_class
+        self.filepath = filepath
+        self.channel = channel
+        self.total_messages = total_messages
+        self.media_files = media_files
+        self.fields = fields
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.parts: List[Dict] = []
+
+        stem, extension = os.path.splitext(filepath)
+        self._stem = stem
+        self._extension = extension
+        self.index_path = f"{stem}{extension}.index.json"
+        self._current: Optional[ExportWriter] = None
+        self._current_part: Optional[Dict] = None
+
+    @property
+    def output_files(self) -> List[str]:
+        return [self.index_path] + [part['path'] for part in self.parts]
+
+    async def open(self):
+        """Parts are opened on demand when messages arrive"""
+
+    async def write_messages(self, messages: List):
+        step = self.SIZE_CHECK_EVERY if self.max_bytes else len(messages)
+        position = 0
+
+        while position < len(messages):
+            if self._current is None:
+                await self._open_part()
+
+            count = step
+            if self.max_messages:
+                count = min(count, self.max_messages - self._current.written)
+
+            piece = messages[position:position + count]
+            await self._current.write_messages(piece)
+            self._track(piece)
+            position += len(piece)
+
+            if ((self.max_messages and self._current.written >= self.max_messages) or
+                    (self.max_bytes and await self._current.size() >= self.max_bytes)):
+                await self._close_part()
+
+    async def close(self):
+        """Finish the last part and write the index"""
+        if self._current is None and not self.parts:
+            # An empty export still gets one (empty) part
+            await self._open_part()
+        if self._current is not None:
+            await self._close_part()
+
+    async def _open_part(self):
+        number = len(self.parts) + 1
+        path = f"{self._stem}.part{number:04d}{self._extension}"
+        self._current = self.writer_class(path, self.channel, self.total_messages, self.media_files, self.fields)
+        self._current.part = number
+        self._current.index_file = os.path.basename(self.index_path)
+        self._current_part = {
+            'path': path, 'file': os.path.basename(path), 'part': number, 'messages': 0,
+            'id_from': None, 'id_to': None, 'date_from': None, 'date_to': None,
+        }
+        await self._current.open()
+
+    def _track(self, messages: List):
+        part = self._current_part
+        for message in messages:
+            message_id = message['id']
+            date = message['date']
+            if part['id_from'] is None or message_id < part['id_from']:
+                part['id_from'] = message_id
+            if part['id_to'] is None or message_id > part['id_to']:
+                part['id_to'] = message_id
+            if date and (part['date_from'] is None or date < part['date_from']):
+                part['date_from'] = date
+            if date and (part['date_to'] is None or date > part['date_to']):
+                part['date_to'] = date
+        part['messages'] += len(messages)
+        self.written += len(messages)
+
+    async def _close_part(self):
+        await self._current.close()
+        self._current_part['size'] = os.path.getsize(self._current.filepath)
+        self.parts.append(self._current_part)
+        self._current = None
+        self._current_part = None
+        await self._write_index()
+
+    async def _write_index(self):
+        index = {
+            'format': self.writer_class.extension,
+            'total_messages': self.written,
+            'parts': [
+                {key: value for key, value in part.items() if key != 'path'}
+                for part in self.parts
+            ],
+        }
+        async with aiofiles.open(self.index_path, 'w', encoding='utf-8') as f:
+            await f.write(json.dumps(index, indent=2, ensure_ascii=False))
+
+
+FORMAT_WRITERS: Dict[str, Type[ExportWriter]] = {
+    'json': JsonExportWriter,
+    'csv': CsvExportWriter,
+    'markdown': MarkdownExportWriter,
+}
+
+
+def create_export_writer(export_format: str, filepath: str, channel, total_messages: int,
+                         media_files: Optional[List[str]] = None,
+                         max_messages: int = 0, max_bytes: int = 0,
+                         fields: Optional[Iterable[str]] = None):
+    """Create the writer of a format, split into part files when a part limit is set"""
+    writer_class = FORMAT_WRITERS[export_format]
+    if max_messages > 0 or max_bytes > 0:
+        return ShardedExportWriter(writer_class, filepath, channel, total_messages, media_files,
+                                   max_messages, max_bytes, fields)
+    return writer_class(filepath, channel, total_messages, media_files, fields)
+
+
+def _next_chunk(iterator, size: int) -> List:
+    return list(itertools.islice(iterator, size))
+
+
+async def write_export_files(messages: Iterable, writers: List[ExportWriter]):
+    """
+    Fan out one pass over the messages to several writers
+
+    Messages are read and rendered in chunks on the render pool, so the
+    event loop only coordinates the work and the file writes.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_render_executor()
+
+    for writer in writers:
+        await writer.open()
+
+    try:
+        iterator = iter(messages)
+        while True:
+            # Reading can unpickle spilled batches, so it runs on the pool too
+            chunk = await loop.run_in_executor(executor, _next_chunk, iterator, RENDER_CHUNK_SIZE)
+            if not chunk:
+                break
+            await asyncio.gather(*(writer.write_messages(chunk) for writer in writers))
+    finally:
+        for writer in writers:
+            await writer.close()
@@ -26,15 +26,23 @@ LANGUAGES = {
             "/start - Start the bot\n"
             "/menu - Open settings menu\n"
             "/help - Show this help\n"
-            "/status - Check bot status\n\n"
+            "/status - Check bot status\n"
+            "/search @channel word1, word2 - Export only posts mentioning the keywords\n"
+            "/schedule @channel 24 - Receive new posts every 24 hours\n"
+            "/schedules - List scheduled exports\n"
+            "/unschedule 1 - Remove a scheduled export\n"
+            "/exports - Your recent exports\n"
+            "/find word1 word2 - Find posts in earlier exports\n\n"
             "<b>Supported formats:</b>\n"
             "• JSON - Complete message data\n"
             "• CSV - Tabular format\n"
             "• Markdown - Human-readable format\n\n"
+            "Send an exported JSON/CSV ZIP back to refresh its views, forwards and replies.\n\n"
             "<b>Channel input examples:</b>\n"
             "• @channelname\n"
             "• https://t.me/channelname\n"
             "• channelname (without @)\n"
+            "• Several channels separated by spaces, commas or new lines for a batch export\n"
         ),
         'status_text': (
             "📊 <b>Bot Status</b>\n\n"
@@ -52,7 +60,8 @@ LANGUAGES = {
             "🌐 Language: <b>{language}</b>\n"
             "📋 Format: <b>{format}</b>\n"
             "📎 Include Media: <b>{media}</b>\n"
-            "📏 Max Messages: <b>{max_messages}</b>\n\n"
+            "📏 Max Messages: <b>{max_messages}</b>\n"
+            "🧾 Fields: <b>{fields}</b>\n\n"
             "Select an option to configure:"
         ),
         'format_menu_text': (
@@ -61,7 +70,8 @@ LANGUAGES = {
             "<b>Available formats:</b>\n"
             "• JSON - Complete message data with metadata\n"
             "• CSV - Tabular format for spreadsheet apps\n"
-            "• Markdown - Human-readable text format\n\n"
+            "• Markdown - Human-readable text format\n"
+            "• Several formats - One export, all files in a single archive\n\n"
             "Select your preferred format:"
         ),
         'media_menu_text': (
@@ -72,6 +82,16 @@ LANGUAGES = {
             "• <b>No Media</b> - Text messages only (faster export)\n\n"
             "⚠️ Note: Including media increases export time and file size."
         ),
+        'fields_menu_text': (
+            "🧾 <b>Export Fields</b>\n\n"
+            "Current fields: <b>{fields}</b>\n\n"
+            "<b>Options:</b>\n"
+            "• <b>All Fields</b> - Every message field\n"
+            "• <b>Basic</b> - ID, date and text\n"
+            "• <b>Text + Stats</b> - Basic plus views, forwards and replies\n"
+            "• <b>No Media Info</b> - Everything except media metadata\n\n"
+            "Fewer fields make exports faster and smaller."
+        ),
         'limit_menu_text': (
             "📏 <b>Message Limit Settings</b>\n\n"
             "Current limit: <b>{limit} messages</b>\n\n"
@@ -103,15 +123,22 @@ LANGUAGES = {
         'btn_export_format': "📋 Export Format",
         'btn_media_settings': "📎 Media Settings",
         'btn_message_limit': "📏 Message Limit",
+        'btn_export_fields': "🧾 Export Fields",
         'btn_reset_settings': "🔄 Reset to Defaults",
         'btn_back': "🔙 Back",
         'btn_back_to_menu': "🔙 Back to Menu",
         'btn_json': "📄 JSON",
         'btn_csv': "📊 CSV",
         'btn_markdown': "📝 Markdown",
+        'btn_json_markdown': "📄 JSON + 📝 Markdown",
+        'btn_all_formats': "📦 All Formats",
         'btn_include_media': "✅ Include Media",
         'btn_no_media': "❌ No Media",
         'btn_no_limit': "No Limit",
+        'btn_fields_all': "📋 All Fields",
+        'btn_fields_basic': "🆔 Basic",
+        'btn_fields_stats': "📊 Text + Stats",
+        'btn_fields_nomedia': "📝 No Media Info",
         'btn_english': "🇺🇸 English",
         'btn_russian': "🇷🇺 Русский",
         # Status messages
@@ -125,6 +152,8 @@ LANGUAGES = {
         'media_enabled': "✅ Media inclusion <b>enabled</b>",
         'media_disabled': "✅ Media inclusion <b>disabled</b>",
         'limit_set': "✅ Message limit set to <b>{limit}</b>",
+        'fields_set': "✅ Export fields set to <b>{fields}</b>",
+        'all_fields': "All",
         'language_set': "✅ Language set to <b>{language}</b>",
         'settings_reset': "✅ Settings reset to defaults",
         'invalid_channel': (
@@ -134,6 +163,55 @@ LANGUAGES = {
             "• channelname"
         ),
         'export_starting': "🔄 Starting export of @{channel}...\nFormat: {format}\nMedia: {media}",
+        'search_keywords': "\nSearch: {keywords}",
+        'batch_starting': "🔄 Starting batch export of {count} channels...\nFormat: {format}",
+        'schedule_usage': (
+            "🗓 <b>Scheduled exports</b>\n\n"
+            "<code>/schedule @channelname 24</code> - export new posts every 24 hours\n"
+            "<code>/schedules</code> - list your scheduled exports\n"
+            "<code>/unschedule 1</code> - remove scheduled export #1\n\n"
+            "Each run only contains posts published since the previous run."
+        ),
+        'schedule_added': (
+            "✅ Scheduled export #{schedule_id} of @{channel} every {hours} h\n"
+            "📋 Format: {format}\n"
+            "🕐 First run: {next_run}"
+        ),
+        'schedule_invalid_interval': "❌ The interval must be a whole number of hours, at least {min_hours}.",
+        'schedule_limit_reached': "❌ You already have {max_schedules} scheduled exports. Remove one with /unschedule first.",
+        'schedule_channel_failed': "❌ Could not read @{channel}: {error}",
+        'schedules_header': "🗓 <b>Your scheduled exports:</b>\n",
+        'schedule_item': "#{schedule_id} @{channel} - every {hours} h, {format}, next run {next_run}",
+        'schedules_empty': "You have no scheduled exports. Add one with /schedule @channelname 24",
+        'schedule_removed': "✅ Scheduled export #{schedule_id} removed",
+        'schedule_not_found': "❌ Scheduled export #{schedule_id} not found",
+        'schedule_delta_caption': (
+            "🗓 New posts from @{channel}\n"
+            "📋 Format: {format}\n"
+            "📏 File size: {size:.2f} MB\n"
+            "🕐 Exported at: {time}"
+        ),
+        'schedule_run_failed': "❌ Scheduled export of @{channel} failed: {error}\nIt will be retried at the next run.",
+        'exports_header': "📂 <b>Your recent exports:</b>\n",
+        'exports_item': "{date} @{channel} - {format}, {size}{status}",
+        'exports_removed': " (removed)",
+        'exports_empty': "You have no exports yet. Send a channel username to export it.",
+        'batch_completed': "✅ Batch export finished: {exported}/{total} channels exported",
+        'batch_too_many': "❌ Too many channels in one message ({count}). The maximum is {max_channels}.",
+        'search_usage': (
+            "🔎 <b>Keyword search export</b>\n\n"
+            "Usage: <code>/search @channelname keyword1, keyword2</code>\n\n"
+            "Only posts mentioning at least one keyword are exported."
+        ),
+        'find_usage': (
+            "🔍 <b>Search earlier exports</b>\n\n"
+            "Usage: <code>/find word1 word2</code>\n\n"
+            "Finds posts containing all words in the JSON and CSV exports made so far."
+        ),
+        'find_header': "🔍 <b>Posts matching \"{query}\":</b>\n",
+        'find_item': "\n<a href=\"https://t.me/{channel}/{message_id}\">@{channel} #{message_id}</a> {date}\n{snippet}",
+        'find_no_results': "Nothing found for \"{query}\" in earlier exports.",
+        'find_disabled': "❌ The search index is disabled.",
         'export_completed': (
             "📁 Export completed for @{channel}\n"
             "📋 Format: {format}\n"
@@ -143,6 +221,36 @@ LANGUAGES = {
         ),
         'export_failed': "❌ Export failed: {error}\n\nPlease check the channel username and try again.",
         'file_send_failed': "❌ Failed to send export file: {error}",
+        'archive_splitting': "✂️ Archive is larger than {limit} MB, splitting into parts...",
+        'user_client_sending': "📤 Archive is larger than {limit} MB, sending it from the export account...",
+        'user_client_sent': "✅ Archive ({size:.2f} MB) sent to you in a private message from the export account",
+        'stats_refresh_starting': "📊 Refreshing views, forwards and replies in your archive...",
+        'stats_refresh_completed': (
+            "📊 Statistics refreshed\n"
+            "🕐 Updated at: {time}\n"
+            "📦 Text and media are unchanged"
+        ),
+        'stats_refresh_failed': "❌ Could not refresh statistics: {error}",
+        'stats_refresh_too_large': (
+            "❌ This archive is {size:.1f} MB, but bots can only download files up to {limit} MB.\n\n"
+            "Send a smaller archive, or export the channel again for current statistics."
+        ),
+        'sending_part': "📤 Sending part {current}/{total}...",
+        'export_part_caption': "📦 Part {current}/{total} of @{channel} ({size:.2f} MB)",
+        'parts_completed': (
+            "📁 Export completed for @{channel}\n"
+            "📋 Format: {format}\n"
+            "📦 Delivered in {total} ZIP parts, each can be opened separately"
+        ),
+        'delivery_interrupted': (
+            "⚠️ Delivery stopped at part {current}/{total}: {error}\n\n"
+            "Press the button to continue from this part."
+        ),
+        'delivery_not_found': "❌ There is no interrupted delivery to resume.",
+        'parts_skipped_files': (
+            "⚠️ These files are larger than {limit} MB on their own and were left out of the parts:\n{files}"
+        ),
+        'btn_resume_delivery': "▶️ Resume Delivery",
         'included': "Included",
         'excluded': "Excluded",
         'no_limit_text': "No limit",
@@ -236,15 +344,23 @@ LANGUAGES = {
             "/start - Запустить бота\n"
             "/menu - Открыть меню настроек\n"
             "/help - Показать эту справку\n"
-            "/status - Проверить статус бота\n\n"
+            "/status - Проверить статус бота\n"
+            "/search @channel слово1, слово2 - Экспортировать только посты с ключевыми словами\n"
+            "/schedule @channel 24 - Получать новые посты каждые 24 часа\n"
+            "/schedules - Список запланированных экспортов\n"
+            "/unschedule 1 - Удалить запланированный экспорт\n"
+            "/exports - Ваши последние экспорты\n"
+            "/find слово1 слово2 - Найти посты в прошлых экспортах\n\n"
             "<b>Поддерживаемые форматы:</b>\n"
             "• JSON - Полные данные сообщений\n"
             "• CSV - Табличный формат\n"
             "• Markdown - Человекочитаемый формат\n\n"
+            "Отправьте экспортированный JSON/CSV ZIP обратно, чтобы обновить просмотры, пересылки и ответы.\n\n"
             "<b>Примеры ввода канала:</b>\n"
             "• @channelname\n"
             "• https://t.me/channelname\n"
             "• channelname (без @)\n"
+            "• Несколько каналов через пробел, запятую или с новой строки для пакетного экспорта\n"
         ),
         'status_text': (
             "📊 <b>Статус бота</b>\n\n"
@@ -262,7 +378,8 @@ LANGUAGES = {
             "🌐 Язык: <b>{language}</b>\n"
             "📋 Формат: <b>{format}</b>\n"
             "📎 Включить медиа: <b>{media}</b>\n"
-            "📏 Максимум сообщений: <b>{max_messages}</b>\n\n"
+            "📏 Максимум сообщений: <b>{max_messages}</b>\n"
+            "🧾 Поля: <b>{fields}</b>\n\n"
             "Выберите опцию для настройки:"
         ),
         'format_menu_text': (
@@ -271,7 +388,8 @@ LANGUAGES = {
             "<b>Доступные форматы:</b>\n"
             "• JSON - Полные данные сообщений с метаданными\n"
             "• CSV - Табличный формат для электронных таблиц\n"
-            "• Markdown - Человекочитаемый текстовый формат\n\n"
+            "• Markdown - Человекочитаемый текстовый формат\n"
+            "• Несколько форматов - Один экспорт, все файлы в одном архиве\n\n"
             "Выберите предпочтительный формат:"
         ),
         'media_menu_text': (
@@ -282,6 +400,16 @@ LANGUAGES = {
             "• <b>Без медиа</b> - Только текстовые сообщения (быстрый экспорт)\n\n"
             "⚠️ Примечание: Включение медиа увеличивает время экспорта и размер файла."
         ),
+        'fields_menu_text': (
+            "🧾 <b>Поля экспорта</b>\n\n"
+            "Текущие поля: <b>{fields}</b>\n\n"
+            "<b>Варианты:</b>\n"
+            "• <b>Все поля</b> - Все поля сообщения\n"
+            "• <b>Основные</b> - ID, дата и текст\n"
+            "• <b>Текст + статистика</b> - Основные плюс просмотры, пересылки и ответы\n"
+            "• <b>Без медиа</b> - Все, кроме метаданных медиа\n\n"
+            "Меньше полей - быстрее экспорт и меньше файл."
+        ),
         'limit_menu_text': (
             "📏 <b>Настройки лимита сообщений</b>\n\n"
             "Текущий лимит: <b>{limit} сообщений</b>\n\n"
@@ -313,15 +441,22 @@ LANGUAGES = {
         'btn_export_format': "📋 Формат экспорта",
         'btn_media_settings': "📎 Настройки медиа",
         'btn_message_limit': "📏 Лимит сообщений",
+        'btn_export_fields': "🧾 Поля экспорта",
         'btn_reset_settings': "🔄 Сбросить настройки",
         'btn_back': "🔙 Назад",
         'btn_back_to_menu': "🔙 Назад в меню",
         'btn_json': "📄 JSON",
         'btn_csv': "📊 CSV",
         'btn_markdown': "📝 Markdown",
+        'btn_json_markdown': "📄 JSON + 📝 Markdown",
+        'btn_all_formats': "📦 Все форматы",
         'btn_include_media': "✅ Включить медиа",
         'btn_no_media': "❌ Без медиа",
         'btn_no_limit': "Без лимита",
+        'btn_fields_all': "📋 Все поля",
+        'btn_fields_basic': "🆔 Основные",
+        'btn_fields_stats': "📊 Текст + статистика",
+        'btn_fields_nomedia': "📝 Без медиа",
         'btn_english': "🇺🇸 English",
         'btn_russian': "🇷🇺 Русский",
         # Status messages
@@ -335,6 +470,8 @@ LANGUAGES = {
         'media_enabled': "✅ Включение медиа <b>включено</b>",
         'media_disabled': "✅ Включение медиа <b>отключено</b>",
         'limit_set': "✅ Лимит сообщений установлен на <b>{limit}</b>",
+        'fields_set': "✅ Поля экспорта: <b>{fields}</b>",
+        'all_fields': "Все",
         'language_set': "✅ Язык установлен на <b>{language}</b>",
         'settings_reset': "✅ Настройки сброшены к значениям по умолчанию",
         'invalid_channel': (
@@ -344,6 +481,55 @@ LANGUAGES = {
             "• channelname"
         ),
         'export_starting': "🔄 Начинаю экспорт @{channel}...\nФормат: {format}\nМедиа: {media}",
+        'search_keywords': "\nПоиск: {keywords}",
+        'batch_starting': "🔄 Начинаю пакетный экспорт {count} каналов...\nФормат: {format}",
+        'schedule_usage': (
+            "🗓 <b>Запланированные экспорты</b>\n\n"
+            "<code>/schedule @channelname 24</code> - экспортировать новые посты каждые 24 часа\n"
+            "<code>/schedules</code> - список ваших запланированных экспортов\n"
+            "<code>/unschedule 1</code> - удалить запланированный экспорт #1\n\n"
+            "Каждый запуск содержит только посты, опубликованные после предыдущего."
+        ),
+        'schedule_added': (
+            "✅ Экспорт #{schedule_id} канала @{channel} запланирован каждые {hours} ч\n"
+            "📋 Формат: {format}\n"
+            "🕐 Первый запуск: {next_run}"
+        ),
+        'schedule_invalid_interval': "❌ Интервал должен быть целым числом часов, не меньше {min_hours}.",
+        'schedule_limit_reached': "❌ У вас уже {max_schedules} запланированных экспортов. Сначала удалите один через /unschedule.",
+        'schedule_channel_failed': "❌ Не удалось прочитать @{channel}: {error}",
+        'schedules_header': "🗓 <b>Ваши запланированные экспорты:</b>\n",
+        'schedule_item': "#{schedule_id} @{channel} - каждые {hours} ч, {format}, следующий запуск {next_run}",
+        'schedules_empty': "У вас нет запланированных экспортов. Добавьте через /schedule @channelname 24",
+        'schedule_removed': "✅ Запланированный экспорт #{schedule_id} удален",
+        'schedule_not_found': "❌ Запланированный экспорт #{schedule_id} не найден",
+        'schedule_delta_caption': (
+            "🗓 Новые посты из @{channel}\n"
+            "📋 Формат: {format}\n"
+            "📏 Размер файла: {size:.2f} МБ\n"
+            "🕐 Экспортировано в: {time}"
+        ),
+        'schedule_run_failed': "❌ Запланированный экспорт @{channel} не удался: {error}\nПовторная попытка будет при следующем запуске.",
+        'exports_header': "📂 <b>Ваши последние экспорты:</b>\n",
+        'exports_item': "{date} @{channel} - {format}, {size}{status}",
+        'exports_removed': " (удален)",
+        'exports_empty': "У вас пока нет экспортов. Отправьте имя канала, чтобы экспортировать его.",
+        'batch_completed': "✅ Пакетный экспорт завершен: экспортировано {exported}/{total} каналов",
+        'batch_too_many': "❌ Слишком много каналов в одном сообщении ({count}). Максимум - {max_channels}.",
+        'search_usage': (
+            "🔎 <b>Экспорт по ключевым словам</b>\n\n"
+            "Использование: <code>/search @channelname слово1, слово2</code>\n\n"
+            "Экспортируются только посты, содержащие хотя бы одно ключевое слово."
+        ),
+        'find_usage': (
+            "🔍 <b>Поиск по прошлым экспортам</b>\n\n"
+            "Использование: <code>/find слово1 слово2</code>\n\n"
+            "Находит посты со всеми словами в сделанных ранее экспортах JSON и CSV."
+        ),
+        'find_header': "🔍 <b>Посты по запросу \"{query}\":</b>\n",
+        'find_item': "\n<a href=\"https://t.me/{channel}/{message_id}\">@{channel} #{message_id}</a> {date}\n{snippet}",
+        'find_no_results': "По запросу \"{query}\" в прошлых экспортах ничего не найдено.",
+        'find_disabled': "❌ Поисковый индекс отключен.",
         'export_completed': (
             "📁 Экспорт завершен для @{channel}\n"
             "📋 Формат: {format}\n"
@@ -353,6 +539,36 @@ LANGUAGES = {
         ),
         'export_failed': "❌ Экспорт не удался: {error}\n\nПроверьте имя канала и попробуйте снова.",
         'file_send_failed': "❌ Не удалось отправить файл экспорта: {error}",
+        'archive_splitting': "✂️ Архив больше {limit} МБ, разбиваю на части...",
+        'user_client_sending': "📤 Архив больше {limit} МБ, отправляю его с аккаунта экспорта...",
+        'user_client_sent': "✅ Архив ({size:.2f} МБ) отправлен вам личным сообщением с аккаунта экспорта",
+        'stats_refresh_starting': "📊 Обновляю просмотры, пересылки и ответы в вашем архиве...",
+        'stats_refresh_completed': (
+            "📊 Статистика обновлена\n"
+            "🕐 Обновлено в: {time}\n"
+            "📦 Текст и медиа не изменены"
+        ),
+        'stats_refresh_failed': "❌ Не удалось обновить статистику: {error}",
+        'stats_refresh_too_large': (
+            "❌ Этот архив занимает {size:.1f} МБ, а боты могут скачивать файлы только до {limit} МБ.\n\n"
+            "Отправьте архив поменьше или экспортируйте канал заново для актуальной статистики."
+        ),
+        'sending_part': "📤 Отправка части {current}/{total}...",
+        'export_part_caption': "📦 Часть {current}/{total} для @{channel} ({size:.2f} МБ)",
+        'parts_completed': (
+            "📁 Экспорт завершен для @{channel}\n"
+            "📋 Формат: {format}\n"
+            "📦 Отправлено {total} ZIP частей, каждую можно открыть отдельно"
+        ),
+        'delivery_interrupted': (
+            "⚠️ Отправка остановлена на части {current}/{total}: {error}\n\n"
+            "Нажмите кнопку, чтобы продолжить с этой части."
+        ),
+        'delivery_not_found': "❌ Нет прерванной отправки для продолжения.",
+        'parts_skipped_files': (
+            "⚠️ Эти файлы сами по себе больше {limit} МБ и не вошли в части:\n{files}"
+        ),
+        'btn_resume_delivery': "▶️ Продолжить отправку",
         'included': "Включено",
         'excluded': "Исключено",
         'no_limit_text': "Без лимита",
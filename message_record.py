@@ -0,0 +1,123 @@
+"""
+Compact message record for Telegram Channel Export Bot
+Stores processed messages in slotted objects instead of per-message dicts
+"""
+from typing import Dict, Any, Tuple, Optional, Iterable, Union
+
+# Field order matches the JSON/CSV column order of the exports
+MESSAGE_FIELDS: Tuple[str, ...] = (
+    'id', 'date', 'text', 'sender_id', 'views', 'forwards', 'replies',
+    'edit_date', 'media_type', 'media_file', 'file_size', 'duration'
+)
+
+# Fields every export contains, they identify and order the messages
+REQUIRED_FIELDS: Tuple[str, ...] = ('id', 'date')
+MEDIA_FIELDS: Tuple[str, ...] = ('media_type', 'media_file', 'file_size', 'duration')
+
+# Field selections offered in the bot settings
+FIELD_PRESETS: Dict[str, Tuple[str, ...]] = {
+    'all': MESSAGE_FIELDS,
+    'basic': ('id', 'date', 'text'),
+    'stats': ('id', 'date', 'text', 'views', 'forwards', 'replies'),
+    'nomedia': tuple(field for field in MESSAGE_FIELDS if field not in MEDIA_FIELDS),
+}
+
+
+def parse_export_fields(fields: Optional[Union[str, Iterable[str]]]) -> Tuple[str, ...]:
+    """
+    Normalize a field selection to a tuple in export column order
+
+    Accepts None (all fields), a preset name ('basic'), a comma separated
+    string ('id,date,text') or any iterable of field names. The required
+    fields are always included. A selection of every field returns
+    MESSAGE_FIELDS itself.
+    """
+    if fields is None:
+        return MESSAGE_FIELDS
+
+    if isinstance(fields, str):
+        if fields.strip().lower() in FIELD_PRESETS:
+            return parse_export_fields(FIELD_PRESETS[fields.strip().lower()])
+        names = fields.split(',')
+    else:
+        names = list(fields)
+
+    requested = {name.strip().lower() for name in names if name and name.strip()}
+    unsupported = requested - set(MESSAGE_FIELDS)
+    if unsupported:
+        raise ValueError(f"Unsupported export fields: {', '.join(sorted(unsupported))}")
+
+    requested.update(REQUIRED_FIELDS)
+    if len(requested) == len(MESSAGE_FIELDS):
+        return MESSAGE_FIELDS
+    return tuple(field for field in MESSAGE_FIELDS if field in requested)
+
+
+class MessageRecord:
+    """Processed message with read-only mapping access for format writers"""
+
+    __slots__ = MESSAGE_FIELDS
+
+    def __init__(self,
+                 id: int,
+                 date: str,
+                 text: str = '',
+                 sender_id: int = None,
+                 views: int = None,
+                 forwards: int = None,
+                 replies: int = 0,
+                 edit_date: str = None,
+                 media_type: str = None,
+                 media_file: str = None,
+                 file_size: int = None,
+                 duration: float = None):
+        self.id = id
+        self.date = date
+        self.text = text
+        self.sender_id = sender_id
+        self.views = views
+        self.forwards = forwards
+        self.replies = replies
+        self.edit_date = edit_date
+        self.media_type = media_type
+        self.media_file = media_file
+        self.file_size = file_size
+        self.duration = duration
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MessageRecord':
+        """Create a record from a processed message dict"""
+        return cls(**{field: data[field] for field in MESSAGE_FIELDS if field in data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the record to a dict in export field order"""
+        return {field: getattr(self, field) for field in MESSAGE_FIELDS}
+
+    def keys(self) -> Tuple[str, ...]:
+        return MESSAGE_FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in MESSAGE_FIELDS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in MESSAGE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in MESSAGE_FIELDS
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, MessageRecord):
+            return all(getattr(self, field) == getattr(other, field) for field in MESSAGE_FIELDS)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(id={self.id!r}, date={self.date!r}, media_type={self.media_type!r})"
+
+
+def record_to_json(obj: Any) -> Dict[str, Any]:
+    """json.dumps default hook that serializes MessageRecord objects"""
+    if isinstance(obj, MessageRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
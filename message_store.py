@@ -0,0 +1,267 @@
+"""
+Local message store for Telegram Channel Export Bot
+Keeps processed messages per channel in SQLite so repeated exports only fetch new messages
+"""
+import os
+import sqlite3
+import threading
+import hashlib
+import pytz
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Iterable, Tuple
+
+from message_record import MessageRecord, MESSAGE_FIELDS
+
+
+def to_utc(value: datetime) -> datetime:
+    """Make a datetime timezone aware in UTC, treating naive values as UTC"""
+    if value.tzinfo is None:
+        return pytz.UTC.localize(value)
+    return value.astimezone(pytz.UTC)
+
+
+def range_digest(entries: Iterable[Tuple[int, Optional[str]]]) -> str:
+    """Digest of (message ID, edit date) pairs given in ascending ID order"""
+    digest = hashlib.blake2b(digest_size=16)
+    for message_id, edit_date in entries:
+        digest.update(f"{message_id}:{edit_date or ''};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def to_store_date(value: Optional[datetime]) -> Optional[str]:
+    """Convert a datetime to the ISO string format used for stored message dates"""
+    if value is None:
+        return None
+    return to_utc(value).isoformat()
+
+
+class MessageStore:
+    """
+    SQLite store of processed messages keyed by channel ID
+
+    Besides the messages, the store tracks for every channel the contiguous
+    range of message IDs it holds (low_id..high_id) and whether that range
+    reaches the beginning of the channel history.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        columns = ', '.join(f"{field} {self._column_type(field)}" for field in MESSAGE_FIELDS)
+        with self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS messages (
+                    channel_id INTEGER NOT NULL,
+                    {columns},
+                    PRIMARY KEY (channel_id, id)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_date ON messages (channel_id, date)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    channel_id INTEGER PRIMARY KEY,
+                    low_id INTEGER NOT NULL,
+                    high_id INTEGER NOT NULL,
+                    complete INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL,
+                    reconciled_at TEXT,
+                    reconciled_low_id INTEGER
+                )
+            """)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(coverage)")}
+            if 'reconciled_at' not in columns:
+                self._conn.execute("ALTER TABLE coverage ADD COLUMN reconciled_at TEXT")
+            if 'reconciled_low_id' not in columns:
+                self._conn.execute("ALTER TABLE coverage ADD COLUMN reconciled_low_id INTEGER")
+                # Older databases only know a channel-wide flag, so check them again
+                self._conn.execute("UPDATE coverage SET reconciled_at = NULL")
+
+    @staticmethod
+    def _column_type(field: str) -> str:
+        if field in ('id', 'sender_id', 'views', 'forwards', 'replies', 'file_size'):
+            return 'INTEGER'
+        if field == 'duration':
+            return 'REAL'
+        return 'TEXT'
+
+    def get_coverage(self, channel_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored ID range of a channel, None if nothing is stored
+
+        IDs from reconciled_low_id up to high_id were checked for edits and
+        deletions at reconciled_at or fetched fresh after that.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT low_id, high_id, complete, reconciled_at, reconciled_low_id "
+                "FROM coverage WHERE channel_id = ?",
+                (channel_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return {'low_id': row[0], 'high_id': row[1], 'complete': bool(row[2]),
+                'reconciled_at': row[3], 'reconciled_low_id': row[4]}
+
+    def save_messages(self, channel_id: int, records: Iterable[MessageRecord],
+                      low_id: int, high_id: int, complete: bool):
+        """Insert or replace messages and set the channel coverage in one transaction"""
+        placeholders = ', '.join('?' for _ in range(len(MESSAGE_FIELDS) + 1))
+        rows = (
+            (channel_id,) + tuple(getattr(record, field) for field in MESSAGE_FIELDS)
+            for record in records
+        )
+
+        now = datetime.now().isoformat()
+
+        with self._lock, self._conn:
+            # Rows outside the new range are no longer known to be contiguous
+            self._conn.execute(
+                "DELETE FROM messages WHERE channel_id = ? AND (id < ? OR id > ?)",
+                (channel_id, low_id, high_id)
+            )
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO messages (channel_id, {', '.join(MESSAGE_FIELDS)}) "
+                f"VALUES ({placeholders})",
+                rows
+            )
+            # Freshly fetched messages count as reconciled. Backfilled history
+            # only extends the reconciled range when it reached the old bottom.
+            self._conn.execute(
+                "INSERT INTO coverage (channel_id, low_id, high_id, complete, updated_at, "
+                "reconciled_at, reconciled_low_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (channel_id) DO UPDATE SET low_id = excluded.low_id, "
+                "high_id = excluded.high_id, complete = excluded.complete, updated_at = excluded.updated_at, "
+                "reconciled_low_id = CASE WHEN coverage.reconciled_low_id <= coverage.low_id "
+                "THEN excluded.low_id ELSE MAX(coverage.reconciled_low_id, excluded.low_id) END",
+                (channel_id, low_id, high_id, int(complete), now, now, low_id)
+            )
+
+    def get_range_digests(self, channel_id: int, range_size: int) -> Dict[int, str]:
+        """
+        Get a digest of IDs and edit dates for every stored range of message IDs
+
+        Range N covers IDs N * range_size .. (N + 1) * range_size - 1.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, edit_date FROM messages WHERE channel_id = ? ORDER BY id",
+                (channel_id,)
+            ).fetchall()
+
+        grouped: Dict[int, List[Tuple[int, Optional[str]]]] = {}
+        for message_id, edit_date in rows:
+            grouped.setdefault(message_id // range_size, []).append((message_id, edit_date))
+
+        return {range_index: range_digest(entries) for range_index, entries in grouped.items()}
+
+    def replace_range(self, channel_id: int, low_id: int, high_id: int, records: Iterable[MessageRecord]):
+        """Replace all stored messages with IDs in low_id..high_id, dropping deleted ones"""
+        placeholders = ', '.join('?' for _ in range(len(MESSAGE_FIELDS) + 1))
+        rows = (
+            (channel_id,) + tuple(getattr(record, field) for field in MESSAGE_FIELDS)
+            for record in records
+        )
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE channel_id = ? AND id BETWEEN ? AND ?",
+                (channel_id, low_id, high_id)
+            )
+            self._conn.executemany(
+                f"INSERT INTO messages (channel_id, {', '.join(MESSAGE_FIELDS)}) VALUES ({placeholders})",
+                rows
+            )
+
+    def mark_reconciled(self, channel_id: int, low_id: int):
+        """Remember that IDs from low_id up to the newest were just checked against Telegram"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE coverage SET reconciled_at = ?, reconciled_low_id = ? WHERE channel_id = ?",
+                (datetime.now().isoformat(), low_id, channel_id)
+            )
+
+    def extend_reconciled(self, channel_id: int, low_id: int):
+        """Lower the bottom of the reconciled range after checking older IDs, keeping its time"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE coverage SET reconciled_low_id = MIN(reconciled_low_id, ?) WHERE channel_id = ?",
+                (low_id, channel_id)
+            )
+
+    def count_messages(self, channel_id: int,
+                       date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None,
+                       min_id: Optional[int] = None) -> int:
+        """Count stored messages of a channel in an optional date range, from an optional ID"""
+        where, params = self._build_filter(channel_id, date_from, date_to)
+        if min_id is not None:
+            where += " AND id >= ?"
+            params.append(min_id)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM messages WHERE {where}", params).fetchone()[0]
+
+    def get_messages(self, channel_id: int,
+                     limit: int = 0,
+                     date_from: Optional[datetime] = None,
+                     date_to: Optional[datetime] = None,
+                     before_id: Optional[int] = None) -> List[MessageRecord]:
+        """
+        Get stored messages newest first, like Telethon's iter_messages
+
+        Args:
+            channel_id: Channel ID
+            limit: Maximum number of messages (0 = no limit)
+            date_from: Only messages sent at or after this time
+            date_to: Only messages sent at or before this time
+            before_id: Only messages with a lower ID, for reading page by page
+        """
+        where, params = self._build_filter(channel_id, date_from, date_to)
+        if before_id is not None:
+            where += " AND id < ?"
+            params.append(before_id)
+        query = f"SELECT {', '.join(MESSAGE_FIELDS)} FROM messages WHERE {where} ORDER BY id DESC"
+        if limit > 0:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        return [MessageRecord(*row) for row in rows]
+
+    def delete_channel(self, channel_id: int):
+        """Remove all stored data of a channel"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE channel_id = ?", (channel_id,))
+            self._conn.execute("DELETE FROM coverage WHERE channel_id = ?", (channel_id,))
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _build_filter(channel_id: int, date_from: Optional[datetime], date_to: Optional[datetime]):
+        where = ["channel_id = ?"]
+        params: List[Any] = [channel_id]
+        if date_from is not None:
+            where.append("date >= ?")
+            params.append(to_store_date(date_from))
+        if date_to is not None:
+            where.append("date <= ?")
+            params.append(to_store_date(date_to))
+        return ' AND '.join(where), params
@@ -0,0 +1,155 @@
+"""
+Export Retention Manager for Telegram Channel Export Bot
+Keeps the export folder within a byte quota and age limit
+"""
+import os
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+
+class RetentionManager:
+    """
+    Evicts export files by age and, above the byte quota, least recently used first
+
+    Only regular files at the top level of the export folder are managed.
+    The media folder and temporary directories of running exports are left
+    alone, as are files changed within the grace period and pinned files
+    (volumes waiting for delivery). A file counts as used when it was
+    created, sent or touched, and touch() records the use in the file's
+    access time, so the order survives restarts. Removed files are also
+    marked removed in the export catalog when one is given.
+    """
+
+    # Files deleted per worker thread call, between which the loop runs other tasks
+    EVICT_BATCH_SIZE = 50
+
+    def __init__(self, export_folder: str, max_size_mb: int = 0, max_age_hours: int = 0,
+                 grace_minutes: int = 10, catalog=None):
+        self.export_folder = export_folder
+        self.catalog = catalog
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.max_age_seconds = max_age_hours * 3600
+        self.grace_seconds = grace_minutes * 60
+        self.pinned: Set[str] = set()
+        self.stats: Dict[str, Any] = {
+            'usage_bytes': 0,
+            'file_count': 0,
+            'expired_files': 0,
+            'expired_bytes': 0,
+            'evicted_files': 0,
+            'evicted_bytes': 0,
+            'sweeps': 0,
+            'last_sweep': None,
+        }
+        self._lock = asyncio.Lock()
+
+    def touch(self, file_path: str):
+        """Record a use of a file so it is evicted later"""
+        try:
+            stat = os.stat(file_path)
+            os.utime(file_path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+
+    def pin(self, file_paths: List[str]):
+        """Protect files from eviction until they are unpinned"""
+        self.pinned.update(os.path.abspath(path) for path in file_paths)
+
+    def unpin(self, file_paths: List[str]):
+        self.pinned.difference_update(os.path.abspath(path) for path in file_paths)
+
+    def _scan(self) -> List[Tuple[str, int, float, float]]:
+        """List managed files as (path, size, last use, last change)"""
+        entries = []
+        if not os.path.isdir(self.export_folder):
+            return entries
+
+        with os.scandir(self.export_folder) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue  # Removed while scanning
+                entries.append((entry.path, stat.st_size, max(stat.st_atime, stat.st_mtime), stat.st_mtime))
+        return entries
+
+    def _remove_files(self, entries: List[Tuple[str, int, float, float]]) -> Tuple[int, int]:
+        removed = []
+        removed_bytes = 0
+        for path, size, _, _ in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed.append(path)
+            removed_bytes += size
+        if self.catalog is not None and removed:
+            self.catalog.remove(removed)
+        return len(removed), removed_bytes
+
+    async def sweep(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Apply the age limit and quota once
+
+        Scanning and deleting run in worker threads, deletions in small
+        batches, so the event loop stays responsive.
+
+        Returns:
+            Current usage and eviction counters
+        """
+        async with self._lock:
+            now = now or time.time()
+            entries = await asyncio.to_thread(self._scan)
+            usage = sum(size for _, size, _, _ in entries)
+
+            candidates = [
+                entry for entry in entries
+                if now - entry[3] >= self.grace_seconds and os.path.abspath(entry[0]) not in self.pinned
+            ]
+            # Least recently used first
+            candidates.sort(key=lambda entry: entry[2])
+
+            expired = []
+            if self.max_age_seconds:
+                expired = [entry for entry in candidates if now - entry[2] > self.max_age_seconds]
+
+            over_quota = []
+            if self.max_size_bytes:
+                expired_paths = {entry[0] for entry in expired}
+                excess = usage - sum(size for _, size, _, _ in expired) - self.max_size_bytes
+                for entry in candidates:
+                    if excess <= 0:
+                        break
+                    if entry[0] in expired_paths:
+                        continue
+                    over_quota.append(entry)
+                    excess -= entry[1]
+
+            file_count = len(entries)
+            for reason, victims in (('expired', expired), ('evicted', over_quota)):
+                for start in range(0, len(victims), self.EVICT_BATCH_SIZE):
+                    removed, removed_bytes = await asyncio.to_thread(
+                        self._remove_files, victims[start:start + self.EVICT_BATCH_SIZE]
+                    )
+                    self.stats[f'{reason}_files'] += removed
+                    self.stats[f'{reason}_bytes'] += removed_bytes
+                    usage -= removed_bytes
+                    file_count -= removed
+
+            self.stats['usage_bytes'] = usage
+            self.stats['file_count'] = file_count
+            self.stats['sweeps'] += 1
+            self.stats['last_sweep'] = now
+            return self.get_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current usage of the export folder and eviction counters"""
+        stats = dict(self.stats)
+        stats['usage_mb'] = stats['usage_bytes'] / (1024 * 1024)
+        stats['quota_mb'] = self.max_size_bytes / (1024 * 1024)
+        stats['expired_mb'] = stats['expired_bytes'] / (1024 * 1024)
+        stats['evicted_mb'] = stats['evicted_bytes'] / (1024 * 1024)
+        return stats
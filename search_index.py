@@ -0,0 +1,220 @@
+"""
+Full-text search index for Telegram Channel Export Bot
+Maps the terms of exported messages to the channel, message and archive they came from
+"""
+import csv
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Dict, Any
+
+from export_reader import JsonObjectReader, export_format_of, open_export_text
+
+_TERM = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text: str) -> List[str]:
+    """Unique lowercase word terms of a text in order of appearance"""
+    terms = {}
+    for term in _TERM.findall(text.casefold()):
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH:
+            terms.setdefault(term, None)
+    return list(terms)
+
+
+def iter_export_messages(file_path: str, export_format: str) -> Iterable[Dict[str, Any]]:
+    """Stream the messages of a JSON or CSV export file"""
+    with open_export_text(file_path) as f:
+        if export_format == 'json':
+            for key, messages in JsonObjectReader(f).members(streamed=('messages',)):
+                if key == 'messages':
+                    yield from messages
+        elif export_format == 'csv':
+            yield from csv.DictReader(f)
+
+
+class SearchIndex:
+    """
+    SQLite inverted index over exported messages
+
+    Every message is stored once per channel with the archive it was last
+    exported in and the start of its text for snippets, so queries never
+    open archives. Postings are keyed by (term, message), a query walks the
+    postings of its first term newest first and checks the other terms by
+    primary key, so it stops after the requested number of matches.
+    """
+
+    # Message texts are at most 4096 characters, longer values are cut off
+    MAX_STORED_TEXT = 4096
+    SNIPPET_LENGTH = 160
+    INDEX_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    doc_id INTEGER PRIMARY KEY,
+                    channel TEXT NOT NULL,
+                    message_id INTEGER NOT NULL,
+                    archive TEXT NOT NULL,
+                    date TEXT,
+                    text TEXT NOT NULL,
+                    UNIQUE (channel, message_id)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID
+            """)
+
+    def index_messages(self, archive: str, channel: str, messages: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add exported messages to the index
+
+        Messages indexed before only get their archive updated unless
+        their text changed.
+
+        Returns:
+            Number of messages with text
+        """
+        channel = channel.lower()
+        indexed = 0
+        batch = []
+        for message in messages:
+            text = message.get('text') or ''
+            try:
+                message_id = int(message.get('id'))
+            except (TypeError, ValueError):
+                continue
+            if not text.strip():
+                continue
+
+            batch.append((message_id, message.get('date') or None, text[:self.MAX_STORED_TEXT]))
+            if len(batch) >= self.INDEX_BATCH_SIZE:
+                indexed += self._index_batch(archive, channel, batch)
+                batch = []
+
+        if batch:
+            indexed += self._index_batch(archive, channel, batch)
+        return indexed
+
+    def _index_batch(self, archive: str, channel: str, batch: List) -> int:
+        added = []
+        removed = []
+        with self._lock, self._conn:
+            placeholders = ', '.join('?' * len(batch))
+            known = {
+                message_id: (doc_id, text)
+                for message_id, doc_id, text in self._conn.execute(
+                    f"SELECT message_id, doc_id, text FROM messages WHERE channel = ? AND message_id IN ({placeholders})",
+                    (channel, *(message_id for message_id, _, _ in batch))
+                )
+            }
+
+            for message_id, date, text in batch:
+                if message_id not in known:
+                    doc_id = self._conn.execute(
+                        "INSERT INTO messages (channel, message_id, archive, date, text) VALUES (?, ?, ?, ?, ?)",
+                        (channel, message_id, archive, date, text)
+                    ).lastrowid
+                else:
+                    doc_id, old_text = known[message_id]
+                    self._conn.execute(
+                        "UPDATE messages SET archive = ?, date = ?, text = ? WHERE doc_id = ?",
+                        (archive, date, text, doc_id)
+                    )
+                    if old_text == text:
+                        continue
+                    removed.extend((term, doc_id) for term in tokenize(old_text))
+
+                known[message_id] = (doc_id, text)
+                added.extend((term, doc_id) for term in tokenize(text))
+
+            # In key order, so pages of the postings tree are written once per batch
+            removed.sort()
+            added.sort()
+            self._conn.executemany("DELETE FROM postings WHERE term = ? AND doc_id = ?", removed)
+            self._conn.executemany("INSERT OR IGNORE INTO postings (term, doc_id) VALUES (?, ?)", added)
+        return len(batch)
+
+    def index_export_files(self, archive: str, channel: str, export_files: List[str]) -> int:
+        """Index the messages of an export from its JSON files, else its CSV files"""
+        for export_format in ('json', 'csv'):
+            files = [path for path in export_files
+                     if os.path.exists(path) and export_format_of(path) == export_format]
+            if files:
+                return sum(
+                    self.index_messages(archive, channel, iter_export_messages(path, export_format))
+                    for path in files
+                )
+        return 0
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Messages containing all terms of the query, most recently indexed first
+
+        Returns:
+            Channel, message ID, date, archive and a snippet per match
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        conditions = ''.join(
+            " AND EXISTS (SELECT 1 FROM postings q WHERE q.term = ? AND q.doc_id = p.doc_id)"
+            for _ in terms[1:]
+        )
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT m.channel, m.message_id, m.date, m.archive, m.text
+                FROM postings p JOIN messages m ON m.doc_id = p.doc_id
+                WHERE p.term = ?{conditions}
+                ORDER BY p.doc_id DESC
+                LIMIT ?
+            """, (*terms, limit)).fetchall()
+
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        return [
+            {
+                'channel': channel,
+                'message_id': message_id,
+                'date': date,
+                'archive': archive,
+                'snippet': self._snippet(text, pattern),
+            }
+            for channel, message_id, date, archive, text in rows
+        ]
+
+    def _snippet(self, text: str, pattern) -> str:
+        """Part of the text around the first match"""
+        match = pattern.search(text)
+        start = max(0, match.start() - self.SNIPPET_LENGTH // 3) if match else 0
+        end = start + self.SNIPPET_LENGTH
+        snippet = ' '.join(text[start:end].split())
+        if start > 0:
+            snippet = '…' + snippet
+        if end < len(text):
+            snippet += '…'
+        return snippet
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,199 @@
+"""
+User settings store for Telegram Channel Export Bot
+Keeps one SQLite row per user so a settings change writes only that user
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Columns in the order of the UserSettings fields
+SETTINGS_COLUMNS = (
+    'user_id', 'language', 'export_format', 'include_media', 'max_messages',
+    'export_fields', 'last_export', 'created_at', 'updated_at',
+)
+
+# Settings with per-value user counts, the day of the last export is bucketed
+COUNTED_SETTINGS = {
+    'language': '{row}.language',
+    'export_format': '{row}.export_format',
+    'include_media': '{row}.include_media',
+    'last_export_day': 'substr({row}.last_export, 1, 10)',
+}
+
+
+class SettingsStore:
+    """
+    SQLite store of user settings keyed by user ID
+
+    Rows are written in transactions in WAL mode, so a crash leaves either
+    the old or the new settings of a user, never a partly written file.
+    Indexes on the counted settings and on the last export time let
+    queries read only the matching users. Triggers keep the number of users
+    per value of each counted setting, so counts do not scan users at all.
+    """
+
+    _UPSERT = f"""
+        INSERT INTO users ({', '.join(SETTINGS_COLUMNS)})
+        VALUES ({', '.join('?' * len(SETTINGS_COLUMNS))})
+        ON CONFLICT (user_id) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in SETTINGS_COLUMNS[1:])}
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY,
+                    language TEXT NOT NULL,
+                    export_format TEXT NOT NULL,
+                    include_media INTEGER NOT NULL,
+                    max_messages INTEGER NOT NULL,
+                    export_fields TEXT,
+                    last_export TEXT,
+                    created_at TEXT,
+                    updated_at TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS setting_counts (
+                    setting TEXT NOT NULL,
+                    value,
+                    users INTEGER NOT NULL,
+                    PRIMARY KEY (setting, value)
+                )
+            """)
+            for column in ('language', 'export_format', 'include_media', 'last_export'):
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS users_{column} ON users ({column})")
+
+            for setting, expression in COUNTED_SETTINGS.items():
+                new, old = expression.format(row='NEW'), expression.format(row='OLD')
+                self._conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {setting}_counted AFTER INSERT ON users
+                    WHEN {new} IS NOT NULL BEGIN
+                        INSERT INTO setting_counts (setting, value, users) VALUES ('{setting}', {new}, 1)
+                        ON CONFLICT (setting, value) DO UPDATE SET users = users + 1;
+                    END
+                """)
+                self._conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {setting}_uncounted AFTER DELETE ON users
+                    WHEN {old} IS NOT NULL BEGIN
+                        UPDATE setting_counts SET users = users - 1 WHERE setting = '{setting}' AND value = {old};
+                    END
+                """)
+                self._conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {setting}_recounted AFTER UPDATE ON users
+                    WHEN {old} IS NOT {new} BEGIN
+                        UPDATE setting_counts SET users = users - 1 WHERE setting = '{setting}' AND value = {old};
+                        INSERT INTO setting_counts (setting, value, users)
+                        SELECT '{setting}', {new}, 1 WHERE {new} IS NOT NULL
+                        ON CONFLICT (setting, value) DO UPDATE SET users = users + 1;
+                    END
+                """)
+
+            # Stores written before users were counted
+            if not self._conn.execute("SELECT 1 FROM setting_counts LIMIT 1").fetchone():
+                for setting, expression in COUNTED_SETTINGS.items():
+                    value = expression.format(row='users')
+                    self._conn.execute(f"""
+                        INSERT INTO setting_counts (setting, value, users)
+                        SELECT ?, {value}, COUNT(*) FROM users WHERE {value} IS NOT NULL GROUP BY 2
+                    """, (setting,))
+
+    @staticmethod
+    def _to_row(settings: Dict[str, Any]) -> tuple:
+        fields = settings.get('export_fields')
+        values = dict(settings, include_media=int(bool(settings.get('include_media'))),
+                      export_fields=json.dumps(fields) if fields is not None else None)
+        return tuple(values.get(column) for column in SETTINGS_COLUMNS)
+
+    @staticmethod
+    def _from_row(row) -> Dict[str, Any]:
+        settings = dict(zip(SETTINGS_COLUMNS, row))
+        settings['include_media'] = bool(settings['include_media'])
+        if settings['export_fields'] is not None:
+            settings['export_fields'] = json.loads(settings['export_fields'])
+        return settings
+
+    def save(self, settings: Dict[str, Any]):
+        """Insert or replace the settings of one user"""
+        with self._lock, self._conn:
+            self._conn.execute(self._UPSERT, self._to_row(settings))
+
+    def save_many(self, settings_list: Iterable[Dict[str, Any]], deleted_user_ids: Iterable[int] = ()):
+        """Insert or replace the settings of several users and delete others in one transaction"""
+        rows = [self._to_row(settings) for settings in settings_list]
+        deleted = [(user_id,) for user_id in deleted_user_ids]
+        with self._lock, self._conn:
+            self._conn.executemany(self._UPSERT, rows)
+            self._conn.executemany("DELETE FROM users WHERE user_id = ?", deleted)
+
+    def load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(SETTINGS_COLUMNS)} FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def load_all(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(SETTINGS_COLUMNS)} FROM users").fetchall()
+        return (self._from_row(row) for row in rows)
+
+    def find_users(self, setting: str, value: Any) -> List[Dict[str, Any]]:
+        """Settings of users with a setting value, indexed for the counted settings"""
+        if setting not in SETTINGS_COLUMNS:
+            raise ValueError(f"Invalid setting name: {setting}")
+        value = self._to_row({setting: value})[SETTINGS_COLUMNS.index(setting)]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SETTINGS_COLUMNS)} FROM users WHERE {setting} IS ?", (value,)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def find_exported_users(self, since: str, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Settings of users whose last export is in [since, until), as ISO timestamps"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SETTINGS_COLUMNS)} FROM users "
+                "WHERE last_export >= ? AND (? IS NULL OR last_export < ?)",
+                (since, until, until)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def count_by(self, setting: str) -> Dict[Any, int]:
+        """Number of users per value of a counted setting, users without a value are left out"""
+        if setting not in COUNTED_SETTINGS:
+            raise ValueError(f"Setting is not counted: {setting}")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value, users FROM setting_counts WHERE setting = ? AND users > 0", (setting,)
+            ).fetchall()
+        if setting == 'include_media':
+            return {bool(value): users for value, users in rows}
+        return dict(rows)
+
+    def delete(self, user_id: int):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
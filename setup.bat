@@ -11,6 +11,14 @@ if errorlevel 1 (
     exit /b 1
 )
 
+py -c "import sys; sys.exit(sys.version_info < (3, 10))"
+if errorlevel 1 (
+    echo ERROR: Python 3.10 or higher is required
+    echo Please install Python 3.10 or higher from https://python.org
+    pause
+    exit /b 1
+)
+
 echo Python found, proceeding with setup...
 echo.
 
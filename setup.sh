@@ -6,7 +6,7 @@ echo
 # Check if Python is installed
 if ! command -v python3 &> /dev/null; then
     echo "❌ ERROR: Python 3 is not installed or not in PATH"
-    echo "Please install Python 3.8 or higher from https://python.org"
+    echo "Please install Python 3.10 or higher from https://python.org"
     exit 1
 fi
 
@@ -17,6 +17,12 @@ echo
 python_version=$(python3 -c 'import sys; print(".".join(map(str, sys.version_info[:2])))')
 echo "🐍 Python version: $python_version"
 
+if ! python3 -c 'import sys; sys.exit(sys.version_info < (3, 10))'; then
+    echo "❌ ERROR: Python 3.10 or higher is required, found $python_version"
+    echo "Please install Python 3.10 or higher from https://python.org"
+    exit 1
+fi
+
 # Install requirements
 echo "📦 Installing Python dependencies..."
 python3 -m pip install --upgrade pip
@@ -0,0 +1,109 @@
+"""
+Spill-to-disk message buffer for Telegram Channel Export Bot
+Keeps processed messages in memory until a size or RSS threshold, then moves them to a temp file
+"""
+import os
+import pickle
+import tempfile
+from typing import List, Iterator, Optional
+
+import psutil
+
+from message_record import MessageRecord, MESSAGE_FIELDS
+
+
+class SpillBuffer:
+    """
+    Append-only sequence of MessageRecord objects that can spill to disk
+
+    Records are kept in memory until max_messages records are buffered or
+    the process RSS exceeds max_rss_mb. From then on they are written to a
+    temporary file in batches of field tuples. Iteration yields all records
+    in insertion order, reading spilled batches back one at a time.
+    """
+
+    SPILL_BATCH_SIZE = 1000
+    # How often (in appended records) the process RSS is sampled
+    RSS_CHECK_EVERY = 1000
+
+    def __init__(self, max_messages: int = 20000, max_rss_mb: int = 0, spill_dir: Optional[str] = None):
+        self.max_messages = max_messages
+        self.max_rss_mb = max_rss_mb
+        self.spill_dir = spill_dir
+        self.spilled_count = 0
+        self._memory: List[MessageRecord] = []
+        self._count = 0
+        self._spill_file = None
+        self._spilling = False
+        self._process = psutil.Process() if max_rss_mb > 0 else None
+
+    def append(self, record: MessageRecord):
+        """Add a record, spilling buffered records to disk when a threshold is crossed"""
+        self._memory.append(record)
+        self._count += 1
+
+        if not self._spilling and self._threshold_crossed():
+            self._spilling = True
+
+        if self._spilling and len(self._memory) >= self.SPILL_BATCH_SIZE:
+            self._spill()
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def _threshold_crossed(self) -> bool:
+        if self.max_messages > 0 and len(self._memory) >= self.max_messages:
+            return True
+        if self._process is not None and self._count % self.RSS_CHECK_EVERY == 0:
+            return self._process.memory_info().rss >= self.max_rss_mb * 1024 * 1024
+        return False
+
+    def _spill(self):
+        if self._spill_file is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self._spill_file = tempfile.TemporaryFile(prefix='export_spill_', dir=self.spill_dir)
+
+        self._spill_file.seek(0, os.SEEK_END)
+        rows = [tuple(getattr(record, field) for field in MESSAGE_FIELDS) for record in self._memory]
+        pickle.dump(rows, self._spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spilled_count += len(rows)
+        self._memory = []
+
+    @property
+    def is_spilled(self) -> bool:
+        return self._spill_file is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[MessageRecord]:
+        if self._spill_file is not None:
+            # Track the read position ourselves so spills during iteration can't move it
+            position = 0
+            remaining = self.spilled_count
+            while remaining > 0:
+                self._spill_file.seek(position)
+                rows = pickle.load(self._spill_file)
+                position = self._spill_file.tell()
+                remaining -= len(rows)
+                for row in rows:
+                    yield MessageRecord(*row)
+
+        yield from list(self._memory)
+
+    def close(self):
+        """Delete the temporary spill file"""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._memory = []
+        self._count = 0
+        self.spilled_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,108 @@
+"""
+Test batch export of several channels
+Replaces the per-channel export with a fake that writes small archives
+"""
+import asyncio
+import os
+import tempfile
+import zipfile
+
+from bot import TelegramExportBot
+from config import export_config
+from exporters import ChannelExporter
+
+
+class FakeChannelExporter(ChannelExporter):
+    """Writes a one-file archive per channel and tracks running exports"""
+    def __init__(self, folder):
+        super().__init__()
+        self.folder = folder
+        self.running = 0
+        self.max_running = 0
+
+    async def export_channel(self, channel_username, export_format='json', include_media=False,
+                             max_messages=10000, progress_callback=None, date_from=None, date_to=None,
+                             fields=None, search=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await progress_callback("📡 Fetched 100 messages...")
+            await asyncio.sleep(0.01)
+            if channel_username == 'missing':
+                raise ValueError("No channel named missing")
+
+            archive_path = os.path.join(self.folder, f"{channel_username}_120000_json.zip")
+            with zipfile.ZipFile(archive_path, 'w') as zipf:
+                zipf.writestr(f"{channel_username}_20250101_120000.json", '{"messages": []}')
+                zipf.writestr("README.txt", "Export")
+            return archive_path
+        finally:
+            self.running -= 1
+
+
+def test_batch_export_combined():
+    """Test concurrency limit, combined archive layout and failure reporting"""
+    print("🧪 Testing batch export...")
+
+    channels = ['alpha', 'beta', 'missing', 'gamma', 'delta']
+    updates = []
+
+    async def progress(text):
+        updates.append(text)
+
+    with tempfile.TemporaryDirectory() as folder:
+        original = (export_config.export_folder, export_config.batch_concurrency)
+        export_config.export_folder = folder
+        export_config.batch_concurrency = 2
+        try:
+            exporter = FakeChannelExporter(folder)
+            exporter.zip_creator.export_folder = folder
+            result = asyncio.run(exporter.export_channels(channels, progress_callback=progress))
+        finally:
+            export_config.export_folder, export_config.batch_concurrency = original
+
+        assert exporter.max_running == 2
+        assert result['exported'] == ['alpha', 'beta', 'gamma', 'delta']
+        assert list(result['failed']) == ['missing']
+        assert len(result['archives']) == 1
+
+        with zipfile.ZipFile(result['archives'][0], 'r') as zipf:
+            names = zipf.namelist()
+            report = zipf.read("BATCH_REPORT.txt").decode('utf-8')
+
+        assert "alpha/alpha_20250101_120000.json" in names
+        assert "delta/README.txt" in names
+        assert "❌ @missing: No channel named missing" in report
+        # Per-channel archives are replaced by the combined one
+        assert sorted(os.listdir(folder)) == [os.path.basename(result['archives'][0])]
+
+    assert "5/5 finished, 1 failed" in updates[-2]
+
+    print("✅ Batch export: PASSED")
+
+
+def test_channel_list_detection():
+    """Test that only explicit @name and t.me lists start a batch export"""
+    print("🧪 Testing channel list detection...")
+
+    bot = object.__new__(TelegramExportBot)  # Parsing needs no bot state
+
+    assert bot._extract_channel_usernames("@first, https://t.me/second_chan; @First\n@third") == [
+        'first', 'second_chan', 'third'
+    ]
+    # Plain prose and bare names are not channel lists
+    assert bot._extract_channel_usernames("hello there friend") == []
+    assert bot._extract_channel_usernames("@first second") == []
+    # A single bare name still exports that channel
+    assert bot._extract_channel_usernames("durov") == []
+    assert bot._extract_channel_username("durov") == 'durov'
+    assert bot._extract_channel_username("hello there friend") == ''
+
+    print("✅ Channel list detection: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Batch Export Tests...\n")
+    test_batch_export_combined()
+    test_channel_list_detection()
+    print("\n🎉 All batch export tests passed!")
@@ -0,0 +1,116 @@
+"""
+Test channel info extraction from export headers
+Checks that only the header is read, for plain files and ZIP archive entries
+"""
+import os
+import tempfile
+import zipfile
+
+from utils import get_channel_info_from_export
+
+JSON_HEADER = '''{
+  "channel_info": {
+    "id": 123456789,
+    "title": "Test Channel",
+    "username": "testchannel",
+    "description": "News about {braces} and \\"quotes\\"",
+    "participants_count": 1500,
+    "export_date": "2025-01-01T12:00:00"
+  },
+  "messages": [
+    {"id": 2, "text": "Cut off'''
+
+MARKDOWN_EXPORT = """# Test Channel
+
+**Description:** News channel
+
+**Participants:** 1,500
+
+**Export Date:** 2025-01-01 12:00:00
+
+**Total Messages:** 2
+
+---
+
+## Message 2
+
+**Description:** not a header line
+
+"""
+
+
+def test_json_header_only():
+    """Test that a JSON export is read only up to the channel info"""
+    print("🧪 Testing JSON channel info...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        # The messages are truncated, a full parse would fail
+        path = os.path.join(folder, "testchannel_20250101_120000.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(JSON_HEADER)
+
+        info = get_channel_info_from_export(path)
+
+    assert info == {
+        'title': 'Test Channel',
+        'username': 'testchannel',
+        'description': 'News about {braces} and "quotes"',
+        'participants': 1500,
+        'export_date': '2025-01-01T12:00:00',
+    }
+
+    print("✅ JSON channel info: PASSED")
+
+
+def test_markdown_header_only():
+    """Test that Markdown lines after the first separator are ignored"""
+    print("🧪 Testing Markdown channel info...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "testchannel_20250101_120000.markdown")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(MARKDOWN_EXPORT)
+
+        info = get_channel_info_from_export(path)
+
+    assert info['title'] == 'Test Channel'
+    assert info['description'] == 'News channel'
+    assert info['participants'] == 1500
+    assert info['export_date'] == '2025-01-01 12:00:00'
+
+    print("✅ Markdown channel info: PASSED")
+
+
+def test_archive_entries():
+    """Test reading the channel info from entries of an export archive"""
+    print("🧪 Testing channel info from archives...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "testchannel_120000_json+markdown.zip")
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("README.txt", "Export")
+            zipf.writestr("testchannel_20250101_120000.json.index.json", '{"parts": []}')
+            zipf.writestr("testchannel_20250101_120000.markdown", MARKDOWN_EXPORT)
+            zipf.writestr("testchannel_20250101_120000.json", JSON_HEADER)
+
+        # JSON is preferred, it has the username
+        assert get_channel_info_from_export(path)['username'] == 'testchannel'
+
+        info = get_channel_info_from_export(path, entry="testchannel_20250101_120000.markdown")
+        assert info['username'] == 'Unknown'
+        assert info['participants'] == 1500
+
+        empty_path = os.path.join(folder, "empty.zip")
+        with zipfile.ZipFile(empty_path, 'w') as zipf:
+            zipf.writestr("README.txt", "Export")
+        assert get_channel_info_from_export(empty_path)['title'] == 'Unknown'
+
+    print("✅ Channel info from archives: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Channel Info Tests...\n")
+    test_json_header_only()
+    test_markdown_header_only()
+    test_archive_entries()
+    print("\n🎉 All channel info tests passed!")
@@ -0,0 +1,70 @@
+"""
+Test incremental backups of the export folder
+Checks hardlinking of unchanged files, copying of changed ones and the manifests
+"""
+import json
+import os
+import tempfile
+
+from utils import create_backup
+
+
+def write_file(path, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def read_manifest(snapshot_path):
+    with open(f"{snapshot_path}.manifest.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_incremental_backup():
+    """Test that only new and changed files are copied"""
+    print("🧪 Testing incremental backup...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "exports")
+        backups = os.path.join(folder, "backups")
+        write_file(os.path.join(source, "alpha_100000_json.zip"), b"a" * 5000)
+        write_file(os.path.join(source, "beta_110000_csv.zip"), b"b" * 3000)
+        write_file(os.path.join(source, "media", "photo_1.jpg"), b"p" * 100)
+
+        first = create_backup(source, backups, incremental=True)
+        assert read_manifest(first)['stats'] == {'linked': 0, 'copied': 3, 'copied_bytes': 8100}
+
+        # Unchanged files are hardlinked from the previous snapshot
+        second = create_backup(source, backups, incremental=True)
+        assert second != first
+        manifest = read_manifest(second)
+        assert manifest['stats'] == {'linked': 3, 'copied': 0, 'copied_bytes': 0}
+        assert manifest['previous_snapshot'] == os.path.abspath(first)
+        first_stat = os.stat(os.path.join(first, "alpha_100000_json.zip"))
+        second_stat = os.stat(os.path.join(second, "alpha_100000_json.zip"))
+        assert first_stat.st_ino == second_stat.st_ino
+        assert second_stat.st_nlink == 2
+
+        # A changed file is copied, a new file with known content is linked
+        write_file(os.path.join(source, "beta_110000_csv.zip"), b"c" * 3000)
+        write_file(os.path.join(source, "alpha_copy_json.zip"), b"a" * 5000)
+        os.remove(os.path.join(source, "media", "photo_1.jpg"))
+
+        third = create_backup(source, backups, incremental=True)
+        manifest = read_manifest(third)
+        assert manifest['stats'] == {'linked': 2, 'copied': 1, 'copied_bytes': 3000}
+        assert sorted(manifest['files']) == ["alpha_100000_json.zip", "alpha_copy_json.zip", "beta_110000_csv.zip"]
+        with open(os.path.join(third, "beta_110000_csv.zip"), 'rb') as f:
+            assert f.read() == b"c" * 3000
+        # Earlier snapshots keep their content
+        with open(os.path.join(second, "beta_110000_csv.zip"), 'rb') as f:
+            assert f.read() == b"b" * 3000
+        assert os.path.exists(os.path.join(second, "media", "photo_1.jpg"))
+
+    print("✅ Incremental backup: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Export Backup Tests...\n")
+    test_incremental_backup()
+    print("\n🎉 All export backup tests passed!")
@@ -0,0 +1,205 @@
+"""
+Test the export catalog
+Checks incremental statistics, user history and rebuilding from the export folder
+"""
+import os
+import sqlite3
+import tempfile
+import zipfile
+
+from export_catalog import ExportCatalog, parse_export_name
+from utils import get_export_statistics
+from zip_utils import ZipArchiveCreator
+
+
+def create_file(folder, name, size):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    return path
+
+
+def test_parse_export_name():
+    """Test channel and format detection from export file names"""
+    print("🧪 Testing export name parsing...")
+
+    assert parse_export_name("my_channel_120000_json.zip") == ('my_channel', 'json')
+    assert parse_export_name("news_120000_json+csv.part02.zip") == ('news', 'json+csv')
+    assert parse_export_name("news_120000_markdown+json.zip") == ('news', 'json+md')
+    assert parse_export_name("news_20250101_120000.md") == ('news', 'md')
+    assert parse_export_name("news_20250101_120000.markdown") == ('news', 'md')
+    assert parse_export_name("notes.txt") == (None, 'other')
+
+    print("✅ Export name parsing: PASSED")
+
+
+def test_catalog_stats_and_history():
+    """Test that statistics follow added and removed files like a folder scan"""
+    print("🧪 Testing export catalog statistics...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        catalog = ExportCatalog(os.path.join(folder, "data", "catalog.db"))
+        export_folder = os.path.join(folder, "exports")
+        os.makedirs(export_folder)
+
+        first = create_file(export_folder, "alpha_100000_json.zip", 1000)
+        second = create_file(export_folder, "beta_110000_csv.zip", 500)
+        third = create_file(export_folder, "alpha_120000_json.zip", 200)
+        for offset, path in enumerate((first, second, third)):
+            os.utime(path, (1700000000 + offset, 1700000000 + offset))
+        catalog.add(first, user_id=1, channel='alpha', export_format='json')
+        catalog.add(second, user_id=2, channel='beta', export_format='csv')
+        catalog.add(third, user_id=1, channel='alpha', export_format='json')
+        # Recording a file again replaces its entry
+        catalog.add(third, user_id=1, channel='alpha', export_format='json')
+
+        stats = get_export_statistics(export_folder, catalog=catalog)
+        assert stats['total_files'] == 3
+        assert stats['formats'] == {'json': 2, 'csv': 1, 'md': 0}
+        assert stats['total_size_mb'] == round(1700 / (1024 * 1024), 2)
+
+        os.remove(first)
+        catalog.remove([first])
+        stats = catalog.get_stats()
+        assert stats['total_files'] == 2
+        assert stats['formats']['json'] == 1
+
+        history = catalog.get_user_history(1)
+        assert [entry['filename'] for entry in history] == ["alpha_120000_json.zip", "alpha_100000_json.zip"]
+        removed = catalog.get_entry(first)
+        assert removed['removed_at'] is not None and removed['user_id'] == 1
+        catalog.close()
+
+    print("✅ Export catalog statistics: PASSED")
+
+
+def test_catalog_rebuild():
+    """Test that a rebuild matches the folder and keeps known users"""
+    print("🧪 Testing export catalog rebuild...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        catalog = ExportCatalog(os.path.join(folder, "catalog.db"))
+        export_folder = os.path.join(folder, "exports")
+        os.makedirs(os.path.join(export_folder, "media"))
+        create_file(os.path.join(export_folder, "media"), "photo_1.jpg", 10)
+
+        known = create_file(export_folder, "alpha_100000_json.zip", 300)
+        gone = create_file(export_folder, "beta_110000_csv.zip", 400)
+        catalog.add(known, user_id=7, channel='alpha', export_format='json')
+        catalog.add(gone, user_id=7, channel='beta', export_format='csv')
+
+        # Changed behind the catalog's back
+        os.remove(gone)
+        create_file(export_folder, "gamma_120000_md.zip", 100)
+        create_file(export_folder, "gamma_20250101_120000.md", 50)
+
+        result = catalog.rebuild(export_folder)
+        assert result == {'files': 3, 'added': 2, 'removed': 1}
+
+        stats = catalog.get_stats()
+        assert stats['total_files'] == 3
+        assert stats['formats'] == {'json': 1, 'csv': 0, 'md': 2}
+        assert stats['media_files'] == 1
+        assert catalog.get_entry(known)['user_id'] == 7
+        assert catalog.get_entry(gone)['removed_at'] is not None
+        catalog.close()
+
+    print("✅ Export catalog rebuild: PASSED")
+
+
+def test_catalog_volumes():
+    """Test that the volumes of a split archive count as one export"""
+    print("🧪 Testing export catalog volumes...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "catalog.db")
+        catalog = ExportCatalog(db_path)
+        export_folder = os.path.join(folder, "exports")
+        os.makedirs(export_folder)
+
+        archive_path = os.path.join(export_folder, "my_chan_120000_markdown.zip")
+        creator = ZipArchiveCreator(export_folder)
+        with zipfile.ZipFile(archive_path, 'w') as zipf:
+            for i in range(3):
+                zipf.writestr(f"media/file_{i}.bin", os.urandom(100 * 1024))
+        catalog.add(archive_path, user_id=5, channel='my_chan', export_format='markdown')
+        volumes, _ = creator.split_archive(archive_path, 200 * 1024)
+        assert len(volumes) == 3 and volumes[0].endswith("my_chan_120000_markdown.part01.zip")
+
+        # The bot removes the archive and records its volumes
+        os.remove(archive_path)
+        catalog.remove([archive_path])
+        for volume_path in volumes:
+            catalog.add(volume_path, user_id=5, channel='my_chan', export_format='markdown')
+
+        volume_bytes = sum(os.path.getsize(path) for path in volumes)
+        stats = catalog.get_stats()
+        assert stats['total_files'] == 1
+        assert stats['formats'] == {'json': 0, 'csv': 0, 'md': 1}
+        history = catalog.get_user_history(5)
+        assert len(history) == 1
+        assert history[0]['filename'] == "my_chan_120000_markdown.zip"
+        assert (history[0]['size'], history[0]['volumes'], history[0]['removed_at']) == (volume_bytes, 3, None)
+
+        # Still one export while only some volumes are left
+        os.remove(volumes[0])
+        catalog.remove(volumes[:1])
+        assert catalog.get_stats()['total_files'] == 1
+        assert catalog.get_user_history(5)[0]['removed_at'] is None
+
+        # A rebuild from the folder groups the volumes the same way
+        catalog.close()
+        os.remove(db_path)
+        catalog = ExportCatalog(db_path)
+        assert catalog.rebuild(export_folder) == {'files': 2, 'added': 2, 'removed': 0}
+        stats = catalog.get_stats()
+        assert stats['total_files'] == 1
+        assert stats['formats'] == {'json': 0, 'csv': 0, 'md': 1}
+        assert stats['total_size_mb'] == round(sum(os.path.getsize(path) for path in volumes[1:]) / (1024 * 1024), 2)
+        catalog.close()
+
+    print("✅ Export catalog volumes: PASSED")
+
+
+def test_catalog_migration():
+    """Test that entries recorded before volumes were grouped are migrated"""
+    print("🧪 Testing export catalog migration...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "catalog.db")
+        export_folder = os.path.join(folder, "exports")
+        os.makedirs(export_folder)
+        paths = [create_file(export_folder, f"news_120000_markdown.part0{i}.zip", 100) for i in (1, 2)]
+        paths.append(create_file(export_folder, "news_130000_json+csv.zip", 50))
+
+        # Catalog layout and triggers before export paths
+        with sqlite3.connect(db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE exports (path TEXT PRIMARY KEY, filename TEXT NOT NULL, user_id INTEGER,
+                    channel TEXT, format TEXT NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL,
+                    removed_at REAL);
+                CREATE TABLE totals (format TEXT PRIMARY KEY, files INTEGER NOT NULL, bytes INTEGER NOT NULL);
+            """)
+            conn.executemany("INSERT INTO exports VALUES (?, ?, 1, 'news', ?, 100, 1700000000, NULL)", [
+                (os.path.abspath(paths[0]), os.path.basename(paths[0]), 'markdown.part01'),
+                (os.path.abspath(paths[1]), os.path.basename(paths[1]), 'markdown'),
+                (os.path.abspath(paths[2]), os.path.basename(paths[2]), 'json+csv'),
+            ])
+
+        catalog = ExportCatalog(db_path)
+        stats = catalog.get_stats()
+        assert stats['total_files'] == 2
+        assert stats['formats'] == {'json': 0, 'csv': 0, 'md': 1, 'json+csv': 1}
+        catalog.close()
+
+    print("✅ Export catalog migration: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Export Catalog Tests...\n")
+    test_parse_export_name()
+    test_catalog_stats_and_history()
+    test_catalog_rebuild()
+    test_catalog_volumes()
+    test_catalog_migration()
+    print("\n🎉 All export catalog tests passed!")
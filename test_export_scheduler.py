@@ -0,0 +1,122 @@
+"""
+Test scheduled exports: run planning with jitter, persistence and deltas
+Uses a fake Telethon client for the delta export
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from export_scheduler import ScheduleManager
+from exporters import ChannelExporter
+
+
+class MockMessage:
+    """Mock message object for testing"""
+    def __init__(self, msg_id):
+        self.id = msg_id
+
+
+class FakeClient:
+    """Serves message IDs 1..newest_id like get_messages and iter_messages"""
+    def __init__(self, newest_id):
+        self.newest_id = newest_id
+
+    async def get_messages(self, channel, limit=None):
+        return [MockMessage(self.newest_id)] if self.newest_id else []
+
+    async def iter_messages(self, channel, limit=None, offset_date=None, search=None,
+                            min_id=0, max_id=0, reverse=False):
+        ids = range(min_id + 1, (max_id or self.newest_id + 1))
+        for msg_id in list(ids if reverse else reversed(ids))[:limit]:
+            yield MockMessage(msg_id)
+
+
+def test_schedule_planning_and_persistence():
+    """Test jittered run planning, startup spreading and reloading from disk"""
+    print("🧪 Testing schedule planning...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        schedules_file = os.path.join(folder, 'schedules.json')
+        manager = ScheduleManager(schedules_file, jitter_minutes=30, startup_spread_minutes=10)
+        now = datetime(2025, 1, 1, 12, 0)
+
+        schedule = manager.add_schedule(1, 100, 'testchannel', 24, export_format='json+csv')
+        next_runs = [manager.plan_next_run(schedule, now) for _ in range(200)]
+        assert all(now + timedelta(hours=24) <= run <= now + timedelta(hours=24, minutes=30) for run in next_runs)
+        # Runs don't all land on the same second
+        assert len({run.replace(microsecond=0) for run in next_runs}) > 100
+
+        # Short intervals get at most 10% jitter
+        hourly = manager.add_schedule(1, 100, 'otherchannel', 1, last_message_id=77)
+        assert hourly.last_message_id == 77
+        assert manager.plan_next_run(hourly, now) <= now + timedelta(minutes=66)
+
+        manager.record_run(schedule.schedule_id, 512, now=now)
+        assert manager.get_delay(schedule, now) >= 24 * 3600
+
+        # Overdue runs are spread over the startup window
+        delays = [manager.get_delay(schedule, now + timedelta(days=3)) for _ in range(50)]
+        assert all(0 <= delay <= 600 for delay in delays)
+
+        reloaded = ScheduleManager(schedules_file)
+        assert reloaded.get_schedule(schedule.schedule_id).last_message_id == 512
+        assert reloaded.get_schedule(schedule.schedule_id).export_format == 'json+csv'
+        assert [s.channel for s in reloaded.get_user_schedules(1)] == ['testchannel', 'otherchannel']
+
+        assert not reloaded.remove_schedule(2, schedule.schedule_id)
+        assert reloaded.remove_schedule(1, schedule.schedule_id)
+        assert ScheduleManager(schedules_file).get_schedule(schedule.schedule_id) is None
+
+    print("✅ Schedule planning: PASSED")
+
+
+def test_delta_export_range():
+    """Test that a delta export covers only messages after the previous run"""
+    print("🧪 Testing delta export range...")
+
+    calls = []
+
+    class RecordingExporter(ChannelExporter):
+        async def export_channel(self, channel_username, export_format='json', include_media=False,
+                                 max_messages=10000, progress_callback=None, date_from=None, date_to=None,
+                                 fields=None, search=None, min_id=0, max_id=0, reverse=False,
+                                 message_callback=None):
+            exported = []
+            async for message in self._fetch_messages(self.client, channel_username, max_messages,
+                                                      min_id=min_id, max_id=max_id, reverse=reverse):
+                exported.append(message.id)
+                message_callback(message)
+            calls.append(exported)
+            return "archive.zip"
+
+    exporter = RecordingExporter()
+    exporter.client = FakeClient(150)
+
+    assert asyncio.run(exporter.export_channel_delta('testchannel', 120)) == ("archive.zip", 150)
+    assert calls == [list(range(121, 151))]
+
+    # Nothing new since the previous run
+    assert asyncio.run(exporter.export_channel_delta('testchannel', 150)) == (None, 150)
+    assert len(calls) == 1
+
+    # A gap larger than max_messages is exported oldest first over several runs
+    exporter.client = FakeClient(175)
+    cursor = 150
+    calls.clear()
+    while True:
+        archive_path, cursor = asyncio.run(exporter.export_channel_delta('testchannel', cursor, max_messages=10))
+        if archive_path is None:
+            break
+    assert [len(exported) for exported in calls] == [10, 10, 5]
+    assert [msg_id for exported in calls for msg_id in exported] == list(range(151, 176))
+    assert cursor == 175
+
+    print("✅ Delta export range: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Scheduled Export Tests...\n")
+    test_schedule_planning_and_persistence()
+    test_delta_export_range()
+    print("\n🎉 All scheduled export tests passed!")
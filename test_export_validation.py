@@ -0,0 +1,149 @@
+"""
+Test streaming validation of export files
+Checks the incremental JSON reader, CSV and Markdown counting and ZIP archives
+"""
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+import export_reader
+from export_reader import JsonObjectReader, count_json_messages, count_markdown_messages
+from utils import validate_export_file
+
+
+def create_json_export(count: int) -> str:
+    messages = [
+        {'id': i, 'text': f'Message {i} with "quotes", {{braces}} [brackets] and ü \\ ✓', 'views': i * 1.5}
+        for i in range(count, 0, -1)
+    ]
+    return json.dumps({
+        'channel_info': {'id': 1, 'title': 'Test Channel', 'username': 'testchannel'},
+        'messages': messages,
+        'total_messages': count,
+    }, indent=2, ensure_ascii=False)
+
+
+def test_json_reader_chunk_boundaries():
+    """Test that values split across tiny chunks are decoded exactly"""
+    print("🧪 Testing incremental JSON reader...")
+
+    document = create_json_export(25)
+    expected = json.loads(document)
+
+    for chunk_size in (1, 7, 64):
+        reader = JsonObjectReader(io.StringIO(document), chunk_size=chunk_size)
+        decoded = {}
+        for key, value in reader.members(streamed=('messages',)):
+            decoded[key] = list(value) if key == 'messages' else value
+        reader.finish()
+        assert decoded == expected
+
+    # Unread elements are skipped when the next member is requested
+    reader = JsonObjectReader(io.StringIO(document), chunk_size=5)
+    assert [key for key, _ in reader.members(streamed=('messages',))] == \
+        ['channel_info', 'messages', 'total_messages']
+
+    print("✅ Incremental JSON reader: PASSED")
+
+
+def test_invalid_json_exports():
+    """Test that broken JSON exports are rejected"""
+    print("🧪 Testing invalid JSON detection...")
+
+    document = create_json_export(3)
+    broken = {
+        'truncated': document[:len(document) // 2],
+        'no messages': json.dumps({'channel_info': {}}),
+        'messages not a list': json.dumps({'messages': {'id': 1}}),
+        'extra data': document + '{}',
+        'not an object': '[1, 2]',
+    }
+    for name, text in broken.items():
+        try:
+            count_json_messages(io.StringIO(text))
+        except ValueError:
+            continue
+        raise AssertionError(f"{name} was accepted")
+
+    print("✅ Invalid JSON detection: PASSED")
+
+
+def test_validate_files():
+    """Test validation of plain JSON, CSV and Markdown exports"""
+    print("🧪 Testing export file validation...")
+
+    original_chunk_size = export_reader.READ_CHUNK_SIZE
+    export_reader.READ_CHUNK_SIZE = 16
+    try:
+        assert count_markdown_messages(io.StringIO("## Message 1\n\ntext\n\n## Message 2\n" * 10)) == 20
+    finally:
+        export_reader.READ_CHUNK_SIZE = original_chunk_size
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "test_20250101_120000.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            f.write(create_json_export(40))
+
+        csv_path = os.path.join(folder, "test_20250101_120000.csv")
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            f.write('id,text\n1,"two\nlines"\n2,plain\n')
+
+        md_path = os.path.join(folder, "test_20250101_120000.markdown")
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write("# Test\n\n---\n\n## Message 2\n\nb\n\n## Message 1\n\na\n")
+
+        json_result = validate_export_file(json_path)
+        assert json_result['valid'] and json_result['message_count'] == 40
+
+        csv_result = validate_export_file(csv_path)
+        assert csv_result['valid'] and csv_result['message_count'] == 2
+
+        md_result = validate_export_file(md_path)
+        assert md_result['valid'] and md_result['message_count'] == 2
+
+    print("✅ Export file validation: PASSED")
+
+
+def test_validate_archive():
+    """Test validation of the exports inside a ZIP archive"""
+    print("🧪 Testing archive validation...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        archive_path = os.path.join(folder, "test_120000_json+csv.zip")
+        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("test_20250101_120000.part0001.json", create_json_export(30))
+            zipf.writestr("test_20250101_120000.part0002.json", create_json_export(20))
+            zipf.writestr("test_20250101_120000.json.index.json", json.dumps({'parts': []}))
+            zipf.writestr("test_20250101_120000.csv", "id\n" + "\n".join(str(i) for i in range(50)) + "\n")
+            zipf.writestr("media/file_1.json", "not an export")
+            zipf.writestr("README.txt", "Export")
+
+        result = validate_export_file(archive_path)
+        assert result['valid'], result['error']
+        assert result['message_count'] == 50
+        assert [entry['name'] for entry in result['entries']] == [
+            "test_20250101_120000.part0001.json",
+            "test_20250101_120000.part0002.json",
+            "test_20250101_120000.csv",
+        ]
+
+        broken_path = os.path.join(folder, "broken_120000_json.zip")
+        with zipfile.ZipFile(broken_path, 'w') as zipf:
+            zipf.writestr("broken_20250101_120000.json", create_json_export(5)[:-40])
+
+        result = validate_export_file(broken_path)
+        assert not result['valid']
+        assert result['error'].startswith("broken_20250101_120000.json: ")
+
+    print("✅ Archive validation: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Export Validation Tests...\n")
+    test_json_reader_chunk_boundaries()
+    test_invalid_json_exports()
+    test_validate_files()
+    test_validate_archive()
+    print("\n🎉 All export validation tests passed!")
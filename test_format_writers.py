@@ -0,0 +1,371 @@
+"""
+Test incremental format writers and multi-format export
+Writes several formats from one pass without Telegram API calls
+"""
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+import format_writers
+from config import export_config
+from format_writers import (
+    FORMAT_WRITERS, MARKDOWN_MAX_PROCESSES, RENDER_CHUNK_SIZE, MarkdownExportWriter, create_export_writer,
+    get_markdown_processes, parse_export_formats, shutdown_executors, write_export_files
+)
+from message_record import MessageRecord
+
+
+class MockChannel:
+    """Mock channel object for testing"""
+    def __init__(self):
+        self.id = 123456789
+        self.title = "Test Channel"
+        self.username = "testchannel"
+        self.about = "This is a test channel"
+        self.participants_count = 1000
+
+
+def create_test_messages(count: int):
+    """Create records with a mix of text and media"""
+    base_date = datetime(2025, 1, 1, 12, 0)
+    messages = []
+    for i in range(count):
+        record = MessageRecord(id=i + 1, date=base_date.isoformat(), text=f"Message, \"{i}\"", views=i * 10)
+        if i % 2:
+            record.media_type = 'photo'
+            record.file_size = 1024 * 1024
+        messages.append(record)
+    return messages
+
+
+def test_parse_export_formats():
+    """Test normalization of single and combined format settings"""
+    print("🧪 Testing format parsing...")
+
+    assert parse_export_formats('json') == ['json']
+    assert parse_export_formats('markdown+json') == ['json', 'markdown']
+    assert parse_export_formats({'csv', 'json', 'markdown'}) == ['json', 'csv', 'markdown']
+
+    try:
+        parse_export_formats('json+xml')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unsupported format was accepted")
+
+    print("✅ Format parsing: PASSED")
+
+
+def test_multi_format_single_pass():
+    """Test that one iteration over the messages produces every format"""
+    print("🧪 Testing multi-format export...")
+
+    messages = create_test_messages(1203)
+    iterations = 0
+
+    def message_stream():
+        nonlocal iterations
+        iterations += 1
+        yield from messages
+
+    with tempfile.TemporaryDirectory() as folder:
+        writers = [
+            FORMAT_WRITERS[fmt](os.path.join(folder, f"testchannel.{fmt}"), MockChannel(), len(messages))
+            for fmt in parse_export_formats('json+csv+markdown')
+        ]
+        asyncio.run(write_export_files(message_stream(), writers))
+
+        assert iterations == 1
+
+        with open(writers[0].filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert data['total_messages'] == len(messages)
+        assert data['messages'][1] == messages[1].to_dict()
+
+        with open(writers[1].filepath, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == len(messages)
+        assert rows[0]['text'] == messages[0].text
+
+        with open(writers[2].filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert content.count('## Message') == len(messages)
+        assert f"**Total Messages:** {len(messages)}" in content
+
+    print("✅ Multi-format export: PASSED")
+
+
+def test_rendering_off_event_loop():
+    """Test that messages are rendered in chunks on the render pool"""
+    print("🧪 Testing off-loop rendering...")
+
+    messages = create_test_messages(RENDER_CHUNK_SIZE * 2 + 1)
+    render_threads = set()
+    ticks = 0
+
+    class RecordingWriter(MarkdownExportWriter):
+        def render_messages(self, chunk):
+            render_threads.add(threading.current_thread().name)
+            return super().render_messages(chunk)
+
+    async def ticker(done: asyncio.Event):
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0)
+
+    async def run(writer):
+        done = asyncio.Event()
+        tick_task = asyncio.create_task(ticker(done))
+        await write_export_files(messages, [writer])
+        done.set()
+        await tick_task
+
+    with tempfile.TemporaryDirectory() as folder:
+        writer = RecordingWriter(os.path.join(folder, "testchannel.markdown"), MockChannel(), len(messages))
+        asyncio.run(run(writer))
+
+        with open(writer.filepath, 'r', encoding='utf-8') as f:
+            assert f.read().count('## Message') == len(messages)
+
+    assert writer.written == len(messages)
+    assert render_threads and all(name.startswith('export-render') for name in render_threads)
+    # The loop kept serving other tasks while chunks were rendered
+    assert ticks > 3
+
+    print("✅ Off-loop rendering: PASSED")
+
+
+def render_baseline_markdown(message: dict) -> str:
+    """Per-message Markdown of the original _export_to_markdown, kept as the reference output"""
+    parts = []
+    date_str = datetime.fromisoformat(message['date'].replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
+    parts.append(f"## Message {message['id']}\n\n")
+    parts.append(f"**Date:** {date_str}\n\n")
+
+    if message['sender_id']:
+        parts.append(f"**Sender ID:** {message['sender_id']}\n\n")
+
+    if message['text']:
+        text = message['text']
+        text = text.replace('*', '\\*').replace('_', '\\_').replace('`', '\\`')
+        parts.append(f"{text}\n\n")
+
+    if message['media_type']:
+        parts.append(f"**Media Type:** {message['media_type'].title()}\n\n")
+
+        if message['media_file']:
+            parts.append(f"**Media File:** `{message['media_file']}`\n\n")
+
+        if message['file_size']:
+            size_mb = message['file_size'] / (1024 * 1024)
+            parts.append(f"**File Size:** {size_mb:.2f} MB\n\n")
+
+        if message['duration']:
+            duration_total = int(float(message['duration']))
+            duration_min = duration_total // 60
+            duration_sec = duration_total % 60
+            parts.append(f"**Duration:** {duration_min}:{duration_sec:02d}\n\n")
+
+    stats = []
+    if message['views']:
+        stats.append(f"👁 {message['views']:,} views")
+    if message['forwards']:
+        stats.append(f"📤 {message['forwards']:,} forwards")
+    if message['replies']:
+        stats.append(f"💬 {message['replies']:,} replies")
+
+    if stats:
+        parts.append(f"**Stats:** {' | '.join(stats)}\n\n")
+
+    if message['edit_date']:
+        edit_date = datetime.fromisoformat(message['edit_date'].replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
+        parts.append(f"**Edited:** {edit_date}\n\n")
+
+    parts.append("---\n\n")
+    return ''.join(parts)
+
+
+def test_parallel_markdown_matches_serial():
+    """Test that process pool rendering produces the same Markdown as serial rendering"""
+    print("🧪 Testing parallel Markdown rendering...")
+
+    messages = create_test_messages(RENDER_CHUNK_SIZE * 3 + 7)
+    messages[3].text = "Bold *text* with_underscores and `code`"
+    messages[3].edit_date = "2025-01-02T08:30:00+00:00"
+    messages[5].duration = 125.7
+    messages[5].media_type = 'video'
+    messages[6].date = "2025-01-01T12:00Z"
+    messages[7].date = "2025-01-01T12:00:00.123456+03:00"
+    messages[8].date = "2025-01-01T23:59:59Z"
+    messages[8].edit_date = "2025-01-03T10:15:30.500Z"
+    messages[9].sender_id = 42
+    messages[9].forwards = 1234
+    messages[9].replies = 5
+    messages[9].media_type = 'document'
+    messages[9].media_file = "report_1.pdf"
+    messages[9].duration = 59.99
+
+    class ParallelMarkdownWriter(MarkdownExportWriter):
+        PARALLEL_THRESHOLD = 0
+
+    original_processes = export_config.markdown_processes
+    export_config.markdown_processes = 2  # Use the process pool even on one CPU
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            outputs = []
+            for writer_class in (MarkdownExportWriter, ParallelMarkdownWriter):
+                writer = writer_class(os.path.join(folder, f"{writer_class.__name__}.markdown"), MockChannel(),
+                                      len(messages))
+                asyncio.run(write_export_files(messages, [writer]))
+                with open(writer.filepath, 'r', encoding='utf-8') as f:
+                    outputs.append(f.read().split('---\n\n', 1)[1])
+        assert format_writers._markdown_executor is not None
+    finally:
+        export_config.markdown_processes = original_processes
+        shutdown_executors()
+    assert format_writers._markdown_executor is None
+
+    assert outputs[0] == outputs[1]
+    # Both match the output of the original per-message formatting
+    assert outputs[1] == ''.join(render_baseline_markdown(message.to_dict()) for message in messages)
+    assert "Bold \\*text\\* with\\_underscores and \\`code\\`" in outputs[1]
+    assert "**Edited:** 2025-01-02 08:30:00" in outputs[1]
+    assert "**Duration:** 2:05" in outputs[1]
+    assert "**Date:** 2025-01-01 12:00:00" in outputs[1]
+
+    print("✅ Parallel Markdown rendering: PASSED")
+
+
+def test_markdown_process_count():
+    """Test that the Markdown pool follows the setting and is capped by default"""
+    print("🧪 Testing Markdown process count...")
+
+    original_processes = export_config.markdown_processes
+    original_cpus = format_writers.available_cpus
+    try:
+        export_config.markdown_processes = 0
+        format_writers.available_cpus = lambda: 64
+        assert get_markdown_processes() == MARKDOWN_MAX_PROCESSES
+        format_writers.available_cpus = lambda: 1
+        assert get_markdown_processes() == 1
+
+        # One process renders on threads without starting the pool
+        with tempfile.TemporaryDirectory() as folder:
+            writer = MarkdownExportWriter(os.path.join(folder, "serial.markdown"), MockChannel(),
+                                          MarkdownExportWriter.PARALLEL_THRESHOLD)
+            asyncio.run(write_export_files(create_test_messages(10), [writer]))
+        assert format_writers._markdown_executor is None
+
+        export_config.markdown_processes = 3
+        assert get_markdown_processes() == 3
+    finally:
+        export_config.markdown_processes = original_processes
+        format_writers.available_cpus = original_cpus
+
+    assert format_writers.available_cpus() >= 1
+
+    print("✅ Markdown process count: PASSED")
+
+
+def test_sharded_export():
+    """Test splitting an export into part files by message count and by size"""
+    print("🧪 Testing sharded export...")
+
+    messages = create_test_messages(1203)
+
+    with tempfile.TemporaryDirectory() as folder:
+        writer = create_export_writer('json', os.path.join(folder, "testchannel_20250101_120000.json"),
+                                      MockChannel(), len(messages), max_messages=500)
+        asyncio.run(write_export_files(messages, [writer]))
+
+        with open(writer.index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        assert [part['messages'] for part in index['parts']] == [500, 500, 203]
+        assert index['parts'][0]['file'] == "testchannel_20250101_120000.part0001.json"
+        assert index['parts'][1]['id_from'] == 501 and index['parts'][1]['id_to'] == 1000
+        assert index['total_messages'] == len(messages)
+
+        exported = []
+        for path in writer.output_files[1:]:
+            with open(path, 'r', encoding='utf-8') as f:
+                part = json.load(f)
+            assert part['total_messages'] == len(part['messages'])
+            exported.extend(part['messages'])
+        assert exported == [message.to_dict() for message in messages]
+
+        writer = create_export_writer('csv', os.path.join(folder, "testchannel_20250101_120000.csv"),
+                                      MockChannel(), len(messages), max_bytes=20 * 1024)
+        asyncio.run(write_export_files(messages, [writer]))
+
+        rows = []
+        for path in writer.output_files[1:]:
+            assert os.path.getsize(path) < 40 * 1024
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                rows.extend(csv.DictReader(f))
+        assert len(writer.parts) > 1
+        assert [row['id'] for row in rows] == [str(message.id) for message in messages]
+
+        writer = create_export_writer('markdown', os.path.join(folder, "testchannel_20250101_120000.markdown"),
+                                      MockChannel(), len(messages), ["photo_1.jpg"], max_messages=500)
+        asyncio.run(write_export_files(messages, [writer]))
+
+        for number, path in enumerate(writer.output_files[1:], 1):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            assert f"**Part:** {number} (see testchannel_20250101_120000.markdown.index.json" in content
+            assert "**Total Messages:**" not in content
+            assert "**Media Files:**" not in content
+            assert content.count("## Message ") == writer.parts[number - 1]['messages']
+
+    print("✅ Sharded export: PASSED")
+
+
+def test_field_projection():
+    """Test that writers only output the selected fields"""
+    print("🧪 Testing field projection...")
+
+    messages = create_test_messages(20)
+    fields = ['id', 'date', 'text']
+
+    with tempfile.TemporaryDirectory() as folder:
+        writers = [
+            create_export_writer(fmt, os.path.join(folder, f"testchannel.{fmt}"), MockChannel(), len(messages),
+                                 fields=fields)
+            for fmt in parse_export_formats('json+csv+markdown')
+        ]
+        asyncio.run(write_export_files(messages, writers))
+
+        with open(writers[0].filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert data['messages'][1] == {'id': 2, 'date': messages[1].date, 'text': messages[1].text}
+
+        with open(writers[1].filepath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+        assert reader.fieldnames == fields
+        assert rows[0]['text'] == messages[0].text
+
+        with open(writers[2].filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert content.count('## Message') == len(messages)
+        assert '**Stats:**' not in content and '**Media Type:**' not in content
+
+    print("✅ Field projection: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Format Writer Tests...\n")
+    test_parse_export_formats()
+    test_multi_format_single_pass()
+    test_rendering_off_event_loop()
+    test_parallel_markdown_matches_serial()
+    test_markdown_process_count()
+    test_sharded_export()
+    test_field_projection()
+    print("\n🎉 All format writer tests passed!")
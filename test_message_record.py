@@ -0,0 +1,88 @@
+"""
+Test the slotted MessageRecord used for processed messages
+Checks that format writers see the same data as with dict messages
+"""
+import json
+from datetime import datetime
+
+from message_record import MessageRecord, MESSAGE_FIELDS, parse_export_fields, record_to_json
+
+
+def create_test_record():
+    """Create a record with media fields set"""
+    record = MessageRecord(
+        id=7,
+        date=datetime(2025, 1, 1, 12, 0).isoformat(),
+        text="Message with photo",
+        views=200,
+        forwards=3,
+    )
+    record.media_type = 'photo'
+    record.file_size = 1024000
+    return record
+
+
+def test_mapping_access():
+    """Test dict-style access used by the CSV and Markdown writers"""
+    print("🧪 Testing MessageRecord mapping access...")
+
+    record = create_test_record()
+
+    assert record['id'] == 7
+    assert record.get('media_type') == 'photo'
+    assert record.get('missing', '') == ''
+    assert list(record.keys()) == list(MESSAGE_FIELDS)
+    assert not hasattr(record, '__dict__')
+
+    try:
+        record['missing']
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("Unknown field did not raise KeyError")
+
+    print("✅ Mapping access: PASSED")
+
+
+def test_json_serialization():
+    """Test that records serialize exactly like the equivalent dicts"""
+    print("🧪 Testing MessageRecord JSON serialization...")
+
+    record = create_test_record()
+    as_dict = record.to_dict()
+
+    record_json = json.dumps({'messages': [record]}, indent=2, ensure_ascii=False, default=record_to_json)
+    dict_json = json.dumps({'messages': [as_dict]}, indent=2, ensure_ascii=False)
+
+    assert record_json == dict_json
+    assert MessageRecord.from_dict(as_dict) == record
+    print("✅ JSON serialization: PASSED")
+
+
+def test_parse_export_fields():
+    """Test normalization of field selections"""
+    print("🧪 Testing export field parsing...")
+
+    assert parse_export_fields(None) is MESSAGE_FIELDS
+    assert parse_export_fields('all') is MESSAGE_FIELDS
+    assert parse_export_fields('basic') == ('id', 'date', 'text')
+    # Required fields are added and the export column order is kept
+    assert parse_export_fields('views, text') == ('id', 'date', 'text', 'views')
+    assert parse_export_fields(['duration', 'id']) == ('id', 'date', 'duration')
+
+    try:
+        parse_export_fields('id,author')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unknown field was accepted")
+
+    print("✅ Export field parsing: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting MessageRecord Tests...\n")
+    test_mapping_access()
+    test_json_serialization()
+    test_parse_export_fields()
+    print("\n🎉 All MessageRecord tests passed!")
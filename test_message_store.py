@@ -0,0 +1,253 @@
+"""
+Test the local message store and delta top-up of ChannelExporter
+Uses a fake Telethon client that counts fetched messages
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from exporters import ChannelExporter
+from message_store import MessageStore
+
+
+class MockChannel:
+    """Mock channel object for testing"""
+    def __init__(self):
+        self.id = 123456789
+        self.title = "Test Channel"
+        self.username = "testchannel"
+
+
+class MockMessage:
+    """Mock message object for testing"""
+    def __init__(self, msg_id, date):
+        self.id = msg_id
+        self.text = f"Message {msg_id}"
+        self.date = date
+        self.from_id = None
+        self.views = 100
+        self.forwards = 10
+        self.replies = None
+        self.edit_date = None
+        self.media = None
+
+
+class FakeClient:
+    """Serves channel history newest first like iter_messages"""
+    def __init__(self, count):
+        self.base_date = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.messages = []
+        self.deleted = set()
+        self.fetched = 0
+        self.add_messages(count)
+
+    def add_messages(self, count):
+        start = len(self.messages) + 1
+        for msg_id in range(start, start + count):
+            self.messages.append(MockMessage(msg_id, self.base_date + timedelta(hours=msg_id)))
+
+    async def get_messages(self, channel, limit=None):
+        return [message for message in reversed(self.messages) if message.id not in self.deleted][:limit]
+
+    async def iter_messages(self, channel, limit=None, min_id=0, max_id=0, offset_id=0, offset_date=None,
+                            reverse=False):
+        returned = 0
+        for message in (self.messages if reverse else reversed(self.messages)):
+            if message.id in self.deleted:
+                continue
+            if message.id <= min_id or (offset_id and message.id >= offset_id) or (max_id and message.id >= max_id):
+                continue
+            if limit is not None and returned >= limit:
+                return
+            returned += 1
+            self.fetched += 1
+            yield message
+
+
+def run_export(exporter, client, store, max_messages, date_from=None):
+    return asyncio.run(exporter._load_from_store(
+        client, MockChannel(), store, max_messages, date_from, None, None
+    ))
+
+
+def test_delta_top_up():
+    """Test that repeated exports only fetch messages missing from the store"""
+    print("🧪 Testing message store delta top-up...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = MessageStore(os.path.join(folder, 'messages.db'))
+        exporter = ChannelExporter()
+        client = FakeClient(50)
+
+        records = run_export(exporter, client, store, 20)
+        assert [r.id for r in records] == list(range(50, 30, -1))
+        assert client.fetched == 20
+
+        # Two new posts: only they are fetched
+        client.add_messages(2)
+        client.fetched = 0
+        records = run_export(exporter, client, store, 20)
+        assert [r.id for r in records] == list(range(52, 32, -1))
+        assert client.fetched == 2
+
+        # A larger limit backfills only the missing older history
+        client.fetched = 0
+        records = run_export(exporter, client, store, 30)
+        assert len(records) == 30
+        assert client.fetched == 8
+
+        # No limit reads the rest once, then everything is local
+        run_export(exporter, client, store, 0)
+        client.fetched = 0
+        records = run_export(exporter, client, store, 0)
+        assert len(records) == 52
+        assert client.fetched == 0
+        assert store.get_coverage(MockChannel().id)['complete']
+
+        # Date range queries are served from the store
+        date_from = client.base_date + timedelta(hours=45)
+        records = run_export(exporter, client, store, 0, date_from)
+        assert [r.id for r in records] == list(range(52, 44, -1))
+        assert client.fetched == 0
+
+        store.close()
+
+    print("✅ Message store delta top-up: PASSED")
+
+
+def test_store_saved_page_by_page():
+    """Test that fetched history is written to the store in pages, not collected first"""
+    print("🧪 Testing paged store writes...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = MessageStore(os.path.join(folder, 'messages.db'))
+        exporter = ChannelExporter()
+        exporter.STORE_PAGE_SIZE = 10
+        client = FakeClient(45)
+        channel = MockChannel()
+
+        saved = []
+        save_messages = store.save_messages
+
+        def record_save(channel_id, records, low_id, high_id, complete):
+            saved.append((len(records), low_id, high_id, complete))
+            save_messages(channel_id, records, low_id, high_id, complete)
+
+        store.save_messages = record_save
+
+        # First export: the backfill is saved every page, complete only at the end
+        records = run_export(exporter, client, store, 0)
+        assert len(records) == 45
+        assert saved == [(10, 36, 45, False), (10, 26, 45, False), (10, 16, 45, False),
+                         (10, 6, 45, False), (5, 1, 45, True)]
+
+        # Top-up oldest first, every page extends the stored range upwards
+        saved.clear()
+        client.add_messages(25)
+        records = run_export(exporter, client, store, 0)
+        assert len(records) == 70
+        assert saved == [(10, 1, 55, True), (10, 1, 65, True), (5, 1, 70, True)]
+
+        # A gap larger than the limit starts a new range below the newest message
+        saved.clear()
+        client.add_messages(30)
+        records = run_export(exporter, client, store, 20)
+        assert [r.id for r in records] == list(range(100, 80, -1))
+        assert saved == [(10, 91, 100, False), (10, 81, 100, False)]
+        coverage = store.get_coverage(channel.id)
+        assert (coverage['low_id'], coverage['high_id'], coverage['complete']) == (81, 100, False)
+
+        store.close()
+
+    print("✅ Paged store writes: PASSED")
+
+
+def test_reconcile_edits_and_deletions():
+    """Test that only ranges with edits or deletions are rewritten"""
+    print("🧪 Testing edit and deletion reconciliation...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = MessageStore(os.path.join(folder, 'messages.db'))
+        exporter = ChannelExporter()
+        client = FakeClient(450)
+        channel = MockChannel()
+
+        run_export(exporter, client, store, 0)
+
+        # One edit in range 1 (100-199), one deletion in range 3 (300-399), range 4 untouched
+        client.messages[149].text = "Edited text"
+        client.messages[149].edit_date = client.base_date + timedelta(days=30)
+        client.deleted.add(320)
+
+        coverage = store.get_coverage(channel.id)
+        stats = asyncio.run(exporter._reconcile_store(client, channel, store, coverage, 0, None))
+
+        assert stats['checked_ranges'] == 5
+        assert stats['changed_ranges'] == 2
+        assert stats['refreshed_messages'] == 199
+
+        records = {r.id: r for r in store.get_messages(channel.id)}
+        assert records[150].text == "Edited text"
+        assert records[150].edit_date is not None
+        assert 320 not in records
+        assert len(records) == 449
+
+        # Nothing changed since: a second pass rewrites nothing
+        stats = asyncio.run(exporter._reconcile_store(client, channel, store, coverage, 0, None))
+        assert stats['changed_ranges'] == 0
+
+        store.close()
+
+    print("✅ Edit and deletion reconciliation: PASSED")
+
+
+def test_reconcile_records_checked_range():
+    """Test that a limited check leaves older history to be checked by a larger export"""
+    print("🧪 Testing reconciled ID range...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = MessageStore(os.path.join(folder, 'messages.db'))
+        exporter = ChannelExporter()
+        client = FakeClient(450)
+        channel = MockChannel()
+
+        run_export(exporter, client, store, 0)
+        assert store.get_coverage(channel.id)['reconciled_low_id'] == 1
+
+        # The newest 150 messages end inside range 3, so only range 4 counts as checked
+        coverage = store.get_coverage(channel.id)
+        asyncio.run(exporter._reconcile_store(client, channel, store, coverage, 150, None))
+        assert store.get_coverage(channel.id)['reconciled_low_id'] == 400
+
+        client.messages[149].text = "Edited text"
+        client.messages[149].edit_date = client.base_date + timedelta(days=30)
+
+        # A small export stays inside the checked range and scans nothing
+        client.fetched = 0
+        run_export(exporter, client, store, 20)
+        assert client.fetched == 0
+
+        # A full export checks the older part and picks up the edit
+        records = {r.id: r for r in run_export(exporter, client, store, 0)}
+        assert records[150].text == "Edited text"
+        assert client.fetched == 399
+        assert store.get_coverage(channel.id)['reconciled_low_id'] == 1
+
+        # Now everything is checked, nothing is scanned again
+        client.fetched = 0
+        run_export(exporter, client, store, 0)
+        assert client.fetched == 0
+
+        store.close()
+
+    print("✅ Reconciled ID range: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Message Store Tests...\n")
+    test_delta_top_up()
+    test_store_saved_page_by_page()
+    test_reconcile_edits_and_deletions()
+    test_reconcile_records_checked_range()
+    print("\n🎉 All message store tests passed!")
@@ -0,0 +1,106 @@
+"""
+Test the export folder retention manager
+Checks age expiry, least recently used eviction, protected files and counters
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from retention_manager import RetentionManager
+
+MB = 1024 * 1024
+
+
+def create_file(folder, name, size_mb, last_use, changed=None):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * int(size_mb * MB))
+    os.utime(path, (last_use, changed if changed is not None else last_use))
+    return path
+
+
+def test_age_expiry():
+    """Test that files unused for longer than the age limit are removed"""
+    print("🧪 Testing retention age limit...")
+
+    now = time.time()
+    with tempfile.TemporaryDirectory() as folder:
+        create_file(folder, "old_json.zip", 0.1, now - 5 * 3600)
+        create_file(folder, "new_json.zip", 0.1, now - 3600)
+        os.makedirs(os.path.join(folder, "media"))
+
+        manager = RetentionManager(folder, max_age_hours=4)
+        stats = asyncio.run(manager.sweep(now))
+
+        assert sorted(os.listdir(folder)) == ["media", "new_json.zip"]
+        assert stats['expired_files'] == 1
+        assert stats['expired_bytes'] == int(0.1 * MB)
+        assert stats['evicted_files'] == 0
+        assert stats['evicted_bytes'] == 0
+        assert stats['file_count'] == 1
+
+    print("✅ Retention age limit: PASSED")
+
+
+def test_quota_evicts_least_recently_used():
+    """Test that the quota removes the least recently used files first"""
+    print("🧪 Testing retention quota...")
+
+    now = time.time()
+    with tempfile.TemporaryDirectory() as folder:
+        day = now - 24 * 3600
+        create_file(folder, "a.zip", 1, day + 100)
+        create_file(folder, "b.zip", 1, day + 300)
+        create_file(folder, "c.zip", 1, day + 200)
+        create_file(folder, "d.zip", 1, day + 400)
+
+        manager = RetentionManager(folder, max_size_mb=2)
+        # A touched archive counts as recently used
+        manager.touch(os.path.join(folder, "a.zip"))
+        stats = asyncio.run(manager.sweep(now))
+
+        assert sorted(os.listdir(folder)) == ["a.zip", "d.zip"]
+        assert stats['evicted_files'] == 2
+        assert stats['evicted_bytes'] == 2 * MB
+        assert stats['expired_bytes'] == 0
+        assert stats['usage_mb'] == 2
+        assert stats['sweeps'] == 1
+
+    print("✅ Retention quota: PASSED")
+
+
+def test_protected_files():
+    """Test that fresh and pinned files survive over the quota"""
+    print("🧪 Testing retention protected files...")
+
+    now = time.time()
+    with tempfile.TemporaryDirectory() as folder:
+        old = now - 24 * 3600
+        pinned = create_file(folder, "pinned.zip.001", 1, old)
+        create_file(folder, "fresh.zip", 1, now - 60)
+        create_file(folder, "unused.zip", 1, old + 10)
+
+        manager = RetentionManager(folder, max_size_mb=1, max_age_hours=1, grace_minutes=10)
+        manager.pin([pinned])
+        stats = asyncio.run(manager.sweep(now))
+
+        assert sorted(os.listdir(folder)) == ["fresh.zip", "pinned.zip.001"]
+        assert stats['expired_files'] == 1
+        # Still over quota, but nothing else may be removed
+        assert stats['usage_mb'] == 2
+
+        manager.unpin([pinned])
+        stats = asyncio.run(manager.sweep(now))
+        assert os.listdir(folder) == ["fresh.zip"]
+        assert stats['expired_files'] == 2
+
+    print("✅ Retention protected files: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Retention Manager Tests...\n")
+    test_age_expiry()
+    test_quota_evicts_least_recently_used()
+    test_protected_files()
+    print("\n🎉 All retention manager tests passed!")
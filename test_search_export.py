@@ -0,0 +1,119 @@
+"""
+Test keyword search exports of ChannelExporter
+Uses a fake Telethon client that filters messages by the search query
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from exporters import ChannelExporter, parse_search_keywords
+
+
+class MockMessage:
+    """Mock message object for testing"""
+    def __init__(self, msg_id, text, date):
+        self.id = msg_id
+        self.text = text
+        self.date = date
+
+
+class FakeClient:
+    """Serves channel history newest first and records the search queries"""
+    def __init__(self, texts):
+        base_date = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.messages = [
+            MockMessage(msg_id, text, base_date + timedelta(hours=msg_id))
+            for msg_id, text in enumerate(texts, start=1)
+        ]
+        self.searches = []
+        self.running = 0
+        self.max_running = 0
+
+    async def iter_messages(self, channel, limit=None, offset_date=None, search=None, min_id=0, max_id=0,
+                            reverse=False):
+        self.searches.append(search)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            returned = 0
+            for message in reversed(self.messages):
+                if search and search.lower() not in message.text.lower():
+                    continue
+                if limit is not None and returned >= limit:
+                    return
+                returned += 1
+                await asyncio.sleep(0)
+                yield message
+        finally:
+            self.running -= 1
+
+
+def collect(exporter, client, keywords, max_messages=0):
+    async def run():
+        return [message.id async for message in exporter._search_messages(
+            client, None, keywords, max_messages, None, None, None
+        )]
+    return asyncio.run(run())
+
+
+def test_parse_search_keywords():
+    """Test splitting of comma separated search queries"""
+    print("🧪 Testing search keyword parsing...")
+
+    assert parse_search_keywords("python, Rust , ,python") == ['python', 'Rust']
+    assert parse_search_keywords(['go', 'GO', 'zig']) == ['go', 'zig']
+    assert parse_search_keywords(None) == []
+
+    print("✅ Search keyword parsing: PASSED")
+
+
+def test_concurrent_search_dedup():
+    """Test that keyword results are merged newest first without duplicates"""
+    print("🧪 Testing concurrent keyword search...")
+
+    client = FakeClient([
+        "python release", "rust news", "nothing here", "python and rust",
+        "weekly digest", "rust 2.0", "python tips",
+    ])
+    exporter = ChannelExporter()
+
+    assert collect(exporter, client, ['python', 'rust']) == [7, 6, 4, 2, 1]
+    assert sorted(client.searches) == ['python', 'rust']
+    assert client.max_running == 2
+
+    # The limit applies to the merged results
+    assert collect(exporter, client, ['python', 'rust'], max_messages=3) == [7, 6, 4]
+
+    print("✅ Concurrent keyword search: PASSED")
+
+
+def test_search_results_streamed():
+    """Test that merged results are yielded before the searches finish"""
+    print("🧪 Testing streamed keyword search...")
+
+    client = FakeClient(["python release", "rust news", "python and rust", "rust 2.0", "python tips"])
+    exporter = ChannelExporter()
+
+    async def first_result():
+        source = exporter._search_messages(client, None, ['python', 'rust'], 0, None, None, None)
+        message = await source.__anext__()
+        running = client.running
+        await source.aclose()
+        return message.id, running
+
+    # Both searches are still open when the first result arrives
+    assert asyncio.run(first_result()) == (5, 2)
+
+    # A single keyword is streamed from its search directly
+    client.searches.clear()
+    assert collect(exporter, client, ['rust']) == [4, 3, 2]
+    assert client.searches == ['rust']
+
+    print("✅ Streamed keyword search: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Search Export Tests...\n")
+    test_parse_search_keywords()
+    test_concurrent_search_dedup()
+    test_search_results_streamed()
+    print("\n🎉 All search export tests passed!")
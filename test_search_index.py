@@ -0,0 +1,83 @@
+"""
+Test the full-text search index over exported messages
+Checks indexing from export files and archives, re-indexing and queries
+"""
+import asyncio
+import csv
+import json
+import os
+import tempfile
+
+from search_index import SearchIndex, tokenize
+from zip_utils import ZipArchiveCreator
+
+
+def write_json_export(path, messages):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'channel_info': {'title': 'Test'}, 'messages': messages,
+                   'total_messages': len(messages)}, f, indent=2, ensure_ascii=False)
+
+
+def test_tokenize():
+    """Test term extraction"""
+    print("🧪 Testing search tokenizer...")
+
+    assert tokenize("Python 3.12 released! python, Релиз") == ['python', '12', 'released', 'релиз']
+
+    print("✅ Search tokenizer: PASSED")
+
+
+def test_index_archives_and_search():
+    """Test that archives are indexed as they are created and found by all terms"""
+    print("🧪 Testing search index...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        index = SearchIndex(os.path.join(folder, "data", "search.db"))
+        creator = ZipArchiveCreator(folder)
+
+        json_path = os.path.join(folder, "news_20250101_120000.json")
+        write_json_export(json_path, [
+            {'id': 3, 'date': '2025-01-03T10:00:00+00:00', 'text': 'Rust 2.0 announced'},
+            {'id': 2, 'date': '2025-01-02T10:00:00+00:00', 'text': 'Python release notes, Python is great'},
+            {'id': 1, 'date': '2025-01-01T10:00:00+00:00', 'text': ''},
+        ])
+        archive_path = asyncio.run(creator.create_export_archive(
+            json_path, [], 'News', 'json', search_index=index
+        ))
+
+        csv_path = os.path.join(folder, "blog_20250101_130000.csv")
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'date', 'text'])
+            writer.writerow([7, '2025-01-05T10:00:00+00:00', 'Weekly digest:\nPython tips and a Rust crate ' + 'x ' * 200])
+
+        asyncio.run(creator.create_export_archive(csv_path, [], 'blog', 'csv', search_index=index))
+
+        results = index.search("python")
+        assert [(r['channel'], r['message_id']) for r in results] == [('blog', 7), ('news', 2)]
+        assert results[1]['archive'] == os.path.basename(archive_path)
+        assert results[1]['snippet'] == 'Python release notes, Python is great'
+        assert results[0]['snippet'].startswith('Weekly digest: Python tips') and results[0]['snippet'].endswith('…')
+
+        assert [r['message_id'] for r in index.search("RUST python")] == [7]
+        assert index.search("golang") == []
+        assert index.search("!!") == []
+        assert len(index.search("python", limit=1)) == 1
+
+        # A later export updates the message instead of adding a duplicate
+        index.index_messages('news_140000_json.zip', 'news', [
+            {'id': 2, 'date': '2025-01-02T10:00:00+00:00', 'text': 'Edited: Golang release notes'},
+        ])
+        assert [r['message_id'] for r in index.search("python")] == [7]
+        results = index.search("golang")
+        assert [(r['message_id'], r['archive']) for r in results] == [(2, 'news_140000_json.zip')]
+        index.close()
+
+    print("✅ Search index: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Search Index Tests...\n")
+    test_tokenize()
+    test_index_archives_and_search()
+    print("\n🎉 All search index tests passed!")
@@ -0,0 +1,210 @@
+"""
+Test SQLite persistence of user settings
+Checks per-user writes, reloading and the import of the former JSON settings file
+"""
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+
+from user_settings import UserSettingsManager
+
+
+def test_settings_persist_per_user():
+    """Test that changes are written per user and survive a restart"""
+    print("🧪 Testing settings store...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "user_settings.json")
+        db_path = os.path.join(folder, "data", "user_settings.db")
+
+        manager = UserSettingsManager(json_path, db_path)
+        manager.update_user_settings(1, {'language': 'ru', 'export_fields': ['id', 'text']})
+        manager.update_user_setting(2, 'include_media', True)
+        manager.get_user_settings(3)
+        manager.flush()
+        manager.delete_user_settings(3)
+        manager.flush()
+        assert manager.store.count() == 2
+        updated_at = manager.get_user_settings(1).updated_at
+        manager.close()
+
+        manager = UserSettingsManager(json_path, db_path)
+        assert manager.get_users_count() == 2
+        first = manager.get_user_settings(1)
+        assert first.language == 'ru' and first.export_fields == ['id', 'text']
+        assert first.updated_at == updated_at
+        assert manager.get_user_settings(2).include_media is True
+        assert not os.path.exists(json_path)
+        manager.close()
+
+    print("✅ Settings store: PASSED")
+
+
+def test_write_behind():
+    """Test that changes are written in batches and on close"""
+    print("🧪 Testing write-behind of settings...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "user_settings.json")
+        db_path = os.path.join(folder, "user_settings.db")
+
+        manager = UserSettingsManager(json_path, db_path, flush_seconds=3600, flush_max_dirty=3)
+        for limit in (100, 200, 300):
+            manager.update_user_setting(1, 'max_messages', limit)
+        manager.update_user_setting(2, 'language', 'ru')
+        assert manager.store.count() == 0  # Two dirty users, below the threshold
+
+        manager.update_user_setting(3, 'language', 'ru')
+        assert manager.store.load(1)['max_messages'] == 300
+        assert manager.store.count() == 3
+
+        manager.update_user_setting(2, 'language', 'en')
+        manager.delete_user_settings(3)
+        assert manager.flush() == 2
+        assert manager.store.load(2)['language'] == 'en' and manager.store.load(3) is None
+        assert manager.flush() == 0
+
+        manager.update_user_setting(4, 'export_format', 'csv')
+        manager.close()
+
+        manager = UserSettingsManager(json_path, db_path, flush_seconds=0)
+        assert manager.get_user_settings(4).export_format == 'csv'
+        manager.update_user_setting(4, 'export_format', 'json')
+        assert manager.store.load(4)['export_format'] == 'json'  # Written at once without interval
+        manager.close()
+
+    print("✅ Write-behind of settings: PASSED")
+
+
+def test_setting_queries_and_counts():
+    """Test indexed queries and the counts maintained on write"""
+    print("🧪 Testing settings queries...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "user_settings.json")
+        db_path = os.path.join(folder, "user_settings.db")
+
+        manager = UserSettingsManager(json_path, db_path, flush_seconds=3600)
+        for user_id in range(1, 11):
+            manager.update_user_settings(user_id, {
+                'language': 'ru' if user_id % 2 else 'en',
+                'export_format': 'csv' if user_id <= 3 else 'json',
+                'include_media': user_id == 1,
+            })
+        manager.update_user_setting(4, 'last_export', '2025-03-01T10:00:00')
+        manager.update_user_setting(5, 'last_export', '2025-03-02T09:00:00')
+        manager.update_user_setting(6, 'last_export', '2025-03-02T18:00:00')
+
+        assert sorted(manager.get_users_by_setting('export_format', 'csv')) == [1, 2, 3]
+        assert list(manager.get_users_by_setting('include_media', True)) == [1]
+        assert manager.get_users_by_setting('unknown', 1) == {}
+        assert sorted(manager.get_users_exported_since(datetime(2025, 3, 2))) == [5, 6]
+        assert list(manager.get_users_exported_since(datetime(2025, 3, 1), datetime(2025, 3, 2))) == [4]
+
+        assert manager.count_users_by_setting('language') == {'en': 5, 'ru': 5}
+        assert manager.count_users_by_setting('include_media') == {True: 1, False: 9}
+        assert manager.count_users_by_setting('last_export_day') == {'2025-03-01': 1, '2025-03-02': 2}
+
+        # Counts follow changes and deletions
+        manager.update_user_setting(2, 'export_format', 'json')
+        manager.update_user_setting(5, 'last_export', '2025-03-03T08:00:00')
+        manager.delete_user_settings(3)
+        assert manager.count_users_by_setting('export_format') == {'csv': 1, 'json': 8}
+        assert manager.count_users_by_setting('last_export_day') == {
+            '2025-03-01': 1, '2025-03-02': 1, '2025-03-03': 1
+        }
+
+        plan = manager.store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM users WHERE export_format IS ?", ('csv',)
+        ).fetchall()
+        assert 'users_export_format' in str(plan)
+        manager.close()
+
+        # Counts are rebuilt for a store written without them
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM setting_counts")
+        manager = UserSettingsManager(json_path, db_path)
+        assert manager.count_users_by_setting('export_format') == {'csv': 1, 'json': 8}
+        manager.close()
+
+    print("✅ Settings queries: PASSED")
+
+
+def test_settings_cache():
+    """Test lazy loading and eviction of the bounded settings cache"""
+    print("🧪 Testing settings cache...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "user_settings.json")
+        db_path = os.path.join(folder, "user_settings.db")
+
+        manager = UserSettingsManager(json_path, db_path, flush_seconds=3600, cache_size=2)
+        for user_id in (1, 2, 3):
+            manager.update_user_setting(user_id, 'max_messages', user_id * 100)
+        assert list(manager.settings_cache) == [2, 3]
+        assert manager.store.count() == 0  # Evicted user 1 is still waiting to be written
+
+        # Evicted dirty settings come back from the write buffer
+        assert manager.get_user_settings(1).max_messages == 100
+        manager.get_user_settings(3)
+        assert list(manager.settings_cache) == [1, 3]
+        manager.close()
+
+        # Users are loaded on first access only
+        manager = UserSettingsManager(json_path, db_path, cache_size=2)
+        assert len(manager.settings_cache) == 0
+        assert manager.get_users_count() == 3
+        assert manager.get_user_settings(2).max_messages == 200
+        manager.get_user_settings(2)
+        manager.get_user_settings(3)
+        assert len(manager.get_all_users()) == 3
+        assert list(manager.settings_cache) == [2, 3]
+
+        stats = manager.get_cache_stats()
+        assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 2, 0)
+        assert stats['hit_rate'] == 1 / 3
+        manager.close()
+
+    print("✅ Settings cache: PASSED")
+
+
+def test_json_settings_migration():
+    """Test that an existing JSON settings file is imported once and renamed"""
+    print("🧪 Testing JSON settings migration...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "user_settings.json")
+        db_path = os.path.join(folder, "user_settings.db")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                '42': {'user_id': 42, 'language': 'ru', 'export_format': 'csv', 'include_media': True,
+                       'max_messages': 500, 'export_fields': None, 'last_export': '2025-01-01T10:00:00',
+                       'created_at': '2024-12-01T10:00:00', 'updated_at': '2024-12-02T10:00:00'},
+            }, f)
+
+        manager = UserSettingsManager(json_path, db_path)
+        settings = manager.get_user_settings(42)
+        assert (settings.language, settings.export_format, settings.max_messages) == ('ru', 'csv', 500)
+        assert settings.updated_at == '2024-12-02T10:00:00'
+        assert not os.path.exists(json_path)
+        assert os.path.exists(f"{json_path}.migrated")
+        manager.close()
+
+        # The renamed file is not imported again
+        manager = UserSettingsManager(json_path, db_path)
+        assert manager.get_users_count() == 1
+        manager.close()
+
+    print("✅ JSON settings migration: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Settings Store Tests...\n")
+    test_settings_persist_per_user()
+    test_write_behind()
+    test_setting_queries_and_counts()
+    test_settings_cache()
+    test_json_settings_migration()
+    print("\n🎉 All settings store tests passed!")
@@ -0,0 +1,92 @@
+"""
+Test the spill-to-disk buffer for processed messages
+Checks ordering, spilling thresholds and format writer compatibility
+"""
+import asyncio
+import json
+import os
+import tempfile
+
+from format_writers import JsonExportWriter, write_export_files
+from message_record import MessageRecord
+from spill_buffer import SpillBuffer
+
+
+class MockChannel:
+    """Mock channel object for testing"""
+    def __init__(self):
+        self.id = 123456789
+        self.title = "Test Channel"
+        self.username = "testchannel"
+
+
+def create_records(count: int):
+    return [
+        MessageRecord(id=i, date='2025-01-01T00:00:00+00:00', text=f"Message {i}", views=i,
+                      media_type='photo' if i % 3 == 0 else None)
+        for i in range(count, 0, -1)
+    ]
+
+
+def test_spill_preserves_order():
+    """Test that spilled and in-memory records iterate in insertion order"""
+    print("🧪 Testing spill buffer ordering...")
+
+    records = create_records(5500)
+
+    with tempfile.TemporaryDirectory() as folder:
+        with SpillBuffer(max_messages=2000, spill_dir=folder) as buffer:
+            buffer.extend(records)
+
+            assert buffer.is_spilled
+            assert len(buffer) == len(records)
+            assert buffer.spilled_count == 5000
+            assert list(buffer) == records
+            # A second pass reads the spilled batches again
+            assert [record.id for record in buffer] == [record.id for record in records]
+
+    print("✅ Spill buffer ordering: PASSED")
+
+
+def test_no_spill_below_threshold():
+    """Test that small exports stay in memory"""
+    print("🧪 Testing spill buffer threshold...")
+
+    records = create_records(500)
+    with SpillBuffer(max_messages=2000) as buffer:
+        buffer.extend(records)
+        assert not buffer.is_spilled
+        assert list(buffer) == records
+
+    print("✅ Spill buffer threshold: PASSED")
+
+
+def test_writer_reads_spilled_buffer():
+    """Test that format writers consume a spilled buffer transparently"""
+    print("🧪 Testing export from spilled buffer...")
+
+    records = create_records(3200)
+
+    with tempfile.TemporaryDirectory() as folder:
+        buffer = SpillBuffer(max_messages=1000, spill_dir=folder)
+        buffer.extend(records)
+
+        writer = JsonExportWriter(os.path.join(folder, "testchannel.json"), MockChannel(), len(buffer))
+        asyncio.run(write_export_files(buffer, [writer]))
+        buffer.close()
+
+        with open(writer.filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    assert data['total_messages'] == len(records)
+    assert data['messages'] == [record.to_dict() for record in records]
+
+    print("✅ Export from spilled buffer: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Spill Buffer Tests...\n")
+    test_spill_preserves_order()
+    test_no_spill_below_threshold()
+    test_writer_reads_spilled_buffer()
+    print("\n🎉 All spill buffer tests passed!")
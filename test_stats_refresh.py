@@ -0,0 +1,241 @@
+"""
+Test refreshing view counters in existing export archives
+Uses a fake client that answers GetMessagesViewsRequest
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import zipfile
+from types import SimpleNamespace
+
+from telethon.tl.types import MessageViews, MessageReplies
+from telethon.tl.types.messages import MessageViews as MessagesMessageViews
+
+from bot import TelegramExportBot
+from config import export_config
+from exporters import ChannelExporter
+from user_settings import UserSettings
+from zip_utils import ZipArchiveCreator
+
+
+class FakeClient:
+    """Returns views = id * 1000 for every requested message"""
+    def __init__(self):
+        self.requests = []
+        self.entities = []
+
+    async def get_input_entity(self, entity):
+        self.entities.append(entity)
+        return entity
+
+    async def __call__(self, request):
+        self.requests.append(list(request.id))
+        views = [
+            MessageViews(views=i * 1000, forwards=i, replies=MessageReplies(replies=7, replies_pts=0))
+            for i in request.id
+        ]
+        return MessagesMessageViews(views=views, chats=[], users=[])
+
+
+def create_test_archive(folder: str) -> str:
+    """Create a JSON + CSV export archive with stale counters"""
+    messages = [
+        {'id': i, 'date': '2025-01-01T00:00:00+00:00', 'text': f"Post, {i}", 'sender_id': None,
+         'views': 1, 'forwards': 0, 'replies': 0, 'edit_date': None, 'media_type': None,
+         'media_file': None, 'file_size': None, 'duration': None}
+        for i in range(1, 251)
+    ]
+    data = {'channel_info': {'username': 'testchannel'}, 'messages': messages, 'total_messages': len(messages)}
+
+    csv_buffer = io.StringIO()
+    writer = csv.DictWriter(csv_buffer, fieldnames=list(messages[0].keys()))
+    writer.writeheader()
+    writer.writerows(messages)
+
+    archive_path = os.path.join(folder, "testchannel_120000_json+csv.zip")
+    with zipfile.ZipFile(archive_path, 'w') as zipf:
+        zipf.writestr("testchannel_20250101_120000.json", json.dumps(data, indent=2))
+        zipf.writestr("testchannel_20250101_120000.csv", csv_buffer.getvalue())
+        zipf.writestr("media/photo_1.jpg", b"binary")
+        zipf.writestr("README.txt", "Generated by Telegram Channel Export Bot")
+    return archive_path
+
+
+def create_csv_archive(folder: str, channel: str, first_id: int, count: int) -> str:
+    """Create a CSV export archive the way export_channel names and fills it"""
+    csv_path = os.path.join(folder, f"{channel}_20250101_120000.csv")
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'date', 'text', 'views'])
+        for i in range(first_id, first_id + count):
+            writer.writerow([i, '2025-01-01T00:00:00+00:00', f"Post {i}", 1])
+    archive_path = asyncio.run(ZipArchiveCreator(folder).create_export_archive(csv_path, [], channel, 'csv'))
+    os.remove(csv_path)
+    return archive_path
+
+
+def refresh(folder: str, archive_path: str, client: FakeClient) -> str:
+    original_folder = export_config.export_folder
+    export_config.export_folder = folder
+    try:
+        exporter = ChannelExporter()
+        exporter.client = client
+        return asyncio.run(exporter.refresh_archive_statistics(archive_path))
+    finally:
+        export_config.export_folder = original_folder
+
+
+def test_refresh_archive_statistics():
+    """Test that counters are refreshed in batches and other content is kept"""
+    print("🧪 Testing archive statistics refresh...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        original_folder = export_config.export_folder
+        export_config.export_folder = folder
+        try:
+            exporter = ChannelExporter()
+            exporter.client = FakeClient()
+            archive_path = create_test_archive(folder)
+
+            refreshed_path = asyncio.run(exporter.refresh_archive_statistics(archive_path))
+        finally:
+            export_config.export_folder = original_folder
+
+        assert [len(batch) for batch in exporter.client.requests] == [100, 100, 50]
+
+        with zipfile.ZipFile(refreshed_path, 'r') as zipf:
+            data = json.loads(zipf.read("testchannel_20250101_120000.json"))
+            rows = list(csv.DictReader(io.TextIOWrapper(zipf.open("testchannel_20250101_120000.csv"),
+                                                        encoding='utf-8', newline='')))
+            assert zipf.read("media/photo_1.jpg") == b"binary"
+
+        assert data['messages'][4]['views'] == 5000
+        assert data['messages'][4]['replies'] == 7
+        assert data['messages'][4]['text'] == "Post, 5"
+        assert rows[9]['views'] == '10000'
+        assert rows[9]['text'] == "Post, 10"
+
+    print("✅ Archive statistics refresh: PASSED")
+
+
+def test_refresh_archive_channel():
+    """Test that the channel is found from the archive content, not its name"""
+    print("🧪 Testing archive channel detection...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        archive_path = create_csv_archive(folder, 'my_chan', 1, 3)
+        assert os.path.basename(archive_path) == "my_chan_120000_csv.zip"
+
+        client = FakeClient()
+        refreshed_path = refresh(folder, archive_path, client)
+        assert client.entities == ['my_chan']
+
+        # A refreshed archive sent back again keeps its channel
+        client = FakeClient()
+        refresh(folder, refreshed_path, client)
+        assert client.entities == ['my_chan']
+
+        # Without a README the export file names are used
+        bare_path = os.path.join(folder, "bare.zip")
+        with zipfile.ZipFile(archive_path) as src, zipfile.ZipFile(bare_path, 'w') as dst:
+            dst.writestr("my_chan_20250101_120000.csv", src.read("my_chan_20250101_120000.csv"))
+        client = FakeClient()
+        refresh(folder, bare_path, client)
+        assert client.entities == ['my_chan']
+
+    print("✅ Archive channel detection: PASSED")
+
+
+def test_refresh_batch_archive():
+    """Test that every channel folder of a batch archive is refreshed against its channel"""
+    print("🧪 Testing batch archive statistics refresh...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        creator = ZipArchiveCreator(folder)
+        batch_path = os.path.join(folder, "batch_20250101_120000_csv.zip")
+        creator.combine_archives({
+            'first_chan': create_csv_archive(folder, 'first_chan', 1, 2),
+            'second': create_csv_archive(folder, 'second', 10, 3),
+        }, batch_path, {'BATCH_REPORT.txt': "✅ @first_chan\n✅ @second\n"})
+
+        client = FakeClient()
+        refreshed_path = refresh(folder, batch_path, client)
+        assert client.entities == ['first_chan', 'second']
+        assert client.requests == [[1, 2], [10, 11, 12]]
+
+        with zipfile.ZipFile(refreshed_path, 'r') as zipf:
+            rows = list(csv.DictReader(io.TextIOWrapper(zipf.open("second/second_20250101_120000.csv"),
+                                                        encoding='utf-8', newline='')))
+            assert zipf.read("BATCH_REPORT.txt").decode('utf-8').startswith("✅ @first_chan")
+        assert [row['views'] for row in rows] == ['10000', '11000', '12000']
+        assert list(rows[0]) == ['id', 'date', 'text', 'views']
+
+    print("✅ Batch archive statistics refresh: PASSED")
+
+
+def test_refresh_keeps_exported_fields():
+    """Test that counters missing from a reduced field export are not added"""
+    print("🧪 Testing refresh of reduced field exports...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        data = {
+            'channel_info': {'username': 'testchannel'},
+            'messages': [{'id': 1, 'text': "Post 1", 'views': 1}, {'id': 2, 'text': "Post 2", 'views': 1}],
+        }
+        archive_path = os.path.join(folder, "testchannel_120000_json+csv.zip")
+        with zipfile.ZipFile(archive_path, 'w') as zipf:
+            zipf.writestr("testchannel_20250101_120000.json", json.dumps(data))
+            zipf.writestr("testchannel_20250101_120000.csv", "id,date,text\r\n1,2025-01-01,Post 1\r\n2,2025-01-01,Post 2\r\n")
+
+        refreshed_path = refresh(folder, archive_path, FakeClient())
+
+        with zipfile.ZipFile(refreshed_path, 'r') as zipf:
+            messages = json.loads(zipf.read("testchannel_20250101_120000.json"))['messages']
+            csv_text = zipf.read("testchannel_20250101_120000.csv").decode('utf-8')
+
+        assert messages == [{'id': 1, 'text': "Post 1", 'views': 1000}, {'id': 2, 'text': "Post 2", 'views': 2000}]
+        assert csv_text.splitlines() == ["id,date,text", "1,2025-01-01,Post 1", "2,2025-01-01,Post 2"]
+
+    print("✅ Refresh of reduced field exports: PASSED")
+
+
+def test_refresh_too_large_archive():
+    """Test that archives above the bot download limit are rejected before downloading"""
+    print("🧪 Testing refresh of an archive above the download limit...")
+
+    replies = []
+
+    async def reply_text(text):
+        replies.append(text)
+
+    async def get_file():
+        raise AssertionError("Archive above the download limit was downloaded")
+
+    document = SimpleNamespace(file_name="testchannel_120000_json.zip", file_size=25 * 1024 * 1024,
+                               get_file=get_file)
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(id=7),
+        message=SimpleNamespace(document=document, reply_text=reply_text)
+    )
+    bot = object.__new__(TelegramExportBot)
+    bot.settings_manager = SimpleNamespace(get_user_settings=lambda user_id: UserSettings(user_id))
+
+    asyncio.run(bot.handle_archive_document(update, None))
+
+    assert len(replies) == 1
+    assert "25.0 MB" in replies[0] and "20 MB" in replies[0]
+
+    print("✅ Refresh of an archive above the download limit: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Statistics Refresh Tests...\n")
+    test_refresh_archive_statistics()
+    test_refresh_archive_channel()
+    test_refresh_batch_archive()
+    test_refresh_keeps_exported_fields()
+    test_refresh_too_large_archive()
+    print("\n🎉 All statistics refresh tests passed!")
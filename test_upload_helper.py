@@ -0,0 +1,62 @@
+"""
+Test parallel part upload used for large archive delivery
+Uses a fake client instead of Telegram API calls
+"""
+import asyncio
+import os
+import tempfile
+
+from telethon.tl.types import InputFileBig
+from upload_helper import ParallelUploader
+
+
+class FakeClient:
+    """Collects uploaded parts like Telegram would"""
+    def __init__(self):
+        self.parts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.parts[request.file_part] = request.bytes
+        self.in_flight -= 1
+        return True
+
+
+def test_parallel_upload():
+    """Test that all parts arrive with the right content using several workers"""
+    print("🧪 Testing parallel upload...")
+
+    with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as temp_file:
+        content = os.urandom(12 * 1024 * 1024 + 123)
+        temp_file.write(content)
+        temp_filepath = temp_file.name
+
+    try:
+        client = FakeClient()
+        progress = []
+
+        async def on_progress(uploaded, total):
+            progress.append((uploaded, total))
+
+        uploader = ParallelUploader(client, workers=4)
+        input_file = asyncio.run(uploader.upload(temp_filepath, on_progress))
+
+        assert isinstance(input_file, InputFileBig)
+        assert input_file.parts == len(client.parts)
+        assert b''.join(client.parts[i] for i in range(input_file.parts)) == content
+        assert client.max_in_flight > 1
+        assert progress[-1] == (input_file.parts, input_file.parts)
+        print(f"✅ Parallel upload: PASSED ({input_file.parts} parts)")
+
+    finally:
+        os.unlink(temp_filepath)
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Upload Tests...\n")
+    test_parallel_upload()
+    print("\n🎉 All upload tests passed!")
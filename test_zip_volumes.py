@@ -0,0 +1,181 @@
+"""
+Test splitting of export archives into size-bounded volumes
+Tests ZipArchiveCreator.split_archive without Telegram API calls
+"""
+import asyncio
+import os
+import tempfile
+import zipfile
+
+from bot import TelegramExportBot
+from export_catalog import ExportCatalog
+from retention_manager import RetentionManager
+from zip_utils import ZipArchiveCreator
+
+
+def create_test_archive(folder: str, file_count: int, file_size: int) -> str:
+    """Create an archive of incompressible entries"""
+    archive_path = os.path.join(folder, "testchannel_20250101_120000_json.zip")
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
+        zipf.writestr("testchannel_20250101_120000.json", '{"messages": []}')
+        for i in range(file_count):
+            zipf.writestr(f"media/photo_{i}.jpg", os.urandom(file_size))
+        zipf.writestr("README.txt", "Generated by Telegram Channel Export Bot")
+    return archive_path
+
+
+def test_split_archive():
+    """Test that volumes respect the limit and contain every entry once"""
+    print("🧪 Testing archive splitting...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        creator = ZipArchiveCreator(folder)
+        archive_path = create_test_archive(folder, file_count=12, file_size=200 * 1024)
+        max_volume_size = 700 * 1024
+
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            original_entries = {info.filename: zipf.read(info) for info in zipf.infolist()}
+
+        volumes, skipped = creator.split_archive(archive_path, max_volume_size)
+        print(f"📦 Created {len(volumes)} volumes")
+
+        assert len(volumes) > 1
+        assert skipped == []
+        assert volumes[0].endswith(".part01.zip")
+
+        seen = {}
+        for volume in volumes:
+            assert os.path.getsize(volume) <= max_volume_size
+            assert creator.validate_archive(volume)
+            with zipfile.ZipFile(volume, 'r') as zipf:
+                for info in zipf.infolist():
+                    assert info.filename not in seen
+                    seen[info.filename] = zipf.read(info)
+
+        assert seen == original_entries
+        print("✅ Archive splitting: PASSED")
+
+
+def test_split_archive_within_limit():
+    """Test that small archives are returned unchanged"""
+    print("🧪 Testing archive below the limit...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        creator = ZipArchiveCreator(folder)
+        archive_path = create_test_archive(folder, file_count=2, file_size=1024)
+
+        volumes, skipped = creator.split_archive(archive_path, 50 * 1024 * 1024)
+
+        assert volumes == [archive_path]
+        assert skipped == []
+        print("✅ Archive below limit: PASSED")
+
+
+def test_split_archive_oversized_entry():
+    """Test that entries above the limit are left out and the rest is still split"""
+    print("🧪 Testing oversized entry...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        creator = ZipArchiveCreator(folder)
+        archive_path = create_test_archive(folder, file_count=4, file_size=100 * 1024)
+        with zipfile.ZipFile(archive_path, 'a') as zipf:
+            zipf.writestr("media/video_99.mp4", os.urandom(512 * 1024))
+
+        volumes, skipped = creator.split_archive(archive_path, 256 * 1024)
+
+        assert skipped == ["media/video_99.mp4"]
+        names = []
+        for volume in volumes:
+            assert os.path.getsize(volume) <= 256 * 1024
+            with zipfile.ZipFile(volume, 'r') as zipf:
+                names += zipf.namelist()
+        assert sorted(names) == sorted([
+            "testchannel_20250101_120000.json", "README.txt",
+            "media/photo_0.jpg", "media/photo_1.jpg", "media/photo_2.jpg", "media/photo_3.jpg",
+        ])
+        print("✅ Oversized entry left out: PASSED")
+
+
+class FakeStatusMessage:
+    async def edit_text(self, text):
+        pass
+
+
+class FakeBot:
+    """Records sent volumes and fails the volumes listed in fail_on once"""
+    def __init__(self, fail_on):
+        self.fail_on = set(fail_on)
+        self.sent = []
+        self.resume_data = []
+
+    async def send_document(self, chat_id, document, caption, parse_mode):
+        await asyncio.sleep(0)
+        name = os.path.basename(document.name)
+        if name in self.fail_on:
+            self.fail_on.discard(name)
+            raise ConnectionError("Upload interrupted")
+        self.sent.append(name)
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        self.resume_data.append(reply_markup.inline_keyboard[0][0].callback_data)
+
+
+class FakeContext:
+    def __init__(self, bot):
+        self.bot = bot
+
+
+def test_overlapping_deliveries():
+    """Test that two split deliveries of one user are kept apart"""
+    print("🧪 Testing overlapping deliveries...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        bot = object.__new__(TelegramExportBot)
+        bot.pending_deliveries = {}
+        bot.retention_manager = RetentionManager(folder)
+        bot.export_catalog = ExportCatalog(os.path.join(folder, "catalog.db"))
+
+        volumes = {}
+        for name, count in (("first", 2), ("second", 3)):
+            volumes[name] = []
+            for index in range(1, count + 1):
+                path = os.path.join(folder, f"{name}_120000_json.part{index:02d}.zip")
+                with open(path, 'wb') as f:
+                    f.write(b"volume")
+                volumes[name].append(path)
+
+        fake_bot = FakeBot(fail_on=["second_120000_json.part02.zip"])
+        context = FakeContext(fake_bot)
+        first_id = bot._add_pending_delivery(7, 7, "first", "json", volumes["first"])
+        second_id = bot._add_pending_delivery(7, 7, "second", "json", volumes["second"])
+        assert first_id != second_id
+
+        async def deliver_both():
+            await asyncio.gather(
+                bot._deliver_pending_volumes(context, first_id, 'en', FakeStatusMessage()),
+                bot._deliver_pending_volumes(context, second_id, 'en', FakeStatusMessage()),
+            )
+
+        asyncio.run(deliver_both())
+
+        # The finished delivery is gone, the interrupted one can still be resumed
+        assert list(bot.pending_deliveries) == [second_id]
+        assert fake_bot.resume_data == [f"resume_delivery:{second_id}"]
+
+        asyncio.run(bot._deliver_pending_volumes(context, second_id, 'en', FakeStatusMessage()))
+        assert bot.pending_deliveries == {}
+        assert sorted(fake_bot.sent) == sorted(os.path.basename(path) for paths in volumes.values() for path in paths)
+
+        bot.export_catalog.close()
+        print("✅ Overlapping deliveries: PASSED")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Archive Volume Tests...\n")
+
+    test_split_archive()
+    test_split_archive_within_limit()
+    test_split_archive_oversized_entry()
+    test_overlapping_deliveries()
+
+    print("\n🎉 All archive volume tests passed!")
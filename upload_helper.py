@@ -0,0 +1,90 @@
+"""
+Parallel file upload for Telegram Channel Export Bot
+Uploads large archives through the Telethon user client with concurrent part workers
+"""
+import os
+import asyncio
+import aiofiles
+from typing import Optional, Callable, Union
+from telethon import TelegramClient, helpers, utils
+from telethon.tl.functions.upload import SaveBigFilePartRequest, SaveFilePartRequest
+from telethon.tl.types import InputFile, InputFileBig
+
+
+class ParallelUploader:
+    """Uploads a file in parts using several concurrent workers on one client"""
+
+    # Files above this size must be uploaded with SaveBigFilePartRequest
+    BIG_FILE_THRESHOLD = 10 * 1024 * 1024
+    PART_RETRIES = 3
+
+    def __init__(self, client: TelegramClient, workers: int = 4):
+        self.client = client
+        self.workers = max(1, workers)
+
+    async def upload(self, file_path: str,
+                     progress_callback: Optional[Callable] = None) -> Union[InputFile, InputFileBig]:
+        """
+        Upload a file and return the handle to use with send_file
+
+        Args:
+            file_path: Path to the file to upload
+            progress_callback: Coroutine called with (uploaded_parts, total_parts)
+
+        Returns:
+            InputFile or InputFileBig referencing the uploaded parts
+        """
+        file_size = os.path.getsize(file_path)
+        part_size = utils.get_appropriated_part_size(file_size) * 1024
+        total_parts = max(1, -(-file_size // part_size))
+        is_big = file_size > self.BIG_FILE_THRESHOLD
+        file_id = helpers.generate_random_long()
+
+        queue = asyncio.Queue()
+        for part_index in range(total_parts):
+            queue.put_nowait(part_index)
+
+        uploaded_parts = 0
+
+        async def worker():
+            nonlocal uploaded_parts
+            # Each worker reads through its own handle so seeks don't interfere
+            async with aiofiles.open(file_path, 'rb') as f:
+                while True:
+                    try:
+                        part_index = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+
+                    await f.seek(part_index * part_size)
+                    data = await f.read(part_size)
+
+                    if is_big:
+                        request = SaveBigFilePartRequest(file_id, part_index, total_parts, data)
+                    else:
+                        request = SaveFilePartRequest(file_id, part_index, data)
+
+                    await self._send_part(request, part_index)
+
+                    uploaded_parts += 1
+                    if progress_callback:
+                        await progress_callback(uploaded_parts, total_parts)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, total_parts))))
+
+        name = os.path.basename(file_path)
+        if is_big:
+            return InputFileBig(file_id, total_parts, name)
+        return InputFile(file_id, total_parts, name, '')
+
+    async def _send_part(self, request, part_index: int):
+        """Send a single part, retrying transient failures"""
+        for attempt in range(self.PART_RETRIES):
+            try:
+                if await self.client(request):
+                    return
+            except (ConnectionError, asyncio.TimeoutError):
+                if attempt == self.PART_RETRIES - 1:
+                    raise
+
+        raise RuntimeError(f"Failed to upload part {part_index}")
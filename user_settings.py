@@ -4,13 +4,16 @@ Handles user preferences and settings persistence
 """
 import json
 import os
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, asdict
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Iterable
 from datetime import datetime
 
 from config import export_config
+from settings_store import SETTINGS_COLUMNS, SettingsStore
 
-@dataclass
+@dataclass(slots=True)
 class UserSettings:
     """User settings data class"""
     user_id: int
@@ -18,6 +21,7 @@ class UserSettings:
     export_format: str = 'json'
     include_media: bool = False
     max_messages: int = 10000
+    export_fields: Optional[List[str]] = None  # None exports every field
     last_export: Optional[str] = None
     created_at: str = None
     updated_at: str = None
@@ -28,53 +32,168 @@ class UserSettings:
         self.updated_at = datetime.now().isoformat()
 
 class UserSettingsManager:
-    """Manages user settings with file-based persistence"""
+    """
+    Manages user settings with SQLite persistence
     
-    def __init__(self, settings_file: str = "user_settings.json"):
+    Recently used settings are kept in a bounded LRU cache, other users are
+    loaded from the store on first access. Changes only mark the user dirty,
+    dirty users are written in one transaction once the flush interval has
+    passed or enough users changed, so a burst of menu clicks costs one
+    write. Dirty settings stay buffered until written even when they leave
+    the cache. Call flush() periodically to write changes of idle users and
+    close() on shutdown. A settings file of the former JSON format is
+    imported on first start.
+    """
+    
+    def __init__(self, settings_file: str = "user_settings.json", db_path: Optional[str] = None,
+                 flush_seconds: Optional[float] = None, flush_max_dirty: Optional[int] = None,
+                 cache_size: Optional[int] = None):
         self.settings_file = settings_file
-        self.settings_cache: Dict[int, UserSettings] = {}
+        self.store = SettingsStore(db_path or export_config.user_settings_db_path)
+        self.flush_seconds = export_config.user_settings_flush_seconds if flush_seconds is None else flush_seconds
+        self.flush_max_dirty = export_config.user_settings_flush_max_dirty if flush_max_dirty is None else flush_max_dirty
+        self.cache_size = export_config.user_settings_cache_size if cache_size is None else cache_size
+        self.settings_cache: OrderedDict[int, UserSettings] = OrderedDict()
+        # Settings waiting to be written, None marks a deleted user
+        self._dirty: Dict[int, Optional[UserSettings]] = {}
+        self._last_flush = time.monotonic()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
         self._load_settings()
     
     def _load_settings(self):
-        """Load settings from file"""
-        if os.path.exists(self.settings_file):
+        """Import the JSON settings file, users are loaded from the store on first access"""
+        try:
+            self._migrate_json()
+        except Exception as e:
+            print(f"Error migrating settings file: {e}")
+    
+    def _migrate_json(self):
+        """Import the settings file of the former JSON format and rename it to .migrated"""
+        if not os.path.exists(self.settings_file):
+            return
+        
+        with open(self.settings_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        self.store.save_many(
+            asdict(self._from_dict(dict(settings_dict, user_id=int(user_id))))
+            for user_id, settings_dict in data.items()
+        )
+        os.replace(self.settings_file, f"{self.settings_file}.migrated")
+    
+    @staticmethod
+    def _from_dict(settings_dict: Dict[str, Any]) -> UserSettings:
+        settings = UserSettings(**settings_dict)
+        # Keep the stored time of the last change
+        settings.updated_at = settings_dict.get('updated_at') or settings.updated_at
+        return settings
+    
+    def _lookup(self, user_id: int) -> Optional[UserSettings]:
+        """Settings of a user from the cache, the write buffer or the store"""
+        settings = self.settings_cache.get(user_id)
+        if settings is not None:
+            self.settings_cache.move_to_end(user_id)
+            self._cache_hits += 1
+            return settings
+        
+        self._cache_misses += 1
+        if user_id in self._dirty:
+            settings = self._dirty[user_id]
+        else:
             try:
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                for user_id_str, settings_dict in data.items():
-                    user_id = int(user_id_str)
-                    self.settings_cache[user_id] = UserSettings(**settings_dict)
-                    
+                settings_dict = self.store.load(user_id)
             except Exception as e:
                 print(f"Error loading settings: {e}")
-                self.settings_cache = {}
+                settings_dict = None
+            settings = self._from_dict(settings_dict) if settings_dict else None
+        
+        if settings is not None:
+            self._cache(user_id, settings)
+        return settings
+    
+    def _cache(self, user_id: int, settings: UserSettings):
+        """Add settings as most recently used, evicting the least recently used"""
+        self.settings_cache[user_id] = settings
+        self.settings_cache.move_to_end(user_id)
+        while len(self.settings_cache) > self.cache_size:
+            self.settings_cache.popitem(last=False)
+            self._cache_evictions += 1
+    
+    def _from_store(self, settings_dicts: Iterable[Dict[str, Any]]) -> Dict[int, UserSettings]:
+        """Settings of stored users by user ID, without adding them to the cache"""
+        return {
+            settings_dict['user_id']: (self.settings_cache.get(settings_dict['user_id'])
+                                       or self._from_dict(settings_dict))
+            for settings_dict in settings_dicts
+        }
     
-    def _save_settings(self):
-        """Save settings to file"""
+    def _mark_dirty(self, user_id: int, settings: Optional[UserSettings]):
+        """Queue the settings of a user for writing, None deletes the user"""
+        self._dirty[user_id] = settings
+        if (len(self._dirty) >= self.flush_max_dirty
+                or time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+    
+    def flush(self) -> int:
+        """
+        Write the settings of changed and deleted users in one transaction
+        
+        Returns:
+            Number of users written
+        """
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return 0
+        
+        dirty, self._dirty = self._dirty, {}
         try:
-            data = {}
-            for user_id, settings in self.settings_cache.items():
-                data[str(user_id)] = asdict(settings)
-            
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-                
+            self.store.save_many(
+                [asdict(settings) for settings in dirty.values() if settings is not None],
+                [user_id for user_id, settings in dirty.items() if settings is None]
+            )
         except Exception as e:
             print(f"Error saving settings: {e}")
+            self._dirty = {**dirty, **self._dirty}  # Retried on the next flush
+            return 0
+        return len(dirty)
+    
+    def close(self):
+        """Write pending changes and close the store"""
+        self.flush()
+        self.store.close()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get size and hit rate of the settings cache"""
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            'size': len(self.settings_cache),
+            'max_size': self.cache_size,
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+            'evictions': self._cache_evictions,
+            'hit_rate': self._cache_hits / lookups if lookups else 0.0,
+            'dirty': len(self._dirty),
+        }
+    
+    def _default_settings(self, user_id: int) -> UserSettings:
+        settings = UserSettings(
+            user_id=user_id,
+            export_format=export_config.default_format,
+            include_media=export_config.include_media_by_default,
+            max_messages=export_config.max_messages_per_export
+        )
+        self._cache(user_id, settings)
+        self._mark_dirty(user_id, settings)
+        return settings
     
     def get_user_settings(self, user_id: int) -> UserSettings:
         """Get user settings, create default if not exists"""
-        if user_id not in self.settings_cache:
-            self.settings_cache[user_id] = UserSettings(
-                user_id=user_id,
-                export_format=export_config.default_format,
-                include_media=export_config.include_media_by_default,
-                max_messages=export_config.max_messages_per_export
-            )
-            self._save_settings()
-        
-        return self.settings_cache[user_id]
+        settings = self._lookup(user_id)
+        if settings is None:
+            settings = self._default_settings(user_id)
+        return settings
     
     def update_user_setting(self, user_id: int, setting_name: str, value: Any):
         """Update a specific user setting"""
@@ -83,7 +202,7 @@ class UserSettingsManager:
         if hasattr(settings, setting_name):
             setattr(settings, setting_name, value)
             settings.updated_at = datetime.now().isoformat()
-            self._save_settings()
+            self._mark_dirty(user_id, settings)
         else:
             raise ValueError(f"Invalid setting name: {setting_name}")
     
@@ -98,36 +217,46 @@ class UserSettingsManager:
                 raise ValueError(f"Invalid setting name: {setting_name}")
         
         settings.updated_at = datetime.now().isoformat()
-        self._save_settings()
+        self._mark_dirty(user_id, settings)
     
     def reset_user_settings(self, user_id: int):
         """Reset user settings to defaults"""
-        self.settings_cache[user_id] = UserSettings(
-            user_id=user_id,
-            export_format=export_config.default_format,
-            include_media=export_config.include_media_by_default,
-            max_messages=export_config.max_messages_per_export
-        )
-        self._save_settings()
+        self._default_settings(user_id)
     
     def delete_user_settings(self, user_id: int):
         """Delete user settings"""
-        if user_id in self.settings_cache:
+        if self._lookup(user_id) is not None:
             del self.settings_cache[user_id]
-            self._save_settings()
+            self._mark_dirty(user_id, None)
     
     def get_all_users(self) -> Dict[int, UserSettings]:
-        """Get all user settings"""
-        return self.settings_cache.copy()
+        """Get all user settings, read from the store without filling the cache"""
+        self.flush()
+        return self._from_store(self.store.load_all())
     
     def get_users_count(self) -> int:
         """Get total number of users"""
-        return len(self.settings_cache)
+        self.flush()
+        return self.store.count()
     
     def get_users_by_setting(self, setting_name: str, value: Any) -> Dict[int, UserSettings]:
         """Get users with specific setting value"""
-        result = {}
-        for user_id, settings in self.settings_cache.items():
-            if hasattr(settings, setting_name) and getattr(settings, setting_name) == value:
-                result[user_id] = settings
-        return result
\ No newline at end of file
+        if setting_name not in SETTINGS_COLUMNS:
+            return {}
+        self.flush()
+        return self._from_store(self.store.find_users(setting_name, value))
+    
+    def get_users_exported_since(self, since: datetime, until: Optional[datetime] = None) -> Dict[int, UserSettings]:
+        """Get users whose last export was at or after since and before until"""
+        self.flush()
+        return self._from_store(self.store.find_exported_users(
+            since.isoformat(), until.isoformat() if until else None
+        ))
+    
+    def count_users_by_setting(self, setting_name: str) -> Dict[Any, int]:
+        """
+        Count users per value of language, export_format, include_media or
+        last_export_day (YYYY-MM-DD of the last export)
+        """
+        self.flush()
+        return self.store.count_by(setting_name)
@@ -3,10 +3,15 @@ Utility functions for Telegram Channel Export Bot
 Additional helper functions and tools
 """
 import os
-import json
 import shutil
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from export_backup import create_incremental_backup
+from export_reader import (
+    EXPORT_FORMATS, count_export_messages, validate_archive_entries,
+    export_format_of, find_header_entry, open_export_text, read_json_channel_info, read_markdown_header
+)
 
 def cleanup_old_exports(export_folder: str = "exports", days_old: int = 7):
     """Clean up export files older than specified days"""
@@ -32,8 +37,11 @@ def cleanup_old_exports(export_folder: str = "exports", days_old: int = 7):
     
     return files_removed
 
-def get_export_statistics(export_folder: str = "exports") -> Dict[str, Any]:
-    """Get statistics about exports"""
+def get_export_statistics(export_folder: str = "exports", catalog=None) -> Dict[str, Any]:
+    """Get statistics about exports, from the export catalog when one is given"""
+    if catalog is not None:
+        return catalog.get_stats()
+    
     stats = {
         'total_files': 0,
         'formats': {'json': 0, 'csv': 0, 'md': 0},
@@ -83,7 +91,11 @@ def get_export_statistics(export_folder: str = "exports") -> Dict[str, Any]:
     return stats
 
 def validate_export_file(file_path: str) -> Dict[str, Any]:
-    """Validate an export file and return information"""
+    """
+    Validate an export file or the exports in a ZIP archive and return information
+
+    Files are read as streams, so memory use does not grow with their size.
+    """
     result = {
         'valid': False,
         'format': None,
@@ -103,27 +115,21 @@ def validate_export_file(file_path: str) -> Dict[str, Any]:
     result['format'] = ext
     
     try:
-        if ext == 'json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if 'messages' in data and isinstance(data['messages'], list):
-                    result['message_count'] = len(data['messages'])
-                    result['valid'] = True
-                else:
-                    result['error'] = "Invalid JSON structure"
-        
-        elif ext == 'csv':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                result['message_count'] = max(0, len(lines) - 1)  # Subtract header
+        if ext == 'zip':
+            archive = validate_archive_entries(file_path)
+            result['entries'] = archive['entries']
+            result['message_count'] = archive['message_count']
+            invalid = [entry for entry in archive['entries'] if not entry['valid']]
+            if not archive['entries']:
+                result['error'] = "No export files in archive"
+            elif invalid:
+                result['error'] = f"{invalid[0]['name']}: {invalid[0]['error']}"
+            else:
                 result['valid'] = True
         
-        elif ext == 'md':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Count message headers
-                result['message_count'] = content.count('## Message')
-                result['valid'] = True
+        elif ext in EXPORT_FORMATS:
+            result['message_count'] = count_export_messages(file_path, EXPORT_FORMATS[ext])
+            result['valid'] = True
         
         else:
             result['error'] = f"Unsupported format: {ext}"
@@ -133,11 +139,23 @@ def validate_export_file(file_path: str) -> Dict[str, Any]:
     
     return result
 
-def create_backup(source_folder: str = "exports", backup_folder: str = "backups"):
-    """Create a backup of export files"""
+def create_backup(source_folder: str = "exports", backup_folder: str = "backups", incremental: bool = False):
+    """
+    Create a backup of export files
+    
+    An incremental backup hardlinks files unchanged since the previous
+    incremental backup and copies only new and changed ones.
+    """
     if not os.path.exists(source_folder):
         return False
     
+    if incremental:
+        try:
+            return create_incremental_backup(source_folder, backup_folder)
+        except Exception as e:
+            print(f"Backup failed: {e}")
+            return False
+    
     # Create backup directory with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_path = os.path.join(backup_folder, f"export_backup_{timestamp}")
@@ -157,8 +175,13 @@ def format_file_size(size_bytes: int) -> str:
         size_bytes /= 1024.0
     return f"{size_bytes:.1f} TB"
 
-def get_channel_info_from_export(file_path: str) -> Dict[str, Any]:
-    """Extract channel information from export file"""
+def get_channel_info_from_export(file_path: str, entry: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract channel information from the header of an export file
+    
+    Only the start of the export is read. For a ZIP archive the given entry,
+    or else its first JSON or Markdown export, is read without extracting it.
+    """
     info = {
         'title': 'Unknown',
         'username': 'Unknown',
@@ -171,43 +194,37 @@ def get_channel_info_from_export(file_path: str) -> Dict[str, Any]:
         return info
     
     try:
-        ext = file_path.lower().split('.')[-1]
+        if entry is None and file_path.lower().endswith('.zip'):
+            entry = find_header_entry(file_path)
+            if entry is None:
+                return info
         
-        if ext == 'json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if 'channel_info' in data:
-                    channel = data['channel_info']
-                    info.update({
-                        'title': channel.get('title', 'Unknown'),
-                        'username': channel.get('username', 'Unknown'),
-                        'description': channel.get('description', ''),
-                        'participants': channel.get('participants_count', 0),
-                        'export_date': channel.get('export_date', 'Unknown')
-                    })
+        export_format = export_format_of(entry or file_path)
         
-        elif ext == 'md':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-                
-                # Extract title (first line)
-                if lines and lines[0].startswith('# '):
-                    info['title'] = lines[0][2:].strip()
-                
-                # Extract other info from markdown
-                for line in lines:
-                    if '**Description:**' in line:
-                        info['description'] = line.split('**Description:**')[1].strip()
-                    elif '**Participants:**' in line:
-                        participants_str = line.split('**Participants:**')[1].strip()
-                        # Remove commas and convert to int
-                        try:
-                            info['participants'] = int(participants_str.replace(',', ''))
-                        except:
-                            pass
-                    elif '**Export Date:**' in line:
-                        info['export_date'] = line.split('**Export Date:**')[1].strip()
+        if export_format == 'json':
+            with open_export_text(file_path, entry) as f:
+                channel = read_json_channel_info(f)
+            if channel:
+                info.update({
+                    'title': channel.get('title', 'Unknown'),
+                    'username': channel.get('username', 'Unknown'),
+                    'description': channel.get('description', ''),
+                    'participants': channel.get('participants_count', 0),
+                    'export_date': channel.get('export_date', 'Unknown')
+                })
+        
+        elif export_format == 'markdown':
+            with open_export_text(file_path, entry) as f:
+                header = read_markdown_header(f)
+            
+            info['title'] = header.get('title', info['title'])
+            info['description'] = header.get('Description', '')
+            info['export_date'] = header.get('Export Date', info['export_date'])
+            # Remove commas and convert to int
+            try:
+                info['participants'] = int(header.get('Participants', '0').replace(',', ''))
+            except ValueError:
+                pass
     
     except Exception as e:
         print(f"Error extracting channel info: {e}")
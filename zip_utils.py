@@ -3,16 +3,22 @@ ZIP Archive Utilities for Telegram Channel Export Bot
 Handles creation of ZIP archives containing exported data and media files
 """
 import os
+import asyncio
 import zipfile
 import tempfile
-from typing import List, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import shutil
 
 
 class ZipArchiveCreator:
     """Creates ZIP archives for exported channel data"""
-    
+
+    # Per-entry local header + central directory record, without the filename
+    ENTRY_OVERHEAD_BYTES = 128
+    VOLUME_RESERVE_BYTES = 64 * 1024
+    COPY_CHUNK_SIZE = 1024 * 1024
+
     def __init__(self, export_folder: str):
         self.export_folder = export_folder
     
@@ -20,7 +26,9 @@ class ZipArchiveCreator:
                                   main_file_path: str,
                                   media_files: List[str],
                                   channel_username: str,
-                                  export_format: str) -> str:
+                                  export_format: str,
+                                  additional_files: Optional[List[str]] = None,
+                                  search_index=None) -> str:
         """
         Create a ZIP archive containing the main export file and media files
         
@@ -29,22 +37,25 @@ class ZipArchiveCreator:
             media_files: List of media file paths relative to export folder
             channel_username: Channel username for naming
             export_format: Export format for naming
+            additional_files: Paths of other export files to store next to the main file
+            search_index: Search index to add the exported messages to
             
         Returns:
             Path to the created ZIP archive
         """
         
         # Create archive filename
-        timestamp = Path(main_file_path).stem.split('_')[-1]  # Extract timestamp
+        # Extract timestamp, ignoring part and index suffixes of sharded exports
+        timestamp = Path(main_file_path).name.split('.')[0].split('_')[-1]
         archive_name = f"{channel_username}_{timestamp}_{export_format}.zip"
         archive_path = os.path.join(self.export_folder, archive_name)
         
         # Create the ZIP archive
         with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
-            # Add main export file
-            if os.path.exists(main_file_path):
-                main_filename = os.path.basename(main_file_path)
-                zipf.write(main_file_path, main_filename)
+            # Add main export file and the other formats of the same export
+            for export_file_path in [main_file_path] + (additional_files or []):
+                if os.path.exists(export_file_path):
+                    zipf.write(export_file_path, os.path.basename(export_file_path))
             
             # Add media files if they exist
             if media_files:
@@ -60,6 +71,13 @@ class ZipArchiveCreator:
             await self._add_metadata_file(zipf, channel_username, export_format, 
                                         len(media_files) if media_files else 0)
         
+        if search_index is not None:
+            try:
+                await asyncio.to_thread(search_index.index_export_files, archive_name, channel_username,
+                                        [main_file_path] + (additional_files or []))
+            except Exception as e:
+                print(f"Warning: Could not index {archive_name}: {e}")
+        
         return archive_path
     
     async def _add_metadata_file(self, zipf: zipfile.ZipFile, 
@@ -69,6 +87,11 @@ class ZipArchiveCreator:
         """Add a metadata file to the ZIP archive"""
         from datetime import datetime
         
+        export_file_lines = "\n".join(
+            f"├── {channel_username}_[timestamp].{fmt}  # Main export file"
+            for fmt in export_format.split('+')
+        )
+        
         metadata_content = f"""# Export Information
 
 Channel: @{channel_username}
@@ -83,7 +106,7 @@ Media Files Included: {media_count}
 ## File Structure:
 ```
 {channel_username}_{export_format}.zip
-├── {channel_username}_[timestamp].{export_format}  # Main export file
+{export_file_lines}
 {"├── media/                                    # Media files folder" if media_count > 0 else ""}
 {"│   ├── photo_[id].jpg                        # Photos" if media_count > 0 else ""}
 {"│   ├── video_[id].mp4                        # Videos" if media_count > 0 else ""}
@@ -103,6 +126,126 @@ Generated by Telegram Channel Export Bot
         # Clean up temporary file
         os.unlink(tmp.name)
     
+    def split_archive(self, archive_path: str, max_volume_size: int) -> Tuple[List[str], List[str]]:
+        """
+        Split a ZIP archive into size-bounded volumes by entries
+
+        Every volume is a complete ZIP archive that can be opened on its own.
+        Entries are packed in their original order using the compressed size
+        recorded in the central directory as the size estimate. Entries that
+        do not fit into a volume on their own (large videos) are left out, so
+        the rest of the export can still be delivered.
+
+        Args:
+            archive_path: Path to the archive to split
+            max_volume_size: Maximum size of a single volume in bytes
+
+        Returns:
+            List of volume paths in order (the original path if no split is
+            needed) and names of the entries left out
+        """
+        if os.path.getsize(archive_path) <= max_volume_size:
+            return [archive_path], []
+
+        # Leave room for the central directory and end-of-archive records
+        budget = max_volume_size - self.VOLUME_RESERVE_BYTES
+
+        with zipfile.ZipFile(archive_path, 'r') as src:
+            groups = []
+            current = []
+            current_size = 0
+            skipped = []
+
+            for info in src.infolist():
+                entry_size = info.compress_size + self.ENTRY_OVERHEAD_BYTES + len(info.filename.encode('utf-8')) * 2
+                if entry_size > budget:
+                    skipped.append(info.filename)
+                    continue
+
+                if current and current_size + entry_size > budget:
+                    groups.append(current)
+                    current = []
+                    current_size = 0
+
+                current.append(info)
+                current_size += entry_size
+
+            if current:
+                groups.append(current)
+
+            base_path = os.path.splitext(archive_path)[0]
+            volume_paths = []
+
+            for index, group in enumerate(groups, 1):
+                volume_path = f"{base_path}.part{index:02d}.zip"
+                with zipfile.ZipFile(volume_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as dst:
+                    for info in group:
+                        target = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                        target.compress_type = info.compress_type
+                        target.external_attr = info.external_attr
+                        with src.open(info) as source_file, dst.open(target, 'w', force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as target_file:
+                            shutil.copyfileobj(source_file, target_file, self.COPY_CHUNK_SIZE)
+                volume_paths.append(volume_path)
+
+        return volume_paths, skipped
+
+    def rebuild_archive(self, source_path: str, target_path: str, replaced_entries: Dict[str, str]) -> str:
+        """
+        Copy an archive, replacing the content of some entries
+        
+        Args:
+            source_path: Path to the existing archive
+            target_path: Path of the archive to create
+            replaced_entries: New text content by entry name
+            
+        Returns:
+            Path to the created archive
+        """
+        with zipfile.ZipFile(source_path, 'r') as src, \
+                zipfile.ZipFile(target_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as dst:
+            for info in src.infolist():
+                if info.filename in replaced_entries:
+                    dst.writestr(info.filename, replaced_entries[info.filename].encode('utf-8'))
+                    continue
+                
+                target = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                target.compress_type = info.compress_type
+                target.external_attr = info.external_attr
+                with src.open(info) as source_file, \
+                        dst.open(target, 'w', force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as target_file:
+                    shutil.copyfileobj(source_file, target_file, self.COPY_CHUNK_SIZE)
+        
+        return target_path
+    
+    def combine_archives(self, archives: Dict[str, str], target_path: str,
+                         extra_entries: Optional[Dict[str, str]] = None) -> str:
+        """
+        Merge several archives into one, each under its own folder
+        
+        Args:
+            archives: Source archive path by folder name in the combined archive
+            target_path: Path of the archive to create
+            extra_entries: Text content of additional top-level entries by name
+            
+        Returns:
+            Path to the created archive
+        """
+        with zipfile.ZipFile(target_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as dst:
+            for folder, source_path in archives.items():
+                with zipfile.ZipFile(source_path, 'r') as src:
+                    for info in src.infolist():
+                        target = zipfile.ZipInfo(f"{folder}/{info.filename}", date_time=info.date_time)
+                        target.compress_type = info.compress_type
+                        target.external_attr = info.external_attr
+                        with src.open(info) as source_file, \
+                                dst.open(target, 'w', force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as target_file:
+                            shutil.copyfileobj(source_file, target_file, self.COPY_CHUNK_SIZE)
+            
+            for name, content in (extra_entries or {}).items():
+                dst.writestr(name, content.encode('utf-8'))
+        
+        return target_path
+    
     def cleanup_files(self, files_to_remove: List[str]):
         """Clean up temporary files after archive creation"""
         for file_path in files_to_remove: